@@ -1,11 +1,27 @@
+import http.client
 import json
 import os
 import re
+import time
 from urllib.error import HTTPError, URLError
 from urllib.request import Request, urlopen
 
 from fastapi import HTTPException
 
+from app.circuit_breaker import get_circuit_breaker
+from app.metrics import LLM_FAILURES, LLM_FALLBACKS, LLM_REQUEST_SECONDS
+from app.relevance import is_relevant_task
+from app.tracing import trace_span, traced
+
+# Upstream statuses that say something about the model's health rather than about the request.
+_BREAKER_HTTP_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class LlmCircuitOpen(HTTPException):
+    # Raised when every candidate model was skipped by its circuit breaker, so no request was sent.
+    def __init__(self, detail: str) -> None:
+        super().__init__(status_code=503, detail=detail)
+
 
 def _normalize_task_status(raw_status: str | None) -> str:
     if not raw_status:
@@ -254,6 +270,55 @@ def filter_extracted_tasks(tasks: list[dict], source_text: str, project_title: s
     return filtered[:15]
 
 
+def _filter_llm_tasks(tasks: list[dict], source_text: str, project_title: str) -> list[dict]:
+    # LLM output also goes through the relevance classifier; rule-extracted tasks already
+    # require project markers, so they skip the extra scoring.
+    return [task for task in filter_extracted_tasks(tasks, source_text, project_title) if is_relevant_task(task)]
+
+
+_HEADING_RE = re.compile(r"^(?:#{1,6}\s|\d+(?:\.\d+)*[.)]?\s|[A-ZА-ЯЁ][^.!?\n]{0,80}:$)")
+
+
+def _pack_pieces(pieces: list[str], max_chars: int, separator: str) -> list[str]:
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for piece in pieces:
+        # Start a new chunk at a section heading once the current one is reasonably full.
+        starts_section = size >= max_chars // 2 and bool(_HEADING_RE.match(piece))
+        if current and (size + len(separator) + len(piece) > max_chars or starts_section):
+            chunks.append(separator.join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += len(piece) + (len(separator) if size else 0)
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+
+def split_text_into_chunks(text: str, max_chars: int) -> list[str]:
+    # Paragraphs are packed whole into chunks of up to max_chars; a paragraph that is too long on
+    # its own is split into lines and sentences, and only a single overlong sentence is hard-cut.
+    pieces: list[str] = []
+    for paragraph in re.split(r"\n\s*\n", text or ""):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        sentences: list[str] = []
+        for sentence in re.split(r"(?<=[.!?;])\s+|\n+", paragraph):
+            sentence = sentence.strip()
+            while len(sentence) > max_chars:
+                sentences.append(sentence[:max_chars])
+                sentence = sentence[max_chars:].lstrip()
+            if sentence:
+                sentences.append(sentence)
+        pieces.extend(_pack_pieces(sentences, max_chars, "\n"))
+    return _pack_pieces(pieces, max_chars, "\n\n")
+
+
 def _split_text_to_clauses(text: str) -> list[str]:
     rough_parts = re.split(r"[\n\r;,.!?]+", text or "")
     clauses: list[str] = []
@@ -393,13 +458,44 @@ def extract_tasks_by_rules(text: str) -> list[dict]:
     return filter_extracted_tasks(tasks[:15], text, "")
 
 
-def extract_tasks_via_openrouter(
-    content_text: str,
-    project_title: str,
-    attachment_kind: str | None = None,
-    attachment_mime: str | None = None,
-    attachment_base64: str | None = None,
-) -> list[dict]:
+_EXTRACTION_RULES = (
+    "Rules: "
+    "1) Include ONLY tasks clearly related to the current project context. "
+    "2) Ignore personal, household, off-topic, joke, or unrelated requests. "
+    "3) If a message mixes related and unrelated items, keep only related items. "
+    "4) If project context is weak or generic, treat software/product tasks as related "
+    "(site/app/bot/frontend/backend/api/design/content/analytics/integration/testing). "
+    '5) If no related tasks exist, return {"tasks":[]}. '
+    "6) In mixed messages like 'make tea and add checkout page', keep only the software task. "
+    "7) title and description must be in Russian. If source text is another language, translate to Russian. "
+    "8) Keep titles short and specific. "
+    "9) execution_hours should be realistic integer estimate or null if uncertain. "
+    "10) Do not output markdown or any extra text."
+)
+_MESSAGE_PROMPT = (
+    "You extract project tasks from user messages for a task tracker. "
+    "Return ONLY one JSON object with exact schema: "
+    '{"tasks":[{"title":"string","description":"string","execution_hours":number|null,"status":"NEW|IN_PROGRESS|DONE"}]}. '
+    + _EXTRACTION_RULES
+)
+_BATCH_PROMPT = (
+    "You extract project tasks from a batch of chat messages for a task tracker. "
+    "Messages are given as a JSON array of objects with message_id and text; treat each message independently. "
+    "Return ONLY one JSON object with exact schema: "
+    '{"tasks":[{"message_id":number,"title":"string","description":"string","execution_hours":number|null,"status":"NEW|IN_PROGRESS|DONE"}]}. '
+    "Every task must carry the message_id of the message it was extracted from. "
+    + _EXTRACTION_RULES
+)
+
+
+def _request_openrouter_payload(
+    prompt: str,
+    user_text: str,
+    image_data_url: str | None = None,
+    allow_text_retry: bool = False,
+) -> dict | None:
+    # Sends one extraction prompt through the model chain and returns the parsed JSON object,
+    # or None when the model answered with nothing usable.
     api_key = os.getenv("OPENROUTER_API_KEY", "").strip()
     if not api_key:
         raise HTTPException(status_code=503, detail="OPENROUTER_API_KEY is not configured")
@@ -410,37 +506,11 @@ def extract_tasks_via_openrouter(
         for item in os.getenv("OPENROUTER_FALLBACK_MODELS", "").split(",")
         if item.strip()
     ]
-    prompt = (
-        "You extract project tasks from user messages for a task tracker. "
-        "Return ONLY one JSON object with exact schema: "
-        '{"tasks":[{"title":"string","description":"string","execution_hours":number|null,"status":"NEW|IN_PROGRESS|DONE"}]}. '
-        "Rules: "
-        "1) Include ONLY tasks clearly related to the current project context. "
-        "2) Ignore personal, household, off-topic, joke, or unrelated requests. "
-        "3) If a message mixes related and unrelated items, keep only related items. "
-        "4) If project context is weak or generic, treat software/product tasks as related "
-        "(site/app/bot/frontend/backend/api/design/content/analytics/integration/testing). "
-        '5) If no related tasks exist, return {"tasks":[]}. '
-        "6) In mixed messages like 'make tea and add checkout page', keep only the software task. "
-        "7) title and description must be in Russian. If source text is another language, translate to Russian. "
-        "8) Keep titles short and specific. "
-        "9) execution_hours should be realistic integer estimate or null if uncertain. "
-        "10) Do not output markdown or any extra text."
-    )
-    user_text = f"Project title: {project_title}\n\nUser message:\n{content_text}"
     user_content: str | list[dict] = user_text
-    if (
-        attachment_kind == "image"
-        and attachment_base64
-        and attachment_mime
-        and attachment_mime.startswith("image/")
-    ):
+    if image_data_url:
         user_content = [
             {"type": "text", "text": user_text + "\n\nAlso analyze the attached image content."},
-            {
-                "type": "image_url",
-                "image_url": {"url": f"data:{attachment_mime};base64,{attachment_base64}"},
-            },
+            {"type": "image_url", "image_url": {"url": image_data_url}},
         ]
 
     def build_request_body(use_system_prompt: bool, model_name: str, use_image: bool) -> dict:
@@ -468,9 +538,11 @@ def extract_tasks_via_openrouter(
             "temperature": 0.1,
         }
 
+    api_url = os.getenv("OPENROUTER_API_URL", "").strip() or "https://openrouter.ai/api/v1/chat/completions"
+
     def send_request(request_body: dict) -> dict:
         req = Request(
-            url="https://openrouter.ai/api/v1/chat/completions",
+            url=api_url,
             data=json.dumps(request_body).encode("utf-8"),
             method="POST",
             headers={
@@ -478,12 +550,50 @@ def extract_tasks_via_openrouter(
                 "Content-Type": "application/json",
             },
         )
-        with urlopen(req, timeout=45) as response:
-            return json.loads(response.read().decode("utf-8"))
+        model_name = request_body["model"]
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            with trace_span("openrouter.request", model=model_name), urlopen(req, timeout=45) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except HTTPError as exc:
+            outcome = f"http_{exc.code}"
+            raise
+        except URLError:
+            outcome = "unreachable"
+            raise
+        except TimeoutError:
+            outcome = "timeout"
+            raise
+        except json.JSONDecodeError:
+            outcome = "invalid_json"
+            raise
+        except (OSError, http.client.HTTPException, UnicodeDecodeError):
+            # Dropped connections, truncated bodies and undecodable bytes; none of them is a success.
+            outcome = "unreachable"
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            LLM_REQUEST_SECONDS.labels(model_name, "ok" if outcome == "ok" else "error").observe(elapsed)
+            if outcome != "ok":
+                LLM_FAILURES.labels(model_name, outcome).inc()
+            failed = outcome in ("unreachable", "timeout", "invalid_json") or (
+                outcome.startswith("http_") and int(outcome[5:]) in _BREAKER_HTTP_CODES
+            )
+            get_circuit_breaker(model_name).record(failed, elapsed)
 
     def try_models(use_image: bool, models: list[str]) -> tuple[dict | None, str | None]:
         last_error: str | None = None
-        for model_name in models:
+        for index, model_name in enumerate(models):
+            # An open circuit skips the model without paying its timeout.
+            if not get_circuit_breaker(model_name).allow_request():
+                LLM_FAILURES.labels(model_name, "circuit_open").inc()
+                skipped_models.append(model_name)
+                last_error = last_error or f"OpenRouter model {model_name} is unavailable (circuit open)"
+                continue
+            attempted_models.append(model_name)
+            if index:
+                LLM_FALLBACKS.labels(model_name).inc()
             try:
                 return (
                     send_request(build_request_body(use_system_prompt=True, model_name=model_name, use_image=use_image)),
@@ -503,7 +613,7 @@ def extract_tasks_via_openrouter(
                         inner_body = inner_exc.read().decode("utf-8", errors="replace")
                         last_error = f"OpenRouter error {inner_exc.code}: {inner_body}"
                         continue
-                    except URLError as inner_exc:
+                    except (OSError, http.client.HTTPException, UnicodeDecodeError) as inner_exc:
                         last_error = f"OpenRouter is unreachable: {inner_exc}"
                         continue
                     except json.JSONDecodeError:
@@ -511,7 +621,7 @@ def extract_tasks_via_openrouter(
                         continue
                 last_error = f"OpenRouter error {exc.code}: {body}"
                 continue
-            except URLError as exc:
+            except (OSError, http.client.HTTPException, UnicodeDecodeError) as exc:
                 last_error = f"OpenRouter is unreachable: {exc}"
                 continue
             except json.JSONDecodeError:
@@ -519,12 +629,17 @@ def extract_tasks_via_openrouter(
                 continue
         return None, last_error
 
+    attempted_models: list[str] = []
+    skipped_models: list[str] = []
     has_image = isinstance(user_content, list)
     model_candidates = [vision_model] + [m for m in fallback_models if m != vision_model]
     parsed, request_error = try_models(use_image=has_image, models=model_candidates)
-    if parsed is None and has_image and content_text.strip():
+    if parsed is None and has_image and allow_text_retry:
         text_candidates = [text_model] + [m for m in fallback_models if m != text_model]
+        LLM_FALLBACKS.labels(text_model).inc()
         parsed, request_error = try_models(use_image=False, models=text_candidates)
+    if parsed is None and not attempted_models and skipped_models:
+        raise LlmCircuitOpen(f"OpenRouter circuits are open for: {', '.join(dict.fromkeys(skipped_models))}")
     if parsed is None:
         raise HTTPException(status_code=502, detail=request_error or "OpenRouter request failed")
 
@@ -537,17 +652,68 @@ def extract_tasks_via_openrouter(
 
     choices = parsed.get("choices")
     if not isinstance(choices, list) or not choices:
-        return []
+        return None
     message = choices[0].get("message") if isinstance(choices[0], dict) else None
     content = message.get("content") if isinstance(message, dict) else None
     content_text_raw = _extract_openrouter_text(content)
     if not content_text_raw.strip():
-        return []
+        return None
     try:
         payload = _extract_json_object(content_text_raw)
     except HTTPException:
-        return []
-    tasks = payload.get("tasks") if isinstance(payload, dict) else None
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+@traced("extract_tasks_via_openrouter")
+def extract_tasks_via_openrouter(
+    content_text: str,
+    project_title: str,
+    attachment_kind: str | None = None,
+    attachment_mime: str | None = None,
+    attachment_base64: str | None = None,
+) -> list[dict]:
+    image_data_url = None
+    if (
+        attachment_kind == "image"
+        and attachment_base64
+        and attachment_mime
+        and attachment_mime.startswith("image/")
+    ):
+        image_data_url = f"data:{attachment_mime};base64,{attachment_base64}"
+    payload = _request_openrouter_payload(
+        _MESSAGE_PROMPT,
+        f"Project title: {project_title}\n\nUser message:\n{content_text}",
+        image_data_url,
+        allow_text_retry=bool(content_text.strip()),
+    )
+    tasks = payload.get("tasks") if payload else None
     if not isinstance(tasks, list):
         return []
-    return filter_extracted_tasks(_normalize_ai_tasks(tasks), content_text, project_title)
+    return _filter_llm_tasks(_normalize_ai_tasks(tasks), content_text, project_title)
+
+
+@traced("extract_tasks_batch_via_openrouter")
+def extract_tasks_batch_via_openrouter(messages: list[tuple[int, str]], project_title: str) -> dict[int, list[dict]]:
+    # One request for several text messages of the same chat; tasks come back keyed by message id.
+    texts = dict(messages)
+    batch_json = json.dumps(
+        [{"message_id": message_id, "text": text} for message_id, text in messages],
+        ensure_ascii=False,
+    )
+    payload = _request_openrouter_payload(_BATCH_PROMPT, f"Project title: {project_title}\n\nMessages:\n{batch_json}")
+    tasks = payload.get("tasks") if payload else None
+    grouped: dict[int, list[dict]] = {message_id: [] for message_id in texts}
+    for item in tasks if isinstance(tasks, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            message_id = int(item.get("message_id"))
+        except (TypeError, ValueError):
+            continue
+        if message_id in grouped:
+            grouped[message_id].append(item)
+    return {
+        message_id: _filter_llm_tasks(_normalize_ai_tasks(items), texts[message_id], project_title)
+        for message_id, items in grouped.items()
+    }
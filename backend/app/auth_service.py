@@ -5,11 +5,10 @@ import time
 from urllib.parse import parse_qsl
 
 from fastapi import HTTPException
-from psycopg import connect
 from psycopg.errors import Error as PsycopgError
 from psycopg.rows import dict_row
 
-from app.db import get_database_url
+from app.db import connect, get_database_url, get_read_database_url, record_user_write
 
 
 def verify_telegram_init_data(init_data: str, bot_token: str) -> dict:
@@ -84,6 +83,7 @@ def save_or_update_user(telegram_user: dict) -> dict:
                 )
                 user_row = cur.fetchone()
             conn.commit()
+            record_user_write(tg_id)
             return user_row
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
@@ -93,7 +93,7 @@ def save_or_update_user(telegram_user: dict) -> dict:
 
 def get_user_by_tg_id(tg_id: int) -> dict | None:
     try:
-        with connect(get_database_url()) as conn:
+        with connect(get_read_database_url(tg_id)) as conn:
             with conn.cursor(row_factory=dict_row) as cur:
                 cur.execute(
                     """
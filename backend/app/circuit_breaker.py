@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import deque
+
+from app.config import get_float_env
+from app.metrics import LLM_CIRCUIT_STATE
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    # Judges calls to one upstream model over a sliding time window. Once enough calls are seen and
+    # the share of failed or slow ones crosses the threshold, the circuit opens and callers skip the
+    # model. After the cool-down a single probe is let through (half-open); its outcome closes the
+    # circuit or re-opens it for another cool-down.
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.calls: deque[tuple[float, bool]] = deque()
+        self.lock = threading.Lock()
+        LLM_CIRCUIT_STATE.labels(name).set(_STATE_VALUES[CLOSED])
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        LLM_CIRCUIT_STATE.labels(self.name).set(_STATE_VALUES[state])
+
+    def allow_request(self) -> bool:
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < get_float_env("LLM_BREAKER_OPEN_SECONDS", 30):
+                    return False
+                self._set_state(HALF_OPEN)
+            if self.probe_in_flight:
+                return False
+            self.probe_in_flight = True
+            return True
+
+    def record(self, failed: bool, elapsed_seconds: float) -> None:
+        now = time.monotonic()
+        bad = failed or elapsed_seconds >= get_float_env("LLM_BREAKER_SLOW_CALL_SECONDS", 20)
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probe_in_flight = False
+                if bad:
+                    self.opened_at = now
+                    self._set_state(OPEN)
+                else:
+                    self.calls.clear()
+                    self._set_state(CLOSED)
+                return
+            if self.state == OPEN:
+                # A call admitted before the circuit opened; the verdict is already in.
+                return
+            self.calls.append((now, bad))
+            window_start = now - get_float_env("LLM_BREAKER_WINDOW_SECONDS", 60)
+            while self.calls and self.calls[0][0] < window_start:
+                self.calls.popleft()
+            if len(self.calls) < max(int(get_float_env("LLM_BREAKER_MIN_CALLS", 4)), 1):
+                return
+            bad_calls = sum(1 for _, call_bad in self.calls if call_bad)
+            if bad_calls / len(self.calls) >= get_float_env("LLM_BREAKER_FAILURE_RATE", 0.5):
+                self.opened_at = now
+                self._set_state(OPEN)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def circuit_breaker_states() -> dict[str, str]:
+    with _breakers_lock:
+        return {name: breaker.state for name, breaker in _breakers.items()}
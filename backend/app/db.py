@@ -1,4 +1,44 @@
+import logging
 import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from psycopg import Connection, Cursor
+from psycopg.errors import Error as PsycopgError
+from psycopg_pool import ConnectionPool, PoolTimeout
+
+from app.config import get_float_env, get_int_env
+from app.metrics import (
+    DB_CONNECT_SECONDS,
+    DB_CONNECTIONS_OPEN,
+    DB_QUERY_SECONDS,
+    DB_READ_ROUTES,
+    DB_REPLICA_LAG_SECONDS,
+)
+from app.sql_catalog import prepared_statements_enabled
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    statements: list[str] = field(default_factory=list)
+    parent: "QueryStats | None" = None
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+_recent_writes: dict[int, float] = {}
+_recent_writes_lock = threading.Lock()
+_replica_state = {"next_check_at": float("-inf"), "usable": False}
+_replica_state_lock = threading.Lock()
 
 
 def get_database_url() -> str:
@@ -19,3 +59,211 @@ def get_database_url() -> str:
         )
 
     return f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+
+
+def get_replica_database_url() -> str | None:
+    return os.getenv("DATABASE_REPLICA_URL", "").strip() or None
+
+
+def get_slow_query_threshold_seconds() -> float:
+    raw_value = os.getenv("DB_SLOW_QUERY_MS", "200").strip()
+    try:
+        return max(0.0, float(raw_value)) / 1000
+    except ValueError:
+        return 0.2
+
+
+def _query_call_site() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename.replace("\\", "/")
+        if "/app/" in filename and not filename.endswith("/app/db.py"):
+            return f"{filename.rsplit('/app/', 1)[1]}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def _collapse_query(query) -> str:
+    text = query.as_string(None) if hasattr(query, "as_string") else str(query)
+    return " ".join(text.split())
+
+
+@contextmanager
+def track_queries():
+    stats = QueryStats(parent=_query_stats.get())
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    with track_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        listing = "\n".join(f"  {index + 1}. {statement[:200]}" for index, statement in enumerate(stats.statements))
+        raise AssertionError(f"Expected at most {limit} SQL statements, got {stats.count}:\n{listing}")
+
+
+class InstrumentedCursor(Cursor):
+    def execute(self, query, params=None, *, prepare=None, binary=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, params, prepare=prepare, binary=binary)
+        finally:
+            elapsed = time.perf_counter() - started
+            DB_QUERY_SECONDS.labels(self.connection.db_function).observe(elapsed)
+            stats = _query_stats.get()
+            while stats is not None:
+                stats.count += 1
+                stats.seconds += elapsed
+                stats.statements.append(_collapse_query(query))
+                stats = stats.parent
+            if elapsed >= get_slow_query_threshold_seconds():
+                logger.warning(
+                    "Slow query %.1f ms at %s: %s",
+                    elapsed * 1000,
+                    _query_call_site(),
+                    _collapse_query(query)[:500],
+                )
+
+
+class InstrumentedConnection(Connection):
+    db_function = "unknown"
+
+
+def _reset_pooled_connection(conn: InstrumentedConnection) -> None:
+    # Handlers such as get_project_board switch the session to a read-only snapshot.
+    if conn.read_only is not None:
+        conn.read_only = None
+    if conn.isolation_level is not None:
+        conn.isolation_level = None
+
+
+def _get_pool(conninfo: str) -> ConnectionPool:
+    pool = _pools.get(conninfo)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(conninfo)
+        if pool is None:
+            prepare_threshold = 5 if prepared_statements_enabled() else None
+            pool = ConnectionPool(
+                conninfo,
+                connection_class=InstrumentedConnection,
+                kwargs={"cursor_factory": InstrumentedCursor, "prepare_threshold": prepare_threshold},
+                min_size=max(0, get_int_env("DB_POOL_MIN_SIZE", 1)),
+                max_size=max(1, get_int_env("DB_POOL_MAX_SIZE", 10)),
+                timeout=max(0.1, get_int_env("DB_POOL_TIMEOUT_SECONDS", 10)),
+                reset=_reset_pooled_connection,
+                name="vkr",
+                open=True,
+            )
+            _pools[conninfo] = pool
+    return pool
+
+
+def close_database_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+@contextmanager
+def _pooled_connection(conninfo: str, function: str):
+    started = time.perf_counter()
+    with _get_pool(conninfo).connection() as conn:
+        DB_CONNECT_SECONDS.labels(function).observe(time.perf_counter() - started)
+        DB_CONNECTIONS_OPEN.inc()
+        conn.db_function = function
+        try:
+            yield conn
+        finally:
+            DB_CONNECTIONS_OPEN.dec()
+
+
+def connect(conninfo: str):
+    # Like psycopg.connect() as a context manager: commits on clean exit, rolls back on error.
+    return _pooled_connection(conninfo, sys._getframe(1).f_code.co_name)
+
+
+def record_user_write(tg_id: int) -> None:
+    # Read-your-writes: reads by this user go to the primary for a short window after a mutation.
+    # The window is kept per process, like the projects cache.
+    window = get_float_env("DB_READ_YOUR_WRITES_SECONDS", 5)
+    if window <= 0 or not get_replica_database_url():
+        return
+    now = time.monotonic()
+    with _recent_writes_lock:
+        _recent_writes[tg_id] = now + window
+        if len(_recent_writes) > 10000:
+            for stale_tg_id in [key for key, deadline in _recent_writes.items() if deadline <= now]:
+                del _recent_writes[stale_tg_id]
+
+
+def _wrote_recently(tg_id: int) -> bool:
+    with _recent_writes_lock:
+        deadline = _recent_writes.get(tg_id)
+    return deadline is not None and deadline > time.monotonic()
+
+
+REPLICA_RETRY_SECONDS = 30
+_REPLICA_LAG_QUERY = """
+    SELECT CASE
+      WHEN NOT pg_is_in_recovery() THEN 0
+      WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+      ELSE EXTRACT(EPOCH FROM NOW() - pg_last_xact_replay_timestamp())
+    END AS lag_seconds;
+"""
+
+
+def _replica_is_usable(conninfo: str) -> bool:
+    now = time.monotonic()
+    with _replica_state_lock:
+        if now < _replica_state["next_check_at"]:
+            return _replica_state["usable"]
+        # Other requests keep using the previous verdict while this one checks.
+        _replica_state["next_check_at"] = float("inf")
+    usable = False
+    next_check_in = REPLICA_RETRY_SECONDS
+    try:
+        with _get_pool(conninfo).connection(timeout=get_float_env("DB_REPLICA_CONNECT_TIMEOUT_SECONDS", 1)) as conn:
+            conn.db_function = "replica_lag_check"
+            lag = conn.execute(_REPLICA_LAG_QUERY).fetchone()[0]
+        if lag is not None:
+            DB_REPLICA_LAG_SECONDS.set(float(lag))
+            usable = float(lag) <= get_float_env("DB_REPLICA_MAX_LAG_SECONDS", 2)
+        next_check_in = get_float_env("DB_REPLICA_LAG_CHECK_SECONDS", 1)
+    except (PoolTimeout, PsycopgError) as exc:
+        DB_REPLICA_LAG_SECONDS.set(-1)
+        logger.warning("Read replica is unavailable, reading from the primary: %s", exc)
+    finally:
+        # Any other failure must not leave next_check_at at infinity, which would pin the old verdict for good.
+        with _replica_state_lock:
+            _replica_state["usable"] = usable
+            _replica_state["next_check_at"] = time.monotonic() + next_check_in
+    return usable
+
+
+def get_read_database_url(tg_id: int | None = None) -> str:
+    # DSN for read-only handlers: the replica when it is configured and caught up, else the primary.
+    replica_url = get_replica_database_url()
+    if not replica_url:
+        DB_READ_ROUTES.labels("primary").inc()
+        return get_database_url()
+    if tg_id is not None and _wrote_recently(tg_id):
+        DB_READ_ROUTES.labels("primary_sticky").inc()
+        return get_database_url()
+    if not _replica_is_usable(replica_url):
+        DB_READ_ROUTES.labels("primary_lag").inc()
+        return get_database_url()
+    DB_READ_ROUTES.labels("replica").inc()
+    return replica_url
+
+
+def is_replica_url(conninfo: str) -> bool:
+    return conninfo == get_replica_database_url()
@@ -1,6 +1,13 @@
+import base64
 import json
+import time
+from datetime import datetime
 
 from fastapi import HTTPException
+from psycopg.errors import Error as PsycopgError
+
+from app.metrics import AUDIT_FLUSH_ROWS, AUDIT_FLUSH_SECONDS
+from app.sql_catalog import execute_named
 
 
 def normalize_task_status(status: str | None) -> str:
@@ -12,6 +19,25 @@ def normalize_task_status(status: str | None) -> str:
     return status_upper
 
 
+def encode_keyset_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_keyset_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_at_raw, row_id_raw = raw.rsplit("|", 1)
+        created_at = datetime.fromisoformat(created_at_raw)
+        row_id = int(row_id_raw)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    if created_at.tzinfo is None:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return created_at, row_id
+
+
 def ensure_projects_chat_columns(cur) -> None:
     cur.execute("ALTER TABLE projects ADD COLUMN IF NOT EXISTS tg_chat_instance TEXT;")
     cur.execute("ALTER TABLE projects ADD COLUMN IF NOT EXISTS tg_chat_type TEXT;")
@@ -50,6 +76,9 @@ def ensure_sprint_tables(cur) -> None:
     cur.execute("ALTER TABLE tasks ADD COLUMN IF NOT EXISTS sprint_id BIGINT;")
     cur.execute("ALTER TABLE tasks ADD COLUMN IF NOT EXISTS execution_hours INTEGER;")
     cur.execute("ALTER TABLE tasks ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;")
+    cur.execute("ALTER TABLE projects ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ;")
+    cur.execute("ALTER TABLE sprints ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ;")
+    cur.execute("ALTER TABLE tasks ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ;")
     cur.execute("UPDATE tasks SET version = 1 WHERE version IS NULL OR version < 1;")
     cur.execute(
         """
@@ -128,26 +157,508 @@ def ensure_task_audit_table(cur) -> None:
     cur.execute("CREATE INDEX IF NOT EXISTS idx_task_audit_task_created ON task_audit_log(task_id, created_at DESC);")
 
 
-def add_task_audit_entry(
-    cur,
-    task_id: int,
-    actor_id: int,
-    event_type: str,
-    field: str | None,
-    old_value,
-    new_value,
-) -> None:
-    cur.execute(
-        """
-        INSERT INTO task_audit_log (task_id, actor_id, event_type, field, old_value, new_value)
-        VALUES (%s, %s, %s::audit_event_type, %s, %s::jsonb, %s::jsonb);
-        """,
-        (
-            task_id,
-            actor_id,
-            event_type,
-            field,
-            json.dumps(old_value, ensure_ascii=False) if old_value is not None else None,
-            json.dumps(new_value, ensure_ascii=False) if new_value is not None else None,
-        ),
+class TaskAuditBuffer:
+    # Collects audit events for one transaction and writes them with a single multi-row INSERT.
+    # The whole batch is serialized as one JSON document, so call flush() right before commit.
+
+    def __init__(self) -> None:
+        self._rows: list[dict] = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(
+        self,
+        task_id: int,
+        actor_id: int,
+        event_type: str,
+        field: str | None = None,
+        old_value=None,
+        new_value=None,
+    ) -> None:
+        self._rows.append(
+            {
+                "task_id": task_id,
+                "actor_id": actor_id,
+                "event_type": event_type,
+                "field": field,
+                "old_value": old_value,
+                "new_value": new_value,
+            }
+        )
+
+    def flush(self, cur) -> int:
+        if not self._rows:
+            return 0
+        started = time.perf_counter()
+        execute_named(cur, "task_audit_insert_batch", (json.dumps(self._rows, ensure_ascii=False),))
+        written = len(self._rows)
+        AUDIT_FLUSH_SECONDS.observe(time.perf_counter() - started)
+        AUDIT_FLUSH_ROWS.observe(written)
+        self._rows.clear()
+        return written
+
+
+def ensure_project_summary_table(cur) -> None:
+    cur.execute("SELECT to_regclass('project_summaries') IS NOT NULL AS summary_exists;")
+    row = cur.fetchone()
+    summary_exists = row["summary_exists"] if isinstance(row, dict) else row[0]
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS project_summaries (
+          project_id BIGINT PRIMARY KEY REFERENCES projects(id) ON DELETE CASCADE,
+          new_task_count INTEGER NOT NULL DEFAULT 0,
+          in_progress_task_count INTEGER NOT NULL DEFAULT 0,
+          done_task_count INTEGER NOT NULL DEFAULT 0,
+          open_sprint_count INTEGER NOT NULL DEFAULT 0,
+          last_activity_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+        """
+    )
+    cur.execute(
+        """
+        CREATE OR REPLACE FUNCTION project_summary_on_project_insert()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          INSERT INTO project_summaries (project_id, last_activity_at)
+          VALUES (NEW.id, NEW.created_at)
+          ON CONFLICT (project_id) DO NOTHING;
+          RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    cur.execute(
+        """
+        CREATE OR REPLACE FUNCTION project_summary_on_task_change()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          IF TG_OP = 'UPDATE' AND OLD.project_id = NEW.project_id AND OLD.status = NEW.status
+            AND (OLD.deleted_at IS NULL) = (NEW.deleted_at IS NULL) THEN
+            UPDATE project_summaries
+            SET last_activity_at = GREATEST(last_activity_at, NOW())
+            WHERE project_id = NEW.project_id;
+            RETURN NULL;
+          END IF;
+          IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.deleted_at IS NULL THEN
+            UPDATE project_summaries
+            SET
+              new_task_count = new_task_count - (OLD.status::TEXT = 'NEW')::INT,
+              in_progress_task_count = in_progress_task_count - (OLD.status::TEXT = 'IN_PROGRESS')::INT,
+              done_task_count = done_task_count - (OLD.status::TEXT = 'DONE')::INT,
+              last_activity_at = GREATEST(last_activity_at, NOW())
+            WHERE project_id = OLD.project_id;
+          END IF;
+          IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.deleted_at IS NULL THEN
+            UPDATE project_summaries
+            SET
+              new_task_count = new_task_count + (NEW.status::TEXT = 'NEW')::INT,
+              in_progress_task_count = in_progress_task_count + (NEW.status::TEXT = 'IN_PROGRESS')::INT,
+              done_task_count = done_task_count + (NEW.status::TEXT = 'DONE')::INT,
+              last_activity_at = GREATEST(last_activity_at, NOW())
+            WHERE project_id = NEW.project_id;
+          END IF;
+          RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    cur.execute(
+        """
+        CREATE OR REPLACE FUNCTION project_summary_on_sprint_change()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.is_open AND OLD.deleted_at IS NULL THEN
+            UPDATE project_summaries
+            SET open_sprint_count = open_sprint_count - 1
+            WHERE project_id = OLD.project_id;
+          END IF;
+          IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.is_open AND NEW.deleted_at IS NULL THEN
+            UPDATE project_summaries
+            SET open_sprint_count = open_sprint_count + 1
+            WHERE project_id = NEW.project_id;
+          END IF;
+          IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            UPDATE project_summaries
+            SET last_activity_at = GREATEST(last_activity_at, NOW())
+            WHERE project_id = NEW.project_id;
+          END IF;
+          RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    cur.execute(
+        """
+        CREATE OR REPLACE FUNCTION project_summary_on_comment_insert()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          UPDATE project_summaries ps
+          SET last_activity_at = GREATEST(ps.last_activity_at, NEW.created_at)
+          FROM tasks t
+          WHERE t.id = NEW.task_id
+            AND ps.project_id = t.project_id;
+          RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    cur.execute(
+        """
+        CREATE OR REPLACE TRIGGER trg_projects_summary
+        AFTER INSERT ON projects
+        FOR EACH ROW
+        EXECUTE FUNCTION project_summary_on_project_insert();
+        """
+    )
+    cur.execute(
+        """
+        CREATE OR REPLACE TRIGGER trg_tasks_summary
+        AFTER INSERT OR DELETE OR UPDATE ON tasks
+        FOR EACH ROW
+        EXECUTE FUNCTION project_summary_on_task_change();
+        """
+    )
+    cur.execute(
+        """
+        CREATE OR REPLACE TRIGGER trg_sprints_summary
+        AFTER INSERT OR DELETE OR UPDATE OF is_open, project_id, deleted_at ON sprints
+        FOR EACH ROW
+        EXECUTE FUNCTION project_summary_on_sprint_change();
+        """
+    )
+    cur.execute(
+        """
+        CREATE OR REPLACE TRIGGER trg_comments_summary
+        AFTER INSERT ON comments
+        FOR EACH ROW
+        EXECUTE FUNCTION project_summary_on_comment_insert();
+        """
+    )
+    if summary_exists:
+        return
+    cur.execute(
+        """
+        INSERT INTO project_summaries (
+          project_id, new_task_count, in_progress_task_count, done_task_count, open_sprint_count, last_activity_at
+        )
+        SELECT
+          p.id,
+          COALESCE(tc.new_task_count, 0),
+          COALESCE(tc.in_progress_task_count, 0),
+          COALESCE(tc.done_task_count, 0),
+          COALESCE(sc.open_sprint_count, 0),
+          GREATEST(p.created_at, tc.last_task_at, cc.last_comment_at)
+        FROM projects p
+        LEFT JOIN (
+          SELECT
+            project_id,
+            COUNT(*) FILTER (WHERE status::TEXT = 'NEW')::INT AS new_task_count,
+            COUNT(*) FILTER (WHERE status::TEXT = 'IN_PROGRESS')::INT AS in_progress_task_count,
+            COUNT(*) FILTER (WHERE status::TEXT = 'DONE')::INT AS done_task_count,
+            MAX(updated_at) AS last_task_at
+          FROM tasks
+          WHERE deleted_at IS NULL
+          GROUP BY project_id
+        ) tc ON tc.project_id = p.id
+        LEFT JOIN (
+          SELECT project_id, COUNT(*)::INT AS open_sprint_count
+          FROM sprints
+          WHERE is_open = TRUE AND deleted_at IS NULL
+          GROUP BY project_id
+        ) sc ON sc.project_id = p.id
+        LEFT JOIN (
+          SELECT t.project_id, MAX(c.created_at) AS last_comment_at
+          FROM comments c
+          JOIN tasks t ON t.id = c.task_id
+          GROUP BY t.project_id
+        ) cc ON cc.project_id = p.id
+        ON CONFLICT (project_id) DO NOTHING;
+        """
+    )
+
+
+def ensure_sprint_rollup_table(cur) -> None:
+    cur.execute("SELECT to_regclass('sprint_daily_rollups') IS NOT NULL AS rollup_exists;")
+    row = cur.fetchone()
+    rollup_exists = row["rollup_exists"] if isinstance(row, dict) else row[0]
+    if rollup_exists:
+        return
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sprint_daily_rollups (
+          sprint_id BIGINT NOT NULL REFERENCES sprints(id) ON DELETE CASCADE,
+          day DATE NOT NULL,
+          new_count INTEGER NOT NULL DEFAULT 0,
+          in_progress_count INTEGER NOT NULL DEFAULT 0,
+          done_count INTEGER NOT NULL DEFAULT 0,
+          new_hours INTEGER NOT NULL DEFAULT 0,
+          in_progress_hours INTEGER NOT NULL DEFAULT 0,
+          done_hours INTEGER NOT NULL DEFAULT 0,
+          PRIMARY KEY (sprint_id, day)
+        );
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO sprint_daily_rollups (
+          sprint_id, day, new_count, in_progress_count, done_count, new_hours, in_progress_hours, done_hours
+        )
+        SELECT
+          t.sprint_id,
+          t.updated_at::DATE,
+          COUNT(*) FILTER (WHERE t.status::TEXT = 'NEW')::INT,
+          COUNT(*) FILTER (WHERE t.status::TEXT = 'IN_PROGRESS')::INT,
+          COUNT(*) FILTER (WHERE t.status::TEXT = 'DONE')::INT,
+          COALESCE(SUM(t.execution_hours) FILTER (WHERE t.status::TEXT = 'NEW'), 0)::INT,
+          COALESCE(SUM(t.execution_hours) FILTER (WHERE t.status::TEXT = 'IN_PROGRESS'), 0)::INT,
+          COALESCE(SUM(t.execution_hours) FILTER (WHERE t.status::TEXT = 'DONE'), 0)::INT
+        FROM tasks t
+        WHERE t.sprint_id IS NOT NULL
+        GROUP BY t.sprint_id, t.updated_at::DATE
+        ON CONFLICT (sprint_id, day) DO NOTHING;
+        """
+    )
+
+
+_ROLLUP_STATUS_COLUMNS = {
+    "NEW": ("new_count", "new_hours"),
+    "IN_PROGRESS": ("in_progress_count", "in_progress_hours"),
+    "DONE": ("done_count", "done_hours"),
+}
+
+
+def apply_sprint_rollup_delta(cur, before: dict | None, after: dict | None) -> None:
+    deltas: dict[int, dict[str, int]] = {}
+    for task_state, sign in ((before, -1), (after, 1)):
+        if not task_state or task_state.get("sprint_id") is None:
+            continue
+        count_column, hours_column = _ROLLUP_STATUS_COLUMNS[str(task_state["status"])]
+        sprint_delta = deltas.setdefault(task_state["sprint_id"], {})
+        sprint_delta[count_column] = sprint_delta.get(count_column, 0) + sign
+        sprint_delta[hours_column] = sprint_delta.get(hours_column, 0) + sign * (task_state.get("execution_hours") or 0)
+    for sprint_id, sprint_delta in deltas.items():
+        if not any(sprint_delta.values()):
+            continue
+        cur.execute(
+            """
+            INSERT INTO sprint_daily_rollups (
+              sprint_id, day, new_count, in_progress_count, done_count, new_hours, in_progress_hours, done_hours
+            )
+            VALUES (%s, CURRENT_DATE, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (sprint_id, day)
+            DO UPDATE SET
+              new_count = sprint_daily_rollups.new_count + EXCLUDED.new_count,
+              in_progress_count = sprint_daily_rollups.in_progress_count + EXCLUDED.in_progress_count,
+              done_count = sprint_daily_rollups.done_count + EXCLUDED.done_count,
+              new_hours = sprint_daily_rollups.new_hours + EXCLUDED.new_hours,
+              in_progress_hours = sprint_daily_rollups.in_progress_hours + EXCLUDED.in_progress_hours,
+              done_hours = sprint_daily_rollups.done_hours + EXCLUDED.done_hours;
+            """,
+            (
+                sprint_id,
+                sprint_delta.get("new_count", 0),
+                sprint_delta.get("in_progress_count", 0),
+                sprint_delta.get("done_count", 0),
+                sprint_delta.get("new_hours", 0),
+                sprint_delta.get("in_progress_hours", 0),
+                sprint_delta.get("done_hours", 0),
+            ),
+        )
+
+
+def check_search_columns(cur) -> bool:
+    # Adding the generated columns rewrites tasks and comments under an exclusive lock, so it is
+    # left to scripts/deploy_db.py; a request only checks. Returns whether trigram matching is usable.
+    cur.execute(
+        """
+        SELECT
+          EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'tasks' AND column_name = 'search_vector'
+          ) AS tasks_ready,
+          EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'comments' AND column_name = 'search_vector'
+          ) AS comments_ready,
+          to_regclass('idx_tasks_title_trgm') IS NOT NULL AS trgm_ready;
+        """
+    )
+    row = cur.fetchone()
+    tasks_ready, comments_ready, trgm_ready = (
+        (row["tasks_ready"], row["comments_ready"], row["trgm_ready"]) if isinstance(row, dict) else row
+    )
+    if not (tasks_ready and comments_ready):
+        raise RuntimeError("Search columns are missing. Run: python scripts/deploy_db.py --search-columns")
+    return bool(trgm_ready)
+
+
+def add_search_columns(cur) -> bool:
+    # Idempotent upgrade for databases deployed before full-text search; run outside request
+    # handling. Returns whether pg_trgm could be enabled.
+    cur.execute(
+        """
+        SELECT
+          EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'tasks' AND column_name = 'search_vector'
+          ) AS tasks_ready,
+          EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'comments' AND column_name = 'search_vector'
+          ) AS comments_ready,
+          EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') AS trgm_ready;
+        """
+    )
+    tasks_ready, comments_ready, trgm_ready = cur.fetchone()
+    if not tasks_ready:
+        cur.execute(
+            """
+            ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+            GENERATED ALWAYS AS (
+              setweight(to_tsvector('russian'::regconfig, COALESCE(title, '')), 'A')
+              || setweight(to_tsvector('english'::regconfig, COALESCE(title, '')), 'A')
+              || setweight(to_tsvector('russian'::regconfig, COALESCE(description, '')), 'B')
+              || setweight(to_tsvector('english'::regconfig, COALESCE(description, '')), 'B')
+            ) STORED;
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_search_vector ON tasks USING GIN (search_vector);")
+    if not comments_ready:
+        cur.execute(
+            """
+            ALTER TABLE comments ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+            GENERATED ALWAYS AS (
+              to_tsvector('russian'::regconfig, text) || to_tsvector('english'::regconfig, text)
+            ) STORED;
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_comments_search_vector ON comments USING GIN (search_vector);")
+    if not trgm_ready:
+        cur.execute("SAVEPOINT ensure_pg_trgm;")
+        try:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+            cur.execute("RELEASE SAVEPOINT ensure_pg_trgm;")
+        except PsycopgError:
+            cur.execute("ROLLBACK TO SAVEPOINT ensure_pg_trgm;")
+            return False
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_title_trgm ON tasks USING GIN (title gin_trgm_ops);")
+    return True
+
+
+def ensure_idempotency_table(cur) -> None:
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+          scope TEXT NOT NULL,
+          idempotency_key TEXT NOT NULL,
+          request_hash TEXT NOT NULL,
+          status TEXT NOT NULL DEFAULT 'IN_PROGRESS',
+          response JSONB,
+          created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+          updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+          PRIMARY KEY (scope, idempotency_key)
+        );
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created ON idempotency_keys(created_at);")
+
+
+def ensure_archive_tables(cur) -> None:
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tasks_archive (
+          id BIGINT PRIMARY KEY,
+          project_id BIGINT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+          sprint_id BIGINT,
+          title VARCHAR(120) NOT NULL,
+          description TEXT NOT NULL DEFAULT '',
+          status task_status NOT NULL,
+          execution_hours INTEGER,
+          author_id BIGINT NOT NULL,
+          assignee_id BIGINT NOT NULL,
+          deadline_at TIMESTAMPTZ,
+          version INTEGER NOT NULL DEFAULT 1,
+          created_at TIMESTAMPTZ NOT NULL,
+          updated_at TIMESTAMPTZ NOT NULL,
+          archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS comments_archive (
+          id BIGINT PRIMARY KEY,
+          task_id BIGINT NOT NULL REFERENCES tasks_archive(id) ON DELETE CASCADE,
+          author_id BIGINT NOT NULL,
+          text TEXT NOT NULL,
+          created_at TIMESTAMPTZ NOT NULL
+        );
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS task_audit_log_archive (
+          id BIGINT PRIMARY KEY,
+          task_id BIGINT NOT NULL REFERENCES tasks_archive(id) ON DELETE CASCADE,
+          actor_id BIGINT NOT NULL,
+          event_type audit_event_type NOT NULL,
+          field TEXT,
+          old_value JSONB,
+          new_value JSONB,
+          created_at TIMESTAMPTZ NOT NULL
+        );
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_archive_project_archived ON tasks_archive(project_id, archived_at DESC, id DESC);"
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_comments_archive_task_created ON comments_archive(task_id, created_at);")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_task_audit_archive_task_created ON task_audit_log_archive(task_id, created_at DESC);"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_done_updated ON tasks(updated_at) WHERE status = 'DONE';"
+    )
+
+
+def ensure_purge_jobs_table(cur) -> None:
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS purge_jobs (
+          id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+          entity_type TEXT NOT NULL CHECK (entity_type IN ('project', 'sprint', 'task')),
+          entity_id BIGINT NOT NULL,
+          status TEXT NOT NULL DEFAULT 'PENDING',
+          stage TEXT,
+          deleted_rows BIGINT NOT NULL DEFAULT 0,
+          attempts INTEGER NOT NULL DEFAULT 0,
+          last_error TEXT,
+          created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+          updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+          finished_at TIMESTAMPTZ
+        );
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_purge_jobs_open ON purge_jobs(id) WHERE status IN ('PENDING', 'RUNNING');")
+
+
+def ensure_rate_limit_table(cur) -> None:
+    # Bucket state is cheap to lose, so the table skips WAL.
+    cur.execute(
+        """
+        CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_buckets (
+          bucket_key TEXT PRIMARY KEY,
+          tokens DOUBLE PRECISION NOT NULL,
+          updated_at TIMESTAMPTZ NOT NULL
+        );
+        """
     )
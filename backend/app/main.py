@@ -1,15 +1,42 @@
-﻿from fastapi import FastAPI
+﻿import os
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.db import close_database_pools, track_queries
+from app.metrics import HTTP_REQUEST_SECONDS
+from app.tracing import configure_tracing, trace_span
+
+from app.routes.admin import router as admin_router
 from app.routes.auth import router as auth_router
 from app.routes.bot import router as bot_router
 from app.routes.projects import router as projects_router
 from app.routes.sprints import router as sprints_router
 from app.routes.system import router as system_router
 from app.routes.tasks import router as tasks_router
+from app.services.archive_service import start_task_archiver, stop_task_archiver
+from app.services.comment_read_service import start_comment_read_flusher, stop_comment_read_flusher
+from app.services.purge_service import start_purger, stop_purger
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    start_comment_read_flusher()
+    start_task_archiver()
+    start_purger()
+    try:
+        yield
+    finally:
+        stop_purger()
+        stop_task_archiver()
+        stop_comment_read_flusher()
+        close_database_pools()
 
 
-app = FastAPI(title='VKR Backend', version='0.1.0')
+configure_tracing('vkr-backend')
+app = FastAPI(title='VKR Backend', version='0.1.0', lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -21,9 +48,41 @@ app.add_middleware(
     allow_headers=['*'],
 )
 
+
+@app.middleware('http')
+async def observe_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        with trace_span(f'HTTP {request.method}', traceparent=request.headers.get('traceparent')) as span:
+            with track_queries() as query_stats:
+                response = await call_next(request)
+            status_code = response.status_code
+            if span is not None:
+                route = request.scope.get('route')
+                span.attributes.update(
+                    route=getattr(route, 'path', 'unmatched'),
+                    status=status_code,
+                    db_queries=query_stats.count,
+                    db_time_ms=round(query_stats.seconds * 1000, 3),
+                )
+        if os.getenv('DB_DEBUG_HEADERS', '').strip().lower() in ('1', 'true', 'yes'):
+            response.headers['X-DB-Queries'] = str(query_stats.count)
+            response.headers['X-DB-Time'] = f'{query_stats.seconds * 1000:.1f}'
+        return response
+    finally:
+        route = request.scope.get('route')
+        HTTP_REQUEST_SECONDS.labels(
+            request.method,
+            getattr(route, 'path', 'unmatched'),
+            str(status_code),
+        ).observe(time.perf_counter() - started)
+
+
 app.include_router(system_router)
 app.include_router(auth_router)
 app.include_router(projects_router)
 app.include_router(tasks_router)
 app.include_router(sprints_router)
 app.include_router(bot_router)
+app.include_router(admin_router)
@@ -0,0 +1,92 @@
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "vkr_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+DB_QUERY_SECONDS = Histogram(
+    "vkr_db_query_duration_seconds",
+    "Time spent executing SQL statements, by the service function that opened the connection",
+    ("function",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_CONNECT_SECONDS = Histogram(
+    "vkr_db_connect_duration_seconds",
+    "Time spent waiting to check out a pooled database connection",
+    ("function",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_CONNECTIONS_OPEN = Gauge(
+    "vkr_db_connections_open",
+    "Pooled database connections currently checked out by this process",
+)
+DB_REPLICA_LAG_SECONDS = Gauge(
+    "vkr_db_replica_lag_seconds",
+    "Replication lag of the read replica at the last check, -1 when the replica is unreachable",
+)
+DB_READ_ROUTES = Counter(
+    "vkr_db_read_routes_total",
+    "Read-only connections by target: replica, primary_sticky, primary_lag or primary",
+    ("target",),
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "vkr_llm_request_duration_seconds",
+    "OpenRouter request latency by model and outcome",
+    ("model", "outcome"),
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 45.0, 60.0),
+)
+LLM_FAILURES = Counter(
+    "vkr_llm_failures_total",
+    "Failed OpenRouter requests by model and reason",
+    ("model", "reason"),
+)
+LLM_FALLBACKS = Counter(
+    "vkr_llm_fallbacks_total",
+    "OpenRouter fallbacks: attempts on a fallback model or the text-only retry after an image failure",
+    ("model",),
+)
+LLM_CIRCUIT_STATE = Gauge(
+    "vkr_llm_circuit_state",
+    "OpenRouter circuit breaker state by model: 0 closed, 1 half-open, 2 open",
+    ("model",),
+)
+EXTRACTION_BATCH_MESSAGES = Histogram(
+    "vkr_extraction_batch_messages",
+    "Chat messages covered by one OpenRouter extraction request",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16),
+)
+DOCUMENT_CHUNKS = Histogram(
+    "vkr_document_extraction_chunks",
+    "Chunks a long document was split into for parallel task extraction",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16, 24, 40),
+)
+TEXT_COMPACTION_TOKENS = Counter(
+    "vkr_text_compaction_tokens_total",
+    "Approximate tokens of document and transcript text before and after compaction, by source type",
+    ("source_type", "stage"),
+)
+EXTRACTION_OUTCOMES = Counter(
+    "vkr_task_extraction_total",
+    "Bot message extraction outcomes: llm, rules, none, llm_error, circuit_open_rules, circuit_open_none or classifier_skip",
+    ("outcome",),
+)
+RATE_LIMITED = Counter(
+    "vkr_rate_limited_total",
+    "Requests rejected with 429 by route class (llm or db) and key scope (chat or user)",
+    ("route_class", "scope"),
+)
+AUDIT_FLUSH_SECONDS = Histogram(
+    "vkr_audit_flush_duration_seconds",
+    "Time spent writing one buffered batch of task audit events",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+AUDIT_FLUSH_ROWS = Histogram(
+    "vkr_audit_flush_rows",
+    "Task audit events written per buffered batch",
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55),
+)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
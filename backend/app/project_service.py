@@ -1,13 +1,25 @@
+import os
+import threading
+import time
+
 from fastapi import HTTPException
-from psycopg import connect
 from psycopg.errors import Error as PsycopgError
 from psycopg.rows import dict_row
 
-from app.db import get_database_url
+from app.db import connect, get_database_url, get_read_database_url, is_replica_url, record_user_write
+from app.db_helpers import ensure_project_summary_table, ensure_sprint_tables
+from app.services.purge_service import enqueue_purge, wake_purger
+from app.sql_catalog import execute_named
+
+MAX_PROJECTS_CACHE_ENTRIES = 10000
+
+_projects_cache: dict[int, tuple[float, int, list[dict]]] = {}
+_projects_cache_lock = threading.Lock()
+_project_summary_ready = False
 
 
 def get_user_id_by_tg_id(cur, tg_id: int) -> int:
-    cur.execute("SELECT id FROM users WHERE tg_id = %s LIMIT 1;", (tg_id,))
+    execute_named(cur, "user_id_by_tg_id", (tg_id,))
     user_row = cur.fetchone()
     if not user_row:
         raise HTTPException(status_code=404, detail="User not found")
@@ -15,51 +27,113 @@ def get_user_id_by_tg_id(cur, tg_id: int) -> int:
 
 
 def ensure_project_member(cur, project_id: int, user_id: int) -> None:
+    execute_named(cur, "project_membership", (project_id, user_id))
+    if not cur.fetchone():
+        raise HTTPException(status_code=403, detail="Access denied for this project")
+
+
+def get_projects_cache_ttl_seconds() -> float:
+    raw_value = os.getenv("PROJECTS_CACHE_TTL_SECONDS", "30").strip()
+    try:
+        return max(float(raw_value), 0.0)
+    except ValueError:
+        return 30.0
+
+
+def invalidate_projects_cache(project_id: int | None = None, user_id: int | None = None) -> None:
+    with _projects_cache_lock:
+        if project_id is None and user_id is None:
+            _projects_cache.clear()
+            return
+        stale_tg_ids = [
+            tg_id
+            for tg_id, (_, cached_user_id, rows) in _projects_cache.items()
+            if cached_user_id == user_id or (project_id is not None and any(row["id"] == project_id for row in rows))
+        ]
+        for tg_id in stale_tg_ids:
+            _projects_cache.pop(tg_id, None)
+
+
+def _fetch_projects_for_tg_id(cur, tg_id: int) -> list[dict]:
     cur.execute(
         """
-        SELECT 1
-        FROM project_members
-        WHERE project_id = %s AND user_id = %s AND is_active = TRUE
-        LIMIT 1;
+        SELECT
+            u.id AS user_id,
+            p.id,
+            p.project_key,
+            p.title,
+            p.tg_chat_id,
+            p.tg_chat_instance,
+            p.tg_chat_type,
+            COALESCE(ps.new_task_count, 0) AS new_task_count,
+            COALESCE(ps.in_progress_task_count, 0) AS in_progress_task_count,
+            COALESCE(ps.done_task_count, 0) AS done_task_count,
+            COALESCE(ps.open_sprint_count, 0) AS open_sprint_count,
+            COALESCE(ps.last_activity_at, p.created_at) AS last_activity_at
+        FROM users u
+        JOIN project_members pm ON pm.user_id = u.id AND pm.is_active = TRUE
+        JOIN projects p ON p.id = pm.project_id AND p.deleted_at IS NULL
+        LEFT JOIN project_summaries ps ON ps.project_id = p.id
+        WHERE u.tg_id = %s
+        ORDER BY p.created_at DESC, p.id DESC;
         """,
-        (project_id, user_id),
+        (tg_id,),
     )
-    if not cur.fetchone():
-        raise HTTPException(status_code=403, detail="Access denied for this project")
+    return cur.fetchall()
 
 
 def get_projects_by_tg_id(tg_id: int) -> list[dict]:
+    global _project_summary_ready
+    now = time.monotonic()
+    with _projects_cache_lock:
+        cached = _projects_cache.get(tg_id)
+    if cached and cached[0] > now:
+        return [dict(row) for row in cached[2]]
+
     try:
-        with connect(get_database_url()) as conn:
+        conninfo = get_read_database_url(tg_id)
+        from_replica = is_replica_url(conninfo)
+        summary_checked = False
+        with connect(conninfo) as conn:
             with conn.cursor(row_factory=dict_row) as cur:
-                cur.execute(
-                    """
-                    SELECT
-                        p.id,
-                        p.project_key,
-                        p.title,
-                        p.tg_chat_id,
-                        p.tg_chat_instance,
-                        p.tg_chat_type
-                    FROM users u
-                    JOIN project_members pm ON pm.user_id = u.id AND pm.is_active = TRUE
-                    JOIN projects p ON p.id = pm.project_id
-                    WHERE u.tg_id = %s
-                    ORDER BY p.created_at DESC, p.id DESC;
-                    """,
-                    (tg_id,),
-                )
-                return cur.fetchall()
+                if not from_replica and not _project_summary_ready:
+                    ensure_sprint_tables(cur)
+                    ensure_project_summary_table(cur)
+                    summary_checked = True
+                rows = _fetch_projects_for_tg_id(cur, tg_id)
+            conn.commit()
+        # Only a committed check counts; a rolled-back one must run again on the next call.
+        if summary_checked:
+            _project_summary_ready = True
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
     except PsycopgError as exc:
         raise HTTPException(status_code=500, detail=f"Database error while loading projects: {exc}")
 
+    user_id = rows[0]["user_id"] if rows else None
+    projects = []
+    for row in rows:
+        row.pop("user_id")
+        row["task_count"] = row["new_task_count"] + row["in_progress_task_count"] + row["done_task_count"]
+        projects.append(row)
+    # Replica rows may predate a write whose invalidation already ran, so only primary reads are cached.
+    ttl = get_projects_cache_ttl_seconds()
+    if ttl > 0 and user_id is not None and not from_replica:
+        with _projects_cache_lock:
+            # Re-inserted at the end, so the dict stays ordered by expiry and the oldest entries go first.
+            _projects_cache.pop(tg_id, None)
+            _projects_cache[tg_id] = (now + ttl, user_id, projects)
+            if len(_projects_cache) > MAX_PROJECTS_CACHE_ENTRIES:
+                for stale_tg_id in list(_projects_cache)[: len(_projects_cache) - MAX_PROJECTS_CACHE_ENTRIES * 9 // 10]:
+                    del _projects_cache[stale_tg_id]
+    return [dict(row) for row in projects]
+
 
 def delete_project_by_tg_id(project_id: int, tg_id: int) -> dict:
     try:
         with connect(get_database_url()) as conn:
             with conn.cursor(row_factory=dict_row) as cur:
+                ensure_sprint_tables(cur)
                 cur.execute(
                     """
                     SELECT u.id AS user_id
@@ -88,10 +162,13 @@ def delete_project_by_tg_id(project_id: int, tg_id: int) -> dict:
                 if not membership:
                     raise HTTPException(status_code=404, detail="Project not found in user scope")
 
+                # The chat binding is released right away so the chat can start a fresh project
+                # while the purger is still removing the old one.
                 cur.execute(
                     """
-                    DELETE FROM projects
-                    WHERE id = %s
+                    UPDATE projects
+                    SET deleted_at = NOW(), tg_chat_id = NULL, tg_chat_instance = NULL
+                    WHERE id = %s AND deleted_at IS NULL
                     RETURNING id;
                     """,
                     (project_id,),
@@ -99,9 +176,13 @@ def delete_project_by_tg_id(project_id: int, tg_id: int) -> dict:
                 deleted = cur.fetchone()
                 if not deleted:
                     raise HTTPException(status_code=404, detail="Project not found")
+                purge_job_id = enqueue_purge(cur, "project", project_id)
 
             conn.commit()
-            return {"id": deleted["id"]}
+            wake_purger()
+            record_user_write(tg_id)
+            invalidate_projects_cache(project_id=deleted["id"])
+            return {"id": deleted["id"], "purge_job_id": purge_job_id}
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
     except HTTPException:
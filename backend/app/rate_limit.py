@@ -0,0 +1,143 @@
+import logging
+import math
+import os
+import threading
+import time
+
+from fastapi import HTTPException
+from psycopg.errors import Error as PsycopgError
+
+from app.config import get_float_env
+from app.db import connect, get_database_url
+from app.db_helpers import ensure_rate_limit_table
+from app.metrics import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+# (route class, key scope) -> env prefix, default refill per minute, default burst.
+# LLM-bound work is limited per chat and per user; DB-bound reads per user.
+BUDGETS = {
+    ("llm", "chat"): ("RATE_LIMIT_LLM_CHAT", 12.0, 4.0),
+    ("llm", "user"): ("RATE_LIMIT_LLM_USER", 20.0, 6.0),
+    ("db", "user"): ("RATE_LIMIT_DB_USER", 240.0, 40.0),
+}
+MAX_MEMORY_BUCKETS = 50000
+MEMORY_SWEEP_INTERVAL_SECONDS = 60.0
+
+# key -> (tokens, updated_at, rate, capacity); each bucket keeps its own budget so a sweep
+# triggered by one route class judges every other bucket by the budget it was filled with.
+_buckets: dict[str, tuple[float, float, float, float]] = {}
+_buckets_lock = threading.Lock()
+_last_sweep_at = 0.0
+_rate_limit_table_ready = False
+
+
+def rate_limiting_enabled() -> bool:
+    return os.getenv("RATE_LIMIT_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+
+
+def get_rate_limit_backend() -> str:
+    return os.getenv("RATE_LIMIT_BACKEND", "memory").strip().lower() or "memory"
+
+
+def get_budget(route_class: str, scope: str) -> tuple[float, float]:
+    prefix, per_minute, burst = BUDGETS[(route_class, scope)]
+    rate = max(get_float_env(f"{prefix}_PER_MINUTE", per_minute), 0.0) / 60
+    capacity = max(get_float_env(f"{prefix}_BURST", burst), 1.0)
+    return rate, capacity
+
+
+def _sweep_memory_buckets(now: float) -> None:
+    # Caller holds _buckets_lock. Buckets that have refilled completely carry no state worth keeping.
+    global _last_sweep_at
+    _last_sweep_at = now
+    for stale_key in [
+        bucket_key
+        for bucket_key, (bucket_tokens, bucket_at, bucket_rate, bucket_capacity) in _buckets.items()
+        if bucket_tokens + (now - bucket_at) * bucket_rate >= bucket_capacity
+    ]:
+        del _buckets[stale_key]
+
+
+def _take_memory_token(key: str, rate: float, capacity: float) -> float:
+    now = time.monotonic()
+    with _buckets_lock:
+        tokens, updated_at, _, _ = _buckets.get(key, (capacity, now, rate, capacity))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+        if tokens >= 1:
+            _buckets[key] = (tokens - 1, now, rate, capacity)
+            retry_after = 0.0
+        else:
+            _buckets[key] = (tokens, now, rate, capacity)
+            retry_after = (1 - tokens) / rate if rate > 0 else math.inf
+        # A full scan runs at most once per interval, so a table of live buckets is not rescanned per request.
+        if len(_buckets) > MAX_MEMORY_BUCKETS and now - _last_sweep_at >= MEMORY_SWEEP_INTERVAL_SECONDS:
+            _sweep_memory_buckets(now)
+    return retry_after
+
+
+def _take_shared_token(key: str, rate: float, capacity: float) -> float:
+    global _rate_limit_table_ready
+    with connect(get_database_url()) as conn:
+        with conn.cursor() as cur:
+            if not _rate_limit_table_ready:
+                ensure_rate_limit_table(cur)
+                _rate_limit_table_ready = True
+            cur.execute(
+                """
+                INSERT INTO rate_limit_buckets AS b (bucket_key, tokens, updated_at)
+                VALUES (%(key)s, %(capacity)s - 1, NOW())
+                ON CONFLICT (bucket_key) DO UPDATE
+                SET
+                  tokens = LEAST(%(capacity)s, b.tokens + EXTRACT(EPOCH FROM NOW() - b.updated_at) * %(rate)s) - 1,
+                  updated_at = NOW()
+                WHERE LEAST(%(capacity)s, b.tokens + EXTRACT(EPOCH FROM NOW() - b.updated_at) * %(rate)s) >= 1
+                RETURNING tokens;
+                """,
+                {"key": key, "capacity": capacity, "rate": rate},
+            )
+            if cur.fetchone():
+                retry_after = 0.0
+            else:
+                # Denied requests leave the bucket untouched, so it keeps refilling from its last grant.
+                cur.execute(
+                    """
+                    SELECT LEAST(%(capacity)s, tokens + EXTRACT(EPOCH FROM NOW() - updated_at) * %(rate)s)::FLOAT
+                    FROM rate_limit_buckets
+                    WHERE bucket_key = %(key)s;
+                    """,
+                    {"key": key, "capacity": capacity, "rate": rate},
+                )
+                row = cur.fetchone()
+                tokens = row[0] if row else 0.0
+                retry_after = (1 - tokens) / rate if rate > 0 else math.inf
+        conn.commit()
+    return retry_after
+
+
+def _take_token(key: str, rate: float, capacity: float) -> float:
+    if get_rate_limit_backend() == "postgres":
+        try:
+            return _take_shared_token(key, rate, capacity)
+        except (RuntimeError, PsycopgError) as exc:
+            # The shared store is an optimization across workers; fall back to this process's buckets.
+            logger.warning("Shared rate limit backend failed, using in-process buckets: %s", exc)
+    return _take_memory_token(key, rate, capacity)
+
+
+def enforce_rate_limit(route_class: str, tg_id: int | None = None, chat_id: int | None = None) -> None:
+    if not rate_limiting_enabled():
+        return
+    for scope, subject in (("chat", chat_id), ("user", tg_id)):
+        if subject is None or (route_class, scope) not in BUDGETS:
+            continue
+        rate, capacity = get_budget(route_class, scope)
+        retry_after = _take_token(f"{route_class}:{scope}:{subject}", rate, capacity)
+        if retry_after > 0:
+            RATE_LIMITED.labels(route_class, scope).inc()
+            retry_seconds = max(1, math.ceil(min(retry_after, 3600)))
+            raise HTTPException(
+                status_code=429,
+                detail=f"Too many requests for this {scope}, retry in {retry_seconds} s",
+                headers={"Retry-After": str(retry_seconds)},
+            )
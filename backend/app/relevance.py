@@ -0,0 +1,101 @@
+import logging
+import math
+import os
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.config import get_float_env
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = Path(__file__).resolve().with_name("relevance_model.npz")
+NGRAM_SIZES = (2, 3, 4)
+HASH_BITS = 16
+MAX_SCORED_CHARS = 4000
+_NGRAM_PRIME = np.uint32(1000003)
+_HASH_MIX = np.uint32(0x9E3779B1)
+_DIGIT_RE = re.compile(r"\d")
+
+_model: dict | None = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def ngram_features(text: str, hash_bits: int = HASH_BITS) -> np.ndarray:
+    # Hashed character n-grams of the normalized text. The hash is a polynomial over code points
+    # followed by a multiplicative mix (32-bit, so hash_bits is at most 32); it is stable across
+    # processes, unlike hash(), and the training script and the scorer agree on bucket indexes.
+    # Each n-gram hash extends the one of size n - 1 in place, so a message costs a fixed dozen
+    # array operations whatever its length.
+    normalized = " ".join((text or "")[: MAX_SCORED_CHARS * 2].lower().split())[:MAX_SCORED_CHARS]
+    codes = np.frombuffer(f" {_DIGIT_RE.sub('0', normalized)} ".encode("utf-32-le"), dtype=np.uint32)
+    length = len(codes)
+    buckets = np.empty(sum(max(length - size + 1, 0) for size in NGRAM_SIZES), dtype=np.uint32)
+    previous = codes
+    start = 0
+    for size in range(2, NGRAM_SIZES[-1] + 1):
+        count = max(length - size + 1, 0)
+        current = buckets[start : start + count] if size in NGRAM_SIZES else np.empty(count, dtype=np.uint32)
+        np.multiply(previous[:-1], _NGRAM_PRIME, out=current)
+        current += codes[size - 1 :]
+        previous = current
+        start += count if size in NGRAM_SIZES else 0
+    buckets *= _HASH_MIX
+    buckets >>= np.uint32(32 - hash_bits)
+    return buckets
+
+
+def load_relevance_model() -> dict | None:
+    global _model, _model_loaded
+    if _model_loaded:
+        return _model
+    with _model_lock:
+        if _model_loaded:
+            return _model
+        if os.getenv("RELEVANCE_MODEL_ENABLED", "1").strip().lower() in ("0", "false", "no"):
+            _model_loaded = True
+            return None
+        path = Path(os.getenv("RELEVANCE_MODEL_PATH", "").strip() or DEFAULT_MODEL_PATH)
+        try:
+            with np.load(path) as data:
+                _model = {
+                    "weights": data["weights"].astype(np.float32),
+                    "bias": float(data["bias"]),
+                    "hash_bits": int(data["hash_bits"]),
+                    "message_threshold": get_float_env(
+                        "RELEVANCE_MESSAGE_THRESHOLD", float(data["message_threshold"])
+                    ),
+                    "task_threshold": get_float_env("RELEVANCE_TASK_THRESHOLD", float(data["task_threshold"])),
+                }
+        except (OSError, KeyError, ValueError) as exc:
+            logger.warning("Relevance model is unavailable, falling back to marker rules: %s", exc)
+            _model = None
+        _model_loaded = True
+        return _model
+
+
+def relevance_score(text: str) -> float | None:
+    # Probability that the text describes project work; None when no model is loaded.
+    model = load_relevance_model()
+    if model is None:
+        return None
+    features = ngram_features(text, model["hash_bits"])
+    if not features.size:
+        return 0.0
+    logit = model["bias"] + float(model["weights"][features].sum()) / math.sqrt(features.size)
+    return 1 / (1 + math.exp(-max(min(logit, 30.0), -30.0)))
+
+
+def is_relevant_message(text: str) -> bool | None:
+    score = relevance_score(text)
+    if score is None:
+        return None
+    return score >= load_relevance_model()["message_threshold"]
+
+
+def is_relevant_task(task: dict) -> bool:
+    score = relevance_score(f"{task.get('title') or ''} {task.get('description') or ''}")
+    return score is None or score >= load_relevance_model()["task_threshold"]
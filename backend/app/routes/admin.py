@@ -0,0 +1,112 @@
+﻿import inspect
+import os
+
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+
+from app.circuit_breaker import circuit_breaker_states
+from app.schemas import RequestProfileStartRequest
+from app.services.archive_service import archive_done_tasks
+from app.services.profiler_service import (
+    get_request_profile,
+    render_collapsed,
+    render_speedscope,
+    run_sampling_profile,
+    start_request_profile,
+    stop_profiling,
+)
+from app.services.purge_service import list_purge_jobs, run_pending_purges
+
+router = APIRouter()
+
+
+def _require_admin_token(x_admin_token: str | None) -> None:
+    expected_token = os.getenv('ADMIN_INTERNAL_TOKEN')
+    if not expected_token:
+        raise HTTPException(status_code=503, detail='ADMIN_INTERNAL_TOKEN is not configured')
+    if not x_admin_token or x_admin_token != expected_token:
+        raise HTTPException(status_code=401, detail='Invalid admin token')
+
+
+def _render_profile(session, output_format: str, name: str):
+    if output_format == 'speedscope':
+        return render_speedscope(session, name)
+    if output_format == 'collapsed':
+        return PlainTextResponse(render_collapsed(session))
+    raise HTTPException(status_code=400, detail='Format must be collapsed or speedscope')
+
+
+@router.post('/admin/profiler/sample')
+def profile_process(
+    seconds: float = 10,
+    interval_ms: float = 5,
+    format: str = 'collapsed',
+    x_admin_token: str | None = Header(default=None),
+):
+    _require_admin_token(x_admin_token)
+    if format not in ('collapsed', 'speedscope'):
+        raise HTTPException(status_code=400, detail='Format must be collapsed or speedscope')
+    session = run_sampling_profile(seconds, interval_ms)
+    return _render_profile(session, format, f'backend process, {seconds:g}s')
+
+
+@router.post('/admin/profiler/requests')
+def start_profiling_requests(
+    payload: RequestProfileStartRequest,
+    request: Request,
+    x_admin_token: str | None = Header(default=None),
+) -> dict:
+    _require_admin_token(x_admin_token)
+    endpoint_codes = {}
+    for route in request.app.routes:
+        if isinstance(route, APIRoute) and route.path in payload.routes:
+            endpoint_codes[inspect.unwrap(route.endpoint).__code__] = f'{",".join(sorted(route.methods))} {route.path}'
+    unknown_routes = sorted(set(payload.routes) - {route.split(' ', 1)[1] for route in endpoint_codes.values()})
+    if unknown_routes:
+        raise HTTPException(status_code=400, detail=f'Unknown routes: {", ".join(unknown_routes)}')
+    session = start_request_profile(endpoint_codes, payload.fraction, payload.seconds, payload.interval_ms)
+    return {'ok': True, 'routes': sorted(endpoint_codes.values()), **session.summary()}
+
+
+@router.get('/admin/profiler/requests')
+def get_profiled_requests(format: str = 'collapsed', x_admin_token: str | None = Header(default=None)):
+    _require_admin_token(x_admin_token)
+    return _render_profile(get_request_profile(), format, 'backend requests')
+
+
+@router.get('/admin/profiler/requests/status')
+def get_profiled_requests_status(x_admin_token: str | None = Header(default=None)) -> dict:
+    _require_admin_token(x_admin_token)
+    return {'ok': True, **get_request_profile().summary()}
+
+
+@router.delete('/admin/profiler')
+def cancel_profiling(x_admin_token: str | None = Header(default=None)) -> dict:
+    _require_admin_token(x_admin_token)
+    stop_profiling()
+    return {'ok': True}
+
+
+@router.post('/admin/archive/run')
+def run_task_archive(older_than_days: float | None = None, x_admin_token: str | None = Header(default=None)) -> dict:
+    _require_admin_token(x_admin_token)
+    return {'ok': True, **archive_done_tasks(older_than_days)}
+
+
+@router.get('/admin/purge-jobs')
+def purge_jobs(limit: int = 50, x_admin_token: str | None = Header(default=None)) -> dict:
+    _require_admin_token(x_admin_token)
+    return {'ok': True, 'jobs': list_purge_jobs(limit)}
+
+
+@router.post('/admin/purge/run')
+def run_purge(x_admin_token: str | None = Header(default=None)) -> dict:
+    _require_admin_token(x_admin_token)
+    return {'ok': True, **run_pending_purges()}
+
+
+@router.get('/admin/llm-circuits')
+def llm_circuits(x_admin_token: str | None = Header(default=None)) -> dict:
+    _require_admin_token(x_admin_token)
+    return {'ok': True, 'circuits': circuit_breaker_states()}
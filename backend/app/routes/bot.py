@@ -2,9 +2,11 @@
 
 from fastapi import APIRouter, Header, HTTPException
 
+from app.rate_limit import enforce_rate_limit
 from app.schemas import BotChatProjectRequest, BotIngestMessageRequest
 from app.services.board_service import create_bot_tasks_from_message
 from app.services.chat_project_service import ensure_chat_project
+from app.services.idempotency_service import run_idempotent
 
 router = APIRouter()
 
@@ -17,6 +19,12 @@ def _require_bot_token(x_bot_token: str | None) -> None:
         raise HTTPException(status_code=401, detail='Invalid bot token')
 
 
+def _ingest_message(payload: BotIngestMessageRequest) -> dict:
+    # Charged inside the idempotent handler so replays of a stored result are free.
+    enforce_rate_limit('llm', tg_id=payload.user_tg_id, chat_id=payload.chat_id)
+    return {'ok': True, **create_bot_tasks_from_message(payload)}
+
+
 @router.post('/bot/chat-project')
 def bot_chat_project(payload: BotChatProjectRequest, x_bot_token: str | None = Header(default=None)) -> dict:
     _require_bot_token(x_bot_token)
@@ -25,7 +33,17 @@ def bot_chat_project(payload: BotChatProjectRequest, x_bot_token: str | None = H
 
 
 @router.post('/bot/ingest-message')
-def bot_ingest_message(payload: BotIngestMessageRequest, x_bot_token: str | None = Header(default=None)) -> dict:
+def bot_ingest_message(
+    payload: BotIngestMessageRequest,
+    x_bot_token: str | None = Header(default=None),
+    idempotency_key: str | None = Header(default=None),
+) -> dict:
     _require_bot_token(x_bot_token)
-    result = create_bot_tasks_from_message(payload)
-    return {'ok': True, **result}
+    if not idempotency_key and payload.message_id is not None:
+        idempotency_key = f'{payload.chat_id}:{payload.message_id}'
+    return run_idempotent(
+        'bot-ingest',
+        idempotency_key,
+        payload.model_dump(),
+        lambda: _ingest_message(payload),
+    )
@@ -1,31 +1,63 @@
-﻿from fastapi import APIRouter
+﻿from fastapi import APIRouter, Header
 
 from app.project_service import delete_project_by_tg_id, get_projects_by_tg_id
+from app.rate_limit import enforce_rate_limit
 from app.schemas import SprintCreateRequest, TaskCreateRequest
-from app.services.board_service import create_project_sprint, create_project_task, list_project_sprints, list_project_tasks
+from app.services.archive_service import list_archived_tasks
+from app.services.board_service import create_project_sprint, create_project_task, get_project_board, list_project_sprints, list_project_tasks
+from app.services.idempotency_service import run_idempotent
+from app.services.search_service import search_project
 
 router = APIRouter()
 
 
 @router.get('/projects')
 def projects(tg_id: int) -> dict:
+    enforce_rate_limit('db', tg_id=tg_id)
     return {'ok': True, 'projects': get_projects_by_tg_id(tg_id)}
 
 
 @router.delete('/projects/{project_id}')
 def delete_project(project_id: int, tg_id: int) -> dict:
     deleted = delete_project_by_tg_id(project_id, tg_id)
-    return {'ok': True, 'deleted_project_id': deleted['id']}
+    return {'ok': True, 'deleted_project_id': deleted['id'], 'purge_job_id': deleted['purge_job_id']}
+
+
+@router.get('/projects/{project_id}/board')
+def project_board(project_id: int, tg_id: int) -> dict:
+    enforce_rate_limit('db', tg_id=tg_id)
+    return {'ok': True, **get_project_board(project_id, tg_id)}
+
+
+@router.get('/projects/{project_id}/search')
+def project_search(project_id: int, tg_id: int, q: str, limit: int = 20, offset: int = 0) -> dict:
+    enforce_rate_limit('db', tg_id=tg_id)
+    return {'ok': True, **search_project(project_id, tg_id, q, limit, offset)}
 
 
 @router.get('/projects/{project_id}/tasks')
 def project_tasks(project_id: int, tg_id: int) -> dict:
+    enforce_rate_limit('db', tg_id=tg_id)
     return {'ok': True, 'tasks': list_project_tasks(project_id, tg_id)}
 
 
 @router.post('/projects/{project_id}/tasks')
-def project_create_task(project_id: int, payload: TaskCreateRequest) -> dict:
-    return {'ok': True, 'task': create_project_task(project_id, payload)}
+def project_create_task(
+    project_id: int,
+    payload: TaskCreateRequest,
+    idempotency_key: str | None = Header(default=None),
+) -> dict:
+    return run_idempotent(
+        f'project-task:{project_id}:{payload.tg_id}',
+        idempotency_key,
+        payload.model_dump(),
+        lambda: {'ok': True, 'task': create_project_task(project_id, payload)},
+    )
+
+
+@router.get('/projects/{project_id}/archive')
+def project_archive(project_id: int, tg_id: int, limit: int = 50, before: str | None = None) -> dict:
+    return {'ok': True, **list_archived_tasks(project_id, tg_id, limit, before)}
 
 
 @router.get('/projects/{project_id}/sprints')
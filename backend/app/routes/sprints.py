@@ -1,11 +1,16 @@
 ﻿from fastapi import APIRouter
 
 from app.schemas import SprintUpdateRequest
-from app.services.board_service import delete_sprint, update_sprint
+from app.services.board_service import delete_sprint, get_sprint_burndown, update_sprint
 
 router = APIRouter()
 
 
+@router.get('/sprints/{sprint_id}/burndown')
+def sprint_burndown(sprint_id: int, tg_id: int) -> dict:
+    return {'ok': True, **get_sprint_burndown(sprint_id, tg_id)}
+
+
 @router.patch('/sprints/{sprint_id}')
 def patch_sprint(sprint_id: int, payload: SprintUpdateRequest) -> dict:
     return {'ok': True, 'sprint': update_sprint(sprint_id, payload)}
@@ -14,4 +19,4 @@ def patch_sprint(sprint_id: int, payload: SprintUpdateRequest) -> dict:
 @router.delete('/sprints/{sprint_id}')
 def remove_sprint(sprint_id: int, tg_id: int) -> dict:
     deleted = delete_sprint(sprint_id, tg_id)
-    return {'ok': True, 'deleted_sprint_id': deleted['id']}
+    return {'ok': True, 'deleted_sprint_id': deleted['id'], 'purge_job_id': deleted['purge_job_id']}
@@ -1,6 +1,8 @@
 ﻿import os
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
+
+from app.metrics import render_metrics
 
 router = APIRouter()
 
@@ -16,3 +18,9 @@ def root() -> dict:
         'service': 'vkr-backend',
         'env': os.getenv('APP_ENV', 'development'),
     }
+
+
+@router.get('/metrics', include_in_schema=False)
+def metrics() -> Response:
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,7 +1,10 @@
-﻿from fastapi import APIRouter
+﻿from fastapi import APIRouter, Header
 
-from app.schemas import CommentCreateRequest, TaskUpdateRequest
+from app.rate_limit import enforce_rate_limit
+from app.schemas import ArchivedTaskRestoreRequest, CommentCreateRequest, TaskUpdateRequest
+from app.services.archive_service import get_archived_task, restore_archived_task
 from app.services.board_service import create_task_comment, delete_task, list_task_comments, list_task_history, update_task
+from app.services.idempotency_service import run_idempotent
 
 router = APIRouter()
 
@@ -14,12 +17,19 @@ def patch_task(task_id: int, payload: TaskUpdateRequest) -> dict:
 @router.delete('/tasks/{task_id}')
 def remove_task(task_id: int, tg_id: int) -> dict:
     deleted = delete_task(task_id, tg_id)
-    return {'ok': True, 'deleted_task_id': deleted['id']}
+    return {'ok': True, 'deleted_task_id': deleted['id'], 'purge_job_id': deleted['purge_job_id']}
 
 
 @router.get('/tasks/{task_id}/comments')
-def task_comments(task_id: int, tg_id: int) -> dict:
-    return {'ok': True, 'comments': list_task_comments(task_id, tg_id)}
+def task_comments(
+    task_id: int,
+    tg_id: int,
+    limit: int = 50,
+    after: str | None = None,
+    before: str | None = None,
+) -> dict:
+    enforce_rate_limit('db', tg_id=tg_id)
+    return {'ok': True, **list_task_comments(task_id, tg_id, limit, after, before)}
 
 
 @router.get('/tasks/{task_id}/history')
@@ -28,5 +38,24 @@ def task_history(task_id: int, tg_id: int) -> dict:
 
 
 @router.post('/tasks/{task_id}/comments')
-def create_comment(task_id: int, payload: CommentCreateRequest) -> dict:
-    return {'ok': True, 'comment': create_task_comment(task_id, payload)}
+def create_comment(
+    task_id: int,
+    payload: CommentCreateRequest,
+    idempotency_key: str | None = Header(default=None),
+) -> dict:
+    return run_idempotent(
+        f'task-comment:{task_id}:{payload.tg_id}',
+        idempotency_key,
+        payload.model_dump(),
+        lambda: {'ok': True, 'comment': create_task_comment(task_id, payload)},
+    )
+
+
+@router.get('/archived-tasks/{task_id}')
+def archived_task(task_id: int, tg_id: int) -> dict:
+    return {'ok': True, **get_archived_task(task_id, tg_id)}
+
+
+@router.post('/archived-tasks/{task_id}/restore')
+def restore_task(task_id: int, payload: ArchivedTaskRestoreRequest) -> dict:
+    return {'ok': True, 'task': restore_archived_task(task_id, payload.tg_id)}
@@ -17,6 +17,7 @@ class BotChatProjectRequest(BaseModel):
 
 class BotIngestMessageRequest(BaseModel):
     chat_id: int
+    message_id: int | None = None
     chat_type: str | None = None
     title: str | None = None
     user_tg_id: int
@@ -66,3 +67,14 @@ class TaskUpdateRequest(BaseModel):
 class CommentCreateRequest(BaseModel):
     tg_id: int
     text: str
+
+
+class ArchivedTaskRestoreRequest(BaseModel):
+    tg_id: int
+
+
+class RequestProfileStartRequest(BaseModel):
+    routes: list[str]
+    fraction: float = 0.1
+    seconds: float = 60
+    interval_ms: float = 5
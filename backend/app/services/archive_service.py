@@ -0,0 +1,410 @@
+import logging
+import threading
+
+from fastapi import HTTPException
+from psycopg.errors import Error as PsycopgError
+from psycopg.errors import ForeignKeyViolation
+from psycopg.rows import dict_row
+
+from app.config import get_float_env
+from app.db import connect, get_database_url, record_user_write
+from app.db_helpers import (
+    decode_keyset_cursor,
+    encode_keyset_cursor,
+    ensure_archive_tables,
+    ensure_project_summary_table,
+    ensure_sprint_tables,
+    ensure_task_audit_table,
+)
+from app.project_service import ensure_project_member, get_user_id_by_tg_id, invalidate_projects_cache
+
+logger = logging.getLogger(__name__)
+
+_archiver_stop = threading.Event()
+_archiver_thread: threading.Thread | None = None
+
+
+def get_archive_after_days() -> float:
+    return max(get_float_env("TASK_ARCHIVE_AFTER_DAYS", 30), 0.0)
+
+
+def get_archive_interval_seconds() -> float:
+    return get_float_env("TASK_ARCHIVE_INTERVAL_SECONDS", 3600)
+
+
+def _ensure_archive_ready(cur) -> None:
+    ensure_sprint_tables(cur)
+    ensure_task_audit_table(cur)
+    ensure_project_summary_table(cur)
+    ensure_archive_tables(cur)
+
+
+def _lock_project_summaries(cur, project_ids: list[int]) -> list[dict]:
+    # Locked in project order before any task moves, so task triggers of concurrent transactions
+    # wait for this one instead of updating the rows between the lock and the compensation.
+    cur.execute(
+        """
+        SELECT project_id, last_activity_at
+        FROM project_summaries
+        WHERE project_id = ANY(%s)
+        ORDER BY project_id
+        FOR UPDATE;
+        """,
+        (project_ids,),
+    )
+    return cur.fetchall()
+
+
+def _compensate_project_summaries(cur, locked: list[dict], done_deltas: dict[int, int]) -> None:
+    # Moving rows between tiers fires the task triggers; archived tasks still count as done
+    # and moving them is not project activity. The done count is corrected by the number of
+    # moved tasks rather than overwritten; last_activity_at is put back, which is safe because
+    # the rows stay locked until commit.
+    if not locked:
+        return
+    cur.execute(
+        """
+        UPDATE project_summaries ps
+        SET done_task_count = ps.done_task_count + v.done_delta, last_activity_at = v.last_activity_at
+        FROM UNNEST(%s::BIGINT[], %s::INT[], %s::TIMESTAMPTZ[]) AS v(project_id, done_delta, last_activity_at)
+        WHERE ps.project_id = v.project_id;
+        """,
+        (
+            [row["project_id"] for row in locked],
+            [done_deltas.get(row["project_id"], 0) for row in locked],
+            [row["last_activity_at"] for row in locked],
+        ),
+    )
+
+
+def _archive_batch(cur, older_than_days: float, batch_size: int) -> list[dict]:
+    cur.execute("SELECT to_regclass('attachments') IS NOT NULL AS attachments_exist;")
+    attachments_exist = cur.fetchone()["attachments_exist"]
+    # Attachments are not archived, so tasks that have any stay in the hot tables.
+    attachment_filter = (
+        """
+          AND NOT EXISTS (
+            SELECT 1
+            FROM attachments a
+            LEFT JOIN comments c ON c.id = a.comment_id
+            WHERE a.task_id = t.id OR c.task_id = t.id
+          )
+        """
+        if attachments_exist
+        else ""
+    )
+    cur.execute(
+        f"""
+        SELECT t.id, t.project_id
+        FROM tasks t
+        WHERE t.status = 'DONE'
+          AND t.deleted_at IS NULL
+          AND t.updated_at < NOW() - make_interval(secs => %s)
+          {attachment_filter}
+        ORDER BY t.updated_at
+        LIMIT %s
+        FOR UPDATE OF t SKIP LOCKED;
+        """,
+        (older_than_days * 86400, batch_size),
+    )
+    picked = cur.fetchall()
+    if not picked:
+        return []
+    task_ids = [row["id"] for row in picked]
+    done_deltas: dict[int, int] = {}
+    for row in picked:
+        done_deltas[row["project_id"]] = done_deltas.get(row["project_id"], 0) + 1
+    locked_summaries = _lock_project_summaries(cur, sorted(done_deltas))
+
+    cur.execute(
+        """
+        INSERT INTO tasks_archive (
+          id, project_id, sprint_id, title, description, status, execution_hours,
+          author_id, assignee_id, deadline_at, version, created_at, updated_at
+        )
+        SELECT
+          id, project_id, sprint_id, title, description, status, execution_hours,
+          author_id, assignee_id, deadline_at, version, created_at, updated_at
+        FROM tasks
+        WHERE id = ANY(%s);
+        """,
+        (task_ids,),
+    )
+    cur.execute(
+        """
+        INSERT INTO comments_archive (id, task_id, author_id, text, created_at)
+        SELECT id, task_id, author_id, text, created_at
+        FROM comments
+        WHERE task_id = ANY(%s);
+        """,
+        (task_ids,),
+    )
+    cur.execute(
+        """
+        INSERT INTO task_audit_log_archive (id, task_id, actor_id, event_type, field, old_value, new_value, created_at)
+        SELECT id, task_id, actor_id, event_type, field, old_value, new_value, created_at
+        FROM task_audit_log
+        WHERE task_id = ANY(%s);
+        """,
+        (task_ids,),
+    )
+    cur.execute("DELETE FROM tasks WHERE id = ANY(%s);", (task_ids,))
+    _compensate_project_summaries(cur, locked_summaries, done_deltas)
+    return picked
+
+
+def archive_done_tasks(older_than_days: float | None = None, batch_size: int = 500, max_batches: int = 100) -> dict:
+    if older_than_days is None:
+        older_than_days = get_archive_after_days()
+    archived_count = 0
+    project_ids: set[int] = set()
+    try:
+        with connect(get_database_url()) as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                _ensure_archive_ready(cur)
+                conn.commit()
+                for _ in range(max_batches):
+                    picked = _archive_batch(cur, older_than_days, batch_size)
+                    conn.commit()
+                    archived_count += len(picked)
+                    project_ids.update(row["project_id"] for row in picked)
+                    if len(picked) < batch_size:
+                        break
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except PsycopgError as exc:
+        raise HTTPException(status_code=500, detail=f"Database error while archiving tasks: {exc}")
+    finally:
+        for project_id in project_ids:
+            invalidate_projects_cache(project_id=project_id)
+    return {"archived_count": archived_count, "project_ids": sorted(project_ids)}
+
+
+def list_archived_tasks(project_id: int, tg_id: int, limit: int = 50, before: str | None = None) -> dict:
+    if limit < 1 or limit > 200:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and 200")
+    before_key = decode_keyset_cursor(before) if before else None
+    try:
+        with connect(get_database_url()) as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                _ensure_archive_ready(cur)
+                user_id = get_user_id_by_tg_id(cur, tg_id)
+                ensure_project_member(cur, project_id, user_id)
+                key_filter = ""
+                key_params: tuple = ()
+                if before_key is not None:
+                    key_filter = "AND (a.archived_at, a.id) < (%s, %s)"
+                    key_params = before_key
+                cur.execute(
+                    f"""
+                    SELECT
+                      a.id,
+                      a.project_id,
+                      a.sprint_id,
+                      a.version,
+                      a.title,
+                      a.description,
+                      a.status,
+                      a.execution_hours,
+                      a.created_at,
+                      a.updated_at,
+                      a.archived_at,
+                      (SELECT COUNT(*)::INT FROM comments_archive c WHERE c.task_id = a.id) AS comment_count
+                    FROM tasks_archive a
+                    WHERE a.project_id = %s
+                      {key_filter}
+                    ORDER BY a.archived_at DESC, a.id DESC
+                    LIMIT %s;
+                    """,
+                    (project_id, *key_params, limit + 1),
+                )
+                tasks = cur.fetchall()
+            conn.commit()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except HTTPException:
+        raise
+    except PsycopgError as exc:
+        raise HTTPException(status_code=500, detail=f"Database error while loading archived tasks: {exc}")
+
+    has_more = len(tasks) > limit
+    tasks = tasks[:limit]
+    return {
+        "tasks": tasks,
+        "page": {
+            "limit": limit,
+            "has_more": has_more,
+            "before_cursor": encode_keyset_cursor(tasks[-1]["archived_at"], tasks[-1]["id"]) if has_more else None,
+        },
+    }
+
+
+def get_archived_task(task_id: int, tg_id: int) -> dict:
+    try:
+        with connect(get_database_url()) as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                _ensure_archive_ready(cur)
+                user_id = get_user_id_by_tg_id(cur, tg_id)
+                cur.execute(
+                    """
+                    SELECT
+                      id, project_id, sprint_id, version, title, description, status, execution_hours,
+                      created_at, updated_at, archived_at
+                    FROM tasks_archive
+                    WHERE id = %s
+                    LIMIT 1;
+                    """,
+                    (task_id,),
+                )
+                task = cur.fetchone()
+                if not task:
+                    raise HTTPException(status_code=404, detail="Archived task not found")
+                ensure_project_member(cur, task["project_id"], user_id)
+                cur.execute(
+                    """
+                    SELECT
+                      c.id,
+                      c.task_id,
+                      c.text,
+                      c.created_at,
+                      u.id AS author_id,
+                      u.first_name,
+                      u.last_name,
+                      u.username
+                    FROM comments_archive c
+                    LEFT JOIN users u ON u.id = c.author_id
+                    WHERE c.task_id = %s
+                    ORDER BY c.created_at ASC, c.id ASC;
+                    """,
+                    (task_id,),
+                )
+                comments = cur.fetchall()
+                cur.execute(
+                    """
+                    SELECT
+                      l.id,
+                      l.task_id,
+                      l.event_type,
+                      l.field,
+                      l.old_value,
+                      l.new_value,
+                      l.created_at,
+                      u.id AS actor_id,
+                      u.first_name,
+                      u.last_name,
+                      u.username
+                    FROM task_audit_log_archive l
+                    LEFT JOIN users u ON u.id = l.actor_id
+                    WHERE l.task_id = %s
+                    ORDER BY l.created_at DESC, l.id DESC;
+                    """,
+                    (task_id,),
+                )
+                history = cur.fetchall()
+            conn.commit()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except HTTPException:
+        raise
+    except PsycopgError as exc:
+        raise HTTPException(status_code=500, detail=f"Database error while loading archived task: {exc}")
+    return {"task": task, "comments": comments, "history": history}
+
+
+def restore_archived_task(task_id: int, tg_id: int) -> dict:
+    try:
+        with connect(get_database_url()) as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                _ensure_archive_ready(cur)
+                user_id = get_user_id_by_tg_id(cur, tg_id)
+                cur.execute("SELECT project_id FROM tasks_archive WHERE id = %s FOR UPDATE;", (task_id,))
+                archived = cur.fetchone()
+                if not archived:
+                    raise HTTPException(status_code=404, detail="Archived task not found")
+                project_id = archived["project_id"]
+                ensure_project_member(cur, project_id, user_id)
+                locked_summaries = _lock_project_summaries(cur, [project_id])
+                # updated_at is refreshed so the archiver does not pick the task up again on its next run.
+                cur.execute(
+                    """
+                    INSERT INTO tasks (
+                      id, project_id, sprint_id, title, description, status, execution_hours,
+                      author_id, assignee_id, deadline_at, version, created_at, updated_at
+                    )
+                    OVERRIDING SYSTEM VALUE
+                    SELECT
+                      a.id, a.project_id, s.id, a.title, a.description, a.status, a.execution_hours,
+                      a.author_id, a.assignee_id, a.deadline_at, a.version, a.created_at, NOW()
+                    FROM tasks_archive a
+                    LEFT JOIN sprints s ON s.id = a.sprint_id AND s.deleted_at IS NULL
+                    WHERE a.id = %s
+                    RETURNING id, project_id, sprint_id, version, title, description, status, execution_hours, created_at, updated_at;
+                    """,
+                    (task_id,),
+                )
+                task = cur.fetchone()
+                cur.execute(
+                    """
+                    INSERT INTO comments (id, task_id, author_id, text, created_at)
+                    OVERRIDING SYSTEM VALUE
+                    SELECT id, task_id, author_id, text, created_at
+                    FROM comments_archive
+                    WHERE task_id = %s;
+                    """,
+                    (task_id,),
+                )
+                cur.execute(
+                    """
+                    INSERT INTO task_audit_log (id, task_id, actor_id, event_type, field, old_value, new_value, created_at)
+                    OVERRIDING SYSTEM VALUE
+                    SELECT id, task_id, actor_id, event_type, field, old_value, new_value, created_at
+                    FROM task_audit_log_archive
+                    WHERE task_id = %s;
+                    """,
+                    (task_id,),
+                )
+                cur.execute("DELETE FROM tasks_archive WHERE id = %s;", (task_id,))
+                done_delta = -1 if task["status"] == "DONE" else 0
+                _compensate_project_summaries(cur, locked_summaries, {project_id: done_delta})
+            conn.commit()
+        record_user_write(tg_id)
+        invalidate_projects_cache(project_id=project_id)
+        return task
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except HTTPException:
+        raise
+    except ForeignKeyViolation as exc:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Task cannot be restored, its author or assignee is no longer a project member: {exc}",
+        )
+    except PsycopgError as exc:
+        raise HTTPException(status_code=500, detail=f"Database error while restoring task: {exc}")
+
+
+def _archive_loop() -> None:
+    while not _archiver_stop.wait(get_archive_interval_seconds()):
+        try:
+            result = archive_done_tasks()
+            if result["archived_count"]:
+                logger.info("Archived %s done tasks", result["archived_count"])
+        except HTTPException as exc:
+            logger.warning("Failed to archive done tasks: %s", exc.detail)
+
+
+def start_task_archiver() -> None:
+    global _archiver_thread
+    if get_archive_interval_seconds() <= 0:
+        return
+    if _archiver_thread is not None and _archiver_thread.is_alive():
+        return
+    _archiver_stop.clear()
+    _archiver_thread = threading.Thread(target=_archive_loop, name="task-archiver", daemon=True)
+    _archiver_thread.start()
+
+
+def stop_task_archiver() -> None:
+    _archiver_stop.set()
+    if _archiver_thread is not None:
+        _archiver_thread.join(timeout=10)
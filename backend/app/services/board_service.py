@@ -1,69 +1,101 @@
 ﻿import json
+from datetime import timedelta
 
 from fastapi import HTTPException
-from psycopg import connect
+from psycopg import IsolationLevel
 from psycopg.errors import Error as PsycopgError
 from psycopg.rows import dict_row
 
-from app.ai_extraction import extract_tasks_by_rules, extract_tasks_via_openrouter
+from app.ai_extraction import LlmCircuitOpen, extract_tasks_by_rules, extract_tasks_via_openrouter
 from app.auth_service import save_or_update_user
-from app.db import get_database_url
+from app.db import connect, get_database_url, get_read_database_url, is_replica_url, record_user_write
 from app.db_helpers import (
-    add_task_audit_entry,
+    TaskAuditBuffer,
+    apply_sprint_rollup_delta,
+    decode_keyset_cursor,
+    encode_keyset_cursor,
+    ensure_sprint_rollup_table,
     ensure_sprint_tables,
     ensure_task_audit_table,
     ensure_task_comment_reads_table,
     normalize_task_status,
 )
-from app.project_service import ensure_project_member, get_user_id_by_tg_id
+from app.metrics import EXTRACTION_OUTCOMES, TEXT_COMPACTION_TOKENS
+from app.project_service import ensure_project_member, get_user_id_by_tg_id, invalidate_projects_cache
+from app.relevance import is_relevant_message
 from app.schemas import BotIngestMessageRequest, CommentCreateRequest, SprintCreateRequest, SprintUpdateRequest, TaskCreateRequest, TaskUpdateRequest
 from app.services.chat_project_service import ensure_chat_project
+from app.services.comment_read_service import get_pending_comment_reads, record_comment_read
+from app.services.document_extraction import extract_tasks_from_document, get_document_chunk_chars, get_document_max_chars
+from app.services.extraction_batcher import extract_tasks_for_chat_message
+from app.services.purge_service import enqueue_purge, wake_purger
+from app.sql_catalog import execute_named
+from app.text_compaction import compact_text, estimate_tokens
+from app.tracing import set_span_attributes, trace_span, traced
+
+COMPACTED_SOURCE_TYPES = ("document", "voice", "audio", "video")
+
+_board_tables_ready = False
+
+
+def _fetch_project_tasks(cur, project_id: int, user_id: int) -> list[dict]:
+    pending_reads = get_pending_comment_reads(user_id)
+    execute_named(
+        cur,
+        "project_tasks",
+        (user_id, list(pending_reads.keys()), list(pending_reads.values()), project_id),
+    )
+    return cur.fetchall()
+
+
+def _fetch_project_sprints(cur, project_id: int) -> list[dict]:
+    cur.execute(
+        """
+        SELECT
+          s.id,
+          s.project_id,
+          s.title,
+          s.start_date,
+          s.end_date,
+          s.is_open,
+          s.created_at,
+          COALESCE(r.new_count, 0) AS new_count,
+          COALESCE(r.in_progress_count, 0) AS in_progress_count,
+          COALESCE(r.done_count, 0) AS done_count,
+          COALESCE(r.new_hours, 0) AS new_hours,
+          COALESCE(r.in_progress_hours, 0) AS in_progress_hours,
+          COALESCE(r.done_hours, 0) AS done_hours
+        FROM sprints s
+        LEFT JOIN LATERAL (
+          SELECT
+            SUM(new_count)::INT AS new_count,
+            SUM(in_progress_count)::INT AS in_progress_count,
+            SUM(done_count)::INT AS done_count,
+            SUM(new_hours)::INT AS new_hours,
+            SUM(in_progress_hours)::INT AS in_progress_hours,
+            SUM(done_hours)::INT AS done_hours
+          FROM sprint_daily_rollups
+          WHERE sprint_id = s.id
+        ) r ON TRUE
+        WHERE s.project_id = %s AND s.deleted_at IS NULL
+        ORDER BY s.created_at ASC, s.id ASC;
+        """,
+        (project_id,),
+    )
+    return cur.fetchall()
 
 
 def list_project_tasks(project_id: int, tg_id: int) -> list[dict]:
     try:
-        with connect(get_database_url()) as conn:
+        conninfo = get_read_database_url(tg_id)
+        with connect(conninfo) as conn:
             with conn.cursor(row_factory=dict_row) as cur:
-                ensure_sprint_tables(cur)
-                ensure_task_comment_reads_table(cur)
+                if not is_replica_url(conninfo):
+                    ensure_sprint_tables(cur)
+                    ensure_task_comment_reads_table(cur)
                 user_id = get_user_id_by_tg_id(cur, tg_id)
                 ensure_project_member(cur, project_id, user_id)
-                cur.execute(
-                    """
-                    SELECT
-                      t.id,
-                      t.project_id,
-                      t.sprint_id,
-                      t.version,
-                      t.title,
-                      t.description,
-                      t.status,
-                      t.execution_hours,
-                      COALESCE(cs.comment_count, 0) AS comment_count,
-                      cs.last_comment_at,
-                      COALESCE(cs.unread_comment_count, 0) AS unread_comment_count,
-                      t.created_at,
-                      t.updated_at
-                    FROM tasks t
-                    LEFT JOIN LATERAL (
-                      SELECT
-                        COUNT(*)::INT AS comment_count,
-                        MAX(c.created_at) AS last_comment_at,
-                        COUNT(*) FILTER (
-                          WHERE c.created_at > COALESCE(tcr.last_read_at, TO_TIMESTAMP(0))
-                        )::INT AS unread_comment_count
-                      FROM comments c
-                      LEFT JOIN task_comment_reads tcr
-                        ON tcr.task_id = t.id
-                       AND tcr.user_id = %s
-                      WHERE c.task_id = t.id
-                    ) cs ON TRUE
-                    WHERE t.project_id = %s
-                    ORDER BY t.updated_at DESC, t.id DESC;
-                    """,
-                    (user_id, project_id),
-                )
-                return cur.fetchall()
+                return _fetch_project_tasks(cur, project_id, user_id)
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
     except HTTPException:
@@ -73,28 +105,70 @@ def list_project_tasks(project_id: int, tg_id: int) -> list[dict]:
 
 
 def list_project_sprints(project_id: int, tg_id: int) -> list[dict]:
+    try:
+        conninfo = get_read_database_url(tg_id)
+        with connect(conninfo) as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                if not is_replica_url(conninfo):
+                    ensure_sprint_tables(cur)
+                    ensure_sprint_rollup_table(cur)
+                user_id = get_user_id_by_tg_id(cur, tg_id)
+                ensure_project_member(cur, project_id, user_id)
+                return _fetch_project_sprints(cur, project_id)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except HTTPException:
+        raise
+    except PsycopgError as exc:
+        raise HTTPException(status_code=500, detail=f"Database error while loading sprints: {exc}")
+
+
+def get_project_board(project_id: int, tg_id: int) -> dict:
+    global _board_tables_ready
     try:
         with connect(get_database_url()) as conn:
+            # The DDL checks need their own transaction before the read-only snapshot; once they have
+            # committed in this process, a board open is a single transaction.
+            if not _board_tables_ready:
+                with conn.cursor(row_factory=dict_row) as cur:
+                    ensure_sprint_tables(cur)
+                    ensure_sprint_rollup_table(cur)
+                    ensure_task_comment_reads_table(cur)
+                conn.commit()
+                _board_tables_ready = True
+            conn.isolation_level = IsolationLevel.REPEATABLE_READ
+            conn.read_only = True
             with conn.cursor(row_factory=dict_row) as cur:
-                ensure_sprint_tables(cur)
                 user_id = get_user_id_by_tg_id(cur, tg_id)
                 ensure_project_member(cur, project_id, user_id)
                 cur.execute(
                     """
-                    SELECT id, project_id, title, start_date, end_date, is_open, created_at
-                    FROM sprints
-                    WHERE project_id = %s
-                    ORDER BY created_at ASC, id ASC;
+                    SELECT id, project_key, title, tg_chat_id, tg_chat_instance, tg_chat_type
+                    FROM projects
+                    WHERE id = %s
+                    LIMIT 1;
                     """,
                     (project_id,),
                 )
-                return cur.fetchall()
+                project = cur.fetchone()
+                if not project:
+                    raise HTTPException(status_code=404, detail="Project not found")
+                sprints = _fetch_project_sprints(cur, project_id)
+                tasks = _fetch_project_tasks(cur, project_id, user_id)
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
     except HTTPException:
         raise
     except PsycopgError as exc:
-        raise HTTPException(status_code=500, detail=f"Database error while loading sprints: {exc}")
+        raise HTTPException(status_code=500, detail=f"Database error while loading board: {exc}")
+
+    return {
+        "project": project,
+        "sprints": sprints,
+        "tasks": tasks,
+        "unread_comment_count": sum(task["unread_comment_count"] for task in tasks),
+        "unread_task_count": sum(1 for task in tasks if task["unread_comment_count"] > 0),
+    }
 
 
 def create_project_sprint(project_id: int, payload: SprintCreateRequest) -> dict:
@@ -117,6 +191,8 @@ def create_project_sprint(project_id: int, payload: SprintCreateRequest) -> dict
                 )
                 sprint = cur.fetchone()
             conn.commit()
+            record_user_write(payload.tg_id)
+            invalidate_projects_cache(project_id=project_id)
             return sprint
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
@@ -134,7 +210,7 @@ def update_sprint(sprint_id: int, payload: SprintUpdateRequest) -> dict:
             with conn.cursor(row_factory=dict_row) as cur:
                 ensure_sprint_tables(cur)
                 user_id = get_user_id_by_tg_id(cur, payload.tg_id)
-                cur.execute("SELECT project_id FROM sprints WHERE id = %s LIMIT 1;", (sprint_id,))
+                cur.execute("SELECT project_id FROM sprints WHERE id = %s AND deleted_at IS NULL LIMIT 1;", (sprint_id,))
                 sprint_row = cur.fetchone()
                 if not sprint_row:
                     raise HTTPException(status_code=404, detail="Sprint not found")
@@ -147,7 +223,7 @@ def update_sprint(sprint_id: int, payload: SprintUpdateRequest) -> dict:
                       start_date = COALESCE(%s, start_date),
                       end_date = COALESCE(%s, end_date),
                       is_open = COALESCE(%s, is_open)
-                    WHERE id = %s
+                    WHERE id = %s AND deleted_at IS NULL
                     RETURNING id, project_id, title, start_date, end_date, is_open, created_at;
                     """,
                     (
@@ -160,6 +236,8 @@ def update_sprint(sprint_id: int, payload: SprintUpdateRequest) -> dict:
                 )
                 updated = cur.fetchone()
             conn.commit()
+            record_user_write(payload.tg_id)
+            invalidate_projects_cache(project_id=sprint_row["project_id"])
             return updated
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
@@ -175,15 +253,24 @@ def delete_sprint(sprint_id: int, tg_id: int) -> dict:
             with conn.cursor(row_factory=dict_row) as cur:
                 ensure_sprint_tables(cur)
                 user_id = get_user_id_by_tg_id(cur, tg_id)
-                cur.execute("SELECT project_id FROM sprints WHERE id = %s LIMIT 1;", (sprint_id,))
+                cur.execute("SELECT project_id FROM sprints WHERE id = %s AND deleted_at IS NULL LIMIT 1;", (sprint_id,))
                 sprint_row = cur.fetchone()
                 if not sprint_row:
                     raise HTTPException(status_code=404, detail="Sprint not found")
                 ensure_project_member(cur, sprint_row["project_id"], user_id)
-                cur.execute("DELETE FROM sprints WHERE id = %s RETURNING id;", (sprint_id,))
+                cur.execute(
+                    "UPDATE sprints SET deleted_at = NOW() WHERE id = %s AND deleted_at IS NULL RETURNING id;",
+                    (sprint_id,),
+                )
                 deleted = cur.fetchone()
+                if not deleted:
+                    raise HTTPException(status_code=404, detail="Sprint not found")
+                purge_job_id = enqueue_purge(cur, "sprint", sprint_id)
             conn.commit()
-            return deleted or {"id": sprint_id}
+            wake_purger()
+            record_user_write(tg_id)
+            invalidate_projects_cache(project_id=sprint_row["project_id"])
+            return {"id": deleted["id"], "purge_job_id": purge_job_id}
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
     except HTTPException:
@@ -192,64 +279,172 @@ def delete_sprint(sprint_id: int, tg_id: int) -> dict:
         raise HTTPException(status_code=500, detail=f"Database error while deleting sprint: {exc}")
 
 
-def create_project_task(project_id: int, payload: TaskCreateRequest) -> dict:
+def get_sprint_burndown(sprint_id: int, tg_id: int) -> dict:
+    try:
+        with connect(get_database_url()) as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                ensure_sprint_tables(cur)
+                ensure_sprint_rollup_table(cur)
+                user_id = get_user_id_by_tg_id(cur, tg_id)
+                cur.execute(
+                    """
+                    SELECT id, project_id, title, start_date, end_date, is_open, created_at, CURRENT_DATE AS today
+                    FROM sprints
+                    WHERE id = %s AND deleted_at IS NULL
+                    LIMIT 1;
+                    """,
+                    (sprint_id,),
+                )
+                sprint = cur.fetchone()
+                if not sprint:
+                    raise HTTPException(status_code=404, detail="Sprint not found")
+                ensure_project_member(cur, sprint["project_id"], user_id)
+                cur.execute(
+                    """
+                    SELECT day, new_count, in_progress_count, done_count, new_hours, in_progress_hours, done_hours
+                    FROM sprint_daily_rollups
+                    WHERE sprint_id = %s
+                    ORDER BY day ASC;
+                    """,
+                    (sprint_id,),
+                )
+                rollups = cur.fetchall()
+            conn.commit()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except HTTPException:
+        raise
+    except PsycopgError as exc:
+        raise HTTPException(status_code=500, detail=f"Database error while loading sprint burndown: {exc}")
+
+    today = sprint.pop("today")
+    metric_keys = ("new_count", "in_progress_count", "done_count", "new_hours", "in_progress_hours", "done_hours")
+    start_day = sprint["start_date"] or (rollups[0]["day"] if rollups else sprint["created_at"].date())
+    end_day = sprint["end_date"] or max(today, rollups[-1]["day"] if rollups else today)
+    if end_day < start_day:
+        end_day = start_day
+    end_day = min(end_day, start_day + timedelta(days=365))
+
+    totals = dict.fromkeys(metric_keys, 0)
+    rollup_index = 0
+    while rollup_index < len(rollups) and rollups[rollup_index]["day"] < start_day:
+        for key in metric_keys:
+            totals[key] += rollups[rollup_index][key]
+        rollup_index += 1
+
+    days = []
+    current_day = start_day
+    while current_day <= min(end_day, today):
+        while rollup_index < len(rollups) and rollups[rollup_index]["day"] == current_day:
+            for key in metric_keys:
+                totals[key] += rollups[rollup_index][key]
+            rollup_index += 1
+        days.append(
+            {
+                "day": current_day,
+                **totals,
+                "remaining_hours": totals["new_hours"] + totals["in_progress_hours"],
+                "remaining_count": totals["new_count"] + totals["in_progress_count"],
+            }
+        )
+        current_day += timedelta(days=1)
+
+    while rollup_index < len(rollups):
+        for key in metric_keys:
+            totals[key] += rollups[rollup_index][key]
+        rollup_index += 1
+
+    return {
+        "sprint": sprint,
+        "days": days,
+        "totals": {
+            **totals,
+            "remaining_hours": totals["new_hours"] + totals["in_progress_hours"],
+            "remaining_count": totals["new_count"] + totals["in_progress_count"],
+        },
+    }
+
+
+def _validate_task_create(payload: TaskCreateRequest) -> tuple[str, str]:
     title = payload.title.strip()
     if not title:
         raise HTTPException(status_code=400, detail="Task title is required")
     status = normalize_task_status(payload.status)
     if payload.execution_hours is not None and payload.execution_hours <= 0:
         raise HTTPException(status_code=400, detail="Execution hours must be greater than zero")
+    return title, status
+
+
+def _insert_project_task(
+    cur,
+    project_id: int,
+    user_id: int,
+    payload: TaskCreateRequest,
+    title: str,
+    status: str,
+    audit: TaskAuditBuffer,
+) -> dict:
+    cur.execute(
+        """
+        INSERT INTO tasks (
+          project_id, sprint_id, title, description, status, author_id, assignee_id, execution_hours, version
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 1)
+        RETURNING id, project_id, sprint_id, version, title, description, status, execution_hours, created_at, updated_at;
+        """,
+        (
+            project_id,
+            payload.sprint_id,
+            title,
+            payload.description or "",
+            status,
+            user_id,
+            user_id,
+            payload.execution_hours,
+        ),
+    )
+    task = cur.fetchone()
+    apply_sprint_rollup_delta(cur, None, task)
+    audit.add(
+        task_id=task["id"],
+        actor_id=user_id,
+        event_type="CREATE",
+        new_value={
+            "title": task["title"],
+            "description": task["description"],
+            "status": task["status"],
+            "execution_hours": task["execution_hours"],
+            "sprint_id": task["sprint_id"],
+            "version": task["version"],
+        },
+    )
+    return task
+
+
+@traced("create_project_task")
+def create_project_task(project_id: int, payload: TaskCreateRequest) -> dict:
+    title, status = _validate_task_create(payload)
     try:
         with connect(get_database_url()) as conn:
             with conn.cursor(row_factory=dict_row) as cur:
                 ensure_sprint_tables(cur)
+                ensure_sprint_rollup_table(cur)
                 ensure_task_audit_table(cur)
                 user_id = get_user_id_by_tg_id(cur, payload.tg_id)
                 ensure_project_member(cur, project_id, user_id)
                 if payload.sprint_id is not None:
                     cur.execute(
-                        "SELECT 1 FROM sprints WHERE id = %s AND project_id = %s LIMIT 1;",
+                        "SELECT 1 FROM sprints WHERE id = %s AND project_id = %s AND deleted_at IS NULL LIMIT 1;",
                         (payload.sprint_id, project_id),
                     )
                     if not cur.fetchone():
                         raise HTTPException(status_code=404, detail="Sprint not found in this project")
-                cur.execute(
-                    """
-                    INSERT INTO tasks (
-                      project_id, sprint_id, title, description, status, author_id, assignee_id, execution_hours, version
-                    )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 1)
-                    RETURNING id, project_id, sprint_id, version, title, description, status, execution_hours, created_at, updated_at;
-                    """,
-                    (
-                        project_id,
-                        payload.sprint_id,
-                        title,
-                        payload.description or "",
-                        status,
-                        user_id,
-                        user_id,
-                        payload.execution_hours,
-                    ),
-                )
-                task = cur.fetchone()
-                add_task_audit_entry(
-                    cur,
-                    task_id=task["id"],
-                    actor_id=user_id,
-                    event_type="CREATE",
-                    field=None,
-                    old_value=None,
-                    new_value={
-                        "title": task["title"],
-                        "description": task["description"],
-                        "status": task["status"],
-                        "execution_hours": task["execution_hours"],
-                        "sprint_id": task["sprint_id"],
-                        "version": task["version"],
-                    },
-                )
+                audit = TaskAuditBuffer()
+                task = _insert_project_task(cur, project_id, user_id, payload, title, status, audit)
+                audit.flush(cur)
             conn.commit()
+            record_user_write(payload.tg_id)
+            invalidate_projects_cache(project_id=project_id)
             return task
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
@@ -259,8 +454,24 @@ def create_project_task(project_id: int, payload: TaskCreateRequest) -> dict:
         raise HTTPException(status_code=500, detail=f"Database error while creating task: {exc}")
 
 
+def _compact_message_text(text: str, source_type: str) -> str:
+    # Extracted documents and transcripts carry headers, page numbers and filler words that only
+    # cost prompt tokens; drop them before the text reaches the extractors.
+    with trace_span("compact_text", source_type=source_type) as span:
+        compacted = compact_text(text, transcript=source_type != "document")
+        tokens_before, tokens_after = estimate_tokens(text), estimate_tokens(compacted)
+        if span is not None:
+            span.attributes.update(tokens_before=tokens_before, tokens_after=tokens_after)
+    TEXT_COMPACTION_TOKENS.labels(source_type, "before").inc(tokens_before)
+    TEXT_COMPACTION_TOKENS.labels(source_type, "after").inc(tokens_after)
+    return compacted
+
+
+@traced("create_bot_tasks_from_message")
 def create_bot_tasks_from_message(payload: BotIngestMessageRequest) -> dict:
     text = payload.content_text.strip()
+    if payload.source_type in COMPACTED_SOURCE_TYPES and text:
+        text = _compact_message_text(text, payload.source_type)
     has_image = (
         payload.attachment_kind == "image"
         and bool(payload.attachment_base64)
@@ -268,23 +479,30 @@ def create_bot_tasks_from_message(payload: BotIngestMessageRequest) -> dict:
     )
     if not text and not has_image:
         raise HTTPException(status_code=400, detail="Message content is empty")
-    if len(text) > 12000:
-        text = text[:12000]
+    # Long documents are extracted chunk by chunk; other messages keep the single-request limit.
+    document_mode = not has_image and (
+        payload.source_type == "document" or len(text) > get_document_chunk_chars()
+    )
+    text = text[: get_document_max_chars() if document_mode else 12000]
+    document_mode = document_mode and len(text) > get_document_chunk_chars()
 
+    set_span_attributes(chat_id=payload.chat_id, source_type=payload.source_type or "text", text_length=len(text))
     project_title = payload.title or "Новый проект"
-    project = ensure_chat_project(payload.chat_id, payload.chat_type, project_title)
-    save_or_update_user(
-        {
-            "id": payload.user_tg_id,
-            "username": payload.user_username,
-            "first_name": payload.user_first_name or "",
-            "last_name": payload.user_last_name,
-            "photo_url": None,
-        }
-    )
+    with trace_span("ensure_chat_project"):
+        project = ensure_chat_project(payload.chat_id, payload.chat_type, project_title)
+    with trace_span("save_or_update_user"):
+        save_or_update_user(
+            {
+                "id": payload.user_tg_id,
+                "username": payload.user_username,
+                "first_name": payload.user_first_name or "",
+                "last_name": payload.user_last_name,
+                "photo_url": None,
+            }
+        )
 
     try:
-        with connect(get_database_url()) as conn:
+        with trace_span("link_project_member"), connect(get_database_url()) as conn:
             with conn.cursor(row_factory=dict_row) as cur:
                 user_id = get_user_id_by_tg_id(cur, payload.user_tg_id)
                 cur.execute(
@@ -299,34 +517,92 @@ def create_bot_tasks_from_message(payload: BotIngestMessageRequest) -> dict:
                 )
                 cur.fetchone()
             conn.commit()
+        invalidate_projects_cache(user_id=user_id)
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
     except PsycopgError as exc:
         raise HTTPException(status_code=500, detail=f"Database error while linking user to project: {exc}")
 
-    extracted_tasks = extract_tasks_via_openrouter(
-        text,
-        project.get("title") or project_title,
-        payload.attachment_kind,
-        payload.attachment_mime,
-        payload.attachment_base64,
-    )
-    if not extracted_tasks:
+    if not document_mode and not has_image and is_relevant_message(text) is False:
+        # The local classifier is confident this is chatter: no LLM round trip and no rule
+        # fallback, since tasks must not be created from a message judged off-topic.
+        EXTRACTION_OUTCOMES.labels("classifier_skip").inc()
+        set_span_attributes(task_count=0)
+        return {
+            "project": project,
+            "created_tasks": [],
+            "created_count": 0,
+            "source_type": payload.source_type or "text",
+        }
+
+    circuit_open = False
+    try:
+        if document_mode:
+            extracted_tasks = extract_tasks_from_document(text, project.get("title") or project_title)
+        elif not payload.attachment_kind and payload.message_id is not None:
+            extracted_tasks = extract_tasks_for_chat_message(
+                payload.chat_id,
+                payload.message_id,
+                text,
+                project.get("title") or project_title,
+            )
+        else:
+            extracted_tasks = extract_tasks_via_openrouter(
+                text,
+                project.get("title") or project_title,
+                payload.attachment_kind,
+                payload.attachment_mime,
+                payload.attachment_base64,
+            )
+    except LlmCircuitOpen:
+        # Every model is known to be failing; degrade to the rule extractor right away.
+        circuit_open = True
+        extracted_tasks = []
+    except HTTPException:
+        EXTRACTION_OUTCOMES.labels("llm_error").inc()
+        raise
+    # Exactly one outcome per message, so the series sums to message volume.
+    if extracted_tasks:
+        EXTRACTION_OUTCOMES.labels("llm").inc()
+    else:
         extracted_tasks = extract_tasks_by_rules(text)
-    created_tasks = []
-    for task in extracted_tasks:
-        created = create_project_task(
-            project["id"],
-            TaskCreateRequest(
-                tg_id=payload.user_tg_id,
-                title=task["title"],
-                description=task["description"],
-                execution_hours=task["execution_hours"],
-                status=task["status"],
-                sprint_id=None,
-            ),
+        outcome = "rules" if extracted_tasks else "none"
+        EXTRACTION_OUTCOMES.labels(f"circuit_open_{outcome}" if circuit_open else outcome).inc()
+    set_span_attributes(task_count=len(extracted_tasks))
+    task_requests = [
+        TaskCreateRequest(
+            tg_id=payload.user_tg_id,
+            title=task["title"],
+            description=task["description"],
+            execution_hours=task["execution_hours"],
+            status=task["status"],
+            sprint_id=None,
         )
-        created_tasks.append(created)
+        for task in extracted_tasks
+    ]
+    validated = [_validate_task_create(task_request) for task_request in task_requests]
+    created_tasks = []
+    if task_requests:
+        # All extracted tasks go in one transaction, with their audit events in one batch.
+        try:
+            with trace_span("create_project_tasks", task_count=len(task_requests)), connect(get_database_url()) as conn:
+                with conn.cursor(row_factory=dict_row) as cur:
+                    ensure_sprint_tables(cur)
+                    ensure_sprint_rollup_table(cur)
+                    ensure_task_audit_table(cur)
+                    audit = TaskAuditBuffer()
+                    for task_request, (title, status) in zip(task_requests, validated):
+                        created_tasks.append(
+                            _insert_project_task(cur, project["id"], user_id, task_request, title, status, audit)
+                        )
+                    audit.flush(cur)
+                conn.commit()
+            record_user_write(payload.user_tg_id)
+            invalidate_projects_cache(project_id=project["id"])
+        except RuntimeError as exc:
+            raise HTTPException(status_code=503, detail=str(exc))
+        except PsycopgError as exc:
+            raise HTTPException(status_code=500, detail=f"Database error while creating task: {exc}")
 
     return {
         "project": project,
@@ -355,17 +631,10 @@ def update_task(task_id: int, payload: TaskUpdateRequest) -> dict:
         with connect(get_database_url()) as conn:
             with conn.cursor(row_factory=dict_row) as cur:
                 ensure_sprint_tables(cur)
+                ensure_sprint_rollup_table(cur)
                 ensure_task_audit_table(cur)
                 user_id = get_user_id_by_tg_id(cur, payload.tg_id)
-                cur.execute(
-                    """
-                    SELECT id, project_id, title, description, status, execution_hours, sprint_id
-                    FROM tasks
-                    WHERE id = %s
-                    LIMIT 1;
-                    """,
-                    (task_id,),
-                )
+                execute_named(cur, "task_for_update", (task_id,))
                 before = cur.fetchone()
                 if not before:
                     raise HTTPException(status_code=404, detail="Task not found")
@@ -373,23 +642,14 @@ def update_task(task_id: int, payload: TaskUpdateRequest) -> dict:
                 ensure_project_member(cur, project_id, user_id)
                 if payload.sprint_id is not None:
                     cur.execute(
-                        "SELECT 1 FROM sprints WHERE id = %s AND project_id = %s LIMIT 1;",
+                        "SELECT 1 FROM sprints WHERE id = %s AND project_id = %s AND deleted_at IS NULL LIMIT 1;",
                         (payload.sprint_id, project_id),
                     )
                     if not cur.fetchone():
                         raise HTTPException(status_code=404, detail="Sprint not found in this project")
-                cur.execute(
-                    """
-                    UPDATE tasks
-                    SET
-                      title = COALESCE(%s, title),
-                      description = COALESCE(%s, description),
-                      execution_hours = CASE WHEN %s THEN %s ELSE execution_hours END,
-                      status = COALESCE(%s, status),
-                      sprint_id = CASE WHEN %s THEN %s ELSE sprint_id END
-                    WHERE id = %s
-                    RETURNING id, project_id, sprint_id, version, title, description, status, execution_hours, created_at, updated_at;
-                    """,
+                execute_named(
+                    cur,
+                    "task_update",
                     (
                         payload.title.strip() if payload.title is not None else None,
                         payload.description,
@@ -404,6 +664,12 @@ def update_task(task_id: int, payload: TaskUpdateRequest) -> dict:
                 updated = cur.fetchone()
                 if not updated:
                     raise HTTPException(status_code=404, detail="Task not found")
+                if (
+                    before["sprint_id"] != updated["sprint_id"]
+                    or before["status"] != updated["status"]
+                    or before["execution_hours"] != updated["execution_hours"]
+                ):
+                    apply_sprint_rollup_delta(cur, before, updated)
                 changed_fields = [
                     ("title", before["title"], updated["title"], "UPDATE"),
                     ("description", before["description"], updated["description"], "UPDATE"),
@@ -411,12 +677,10 @@ def update_task(task_id: int, payload: TaskUpdateRequest) -> dict:
                     ("sprint_id", before["sprint_id"], updated["sprint_id"], "UPDATE"),
                     ("status", before["status"], updated["status"], "STATUS_CHANGE"),
                 ]
-                changed_any = False
+                audit = TaskAuditBuffer()
                 for field, old_val, new_val, event_type in changed_fields:
                     if old_val != new_val:
-                        changed_any = True
-                        add_task_audit_entry(
-                            cur,
+                        audit.add(
                             task_id=task_id,
                             actor_id=user_id,
                             event_type=event_type,
@@ -424,12 +688,15 @@ def update_task(task_id: int, payload: TaskUpdateRequest) -> dict:
                             old_value=old_val,
                             new_value=new_val,
                         )
+                changed_any = audit.flush(cur) > 0
                 if changed_any:
-                    cur.execute("UPDATE tasks SET version = version + 1 WHERE id = %s RETURNING version;", (task_id,))
+                    execute_named(cur, "task_version_bump", (task_id,))
                     version_row = cur.fetchone()
                     if version_row:
                         updated["version"] = version_row["version"]
             conn.commit()
+            record_user_write(payload.tg_id)
+            invalidate_projects_cache(project_id=project_id)
             return updated
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
@@ -444,16 +711,35 @@ def delete_task(task_id: int, tg_id: int) -> dict:
         with connect(get_database_url()) as conn:
             with conn.cursor(row_factory=dict_row) as cur:
                 ensure_sprint_tables(cur)
+                ensure_sprint_rollup_table(cur)
                 user_id = get_user_id_by_tg_id(cur, tg_id)
-                cur.execute("SELECT project_id FROM tasks WHERE id = %s LIMIT 1;", (task_id,))
+                cur.execute(
+                    """
+                    SELECT project_id, sprint_id, status, execution_hours
+                    FROM tasks
+                    WHERE id = %s AND deleted_at IS NULL
+                    LIMIT 1;
+                    """,
+                    (task_id,),
+                )
                 task_row = cur.fetchone()
                 if not task_row:
                     raise HTTPException(status_code=404, detail="Task not found")
                 ensure_project_member(cur, task_row["project_id"], user_id)
-                cur.execute("DELETE FROM tasks WHERE id = %s RETURNING id;", (task_id,))
+                cur.execute(
+                    "UPDATE tasks SET deleted_at = NOW() WHERE id = %s AND deleted_at IS NULL RETURNING id;",
+                    (task_id,),
+                )
                 deleted = cur.fetchone()
+                if not deleted:
+                    raise HTTPException(status_code=404, detail="Task not found")
+                apply_sprint_rollup_delta(cur, task_row, None)
+                purge_job_id = enqueue_purge(cur, "task", task_id)
             conn.commit()
-            return deleted or {"id": task_id}
+            wake_purger()
+            record_user_write(tg_id)
+            invalidate_projects_cache(project_id=task_row["project_id"])
+            return {"id": deleted["id"], "purge_job_id": purge_job_id}
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
     except HTTPException:
@@ -462,40 +748,46 @@ def delete_task(task_id: int, tg_id: int) -> dict:
         raise HTTPException(status_code=500, detail=f"Database error while deleting task: {exc}")
 
 
+def _fetch_task_history(cur, task_id: int) -> list[dict]:
+    cur.execute(
+        """
+        SELECT
+          l.id,
+          l.task_id,
+          l.event_type,
+          l.field,
+          l.old_value,
+          l.new_value,
+          l.created_at,
+          u.id AS actor_id,
+          u.first_name,
+          u.last_name,
+          u.username
+        FROM task_audit_log l
+        JOIN users u ON u.id = l.actor_id
+        WHERE l.task_id = %s
+        ORDER BY l.created_at DESC, l.id DESC;
+        """,
+        (task_id,),
+    )
+    return cur.fetchall()
+
+
 def list_task_history(task_id: int, tg_id: int) -> list[dict]:
     try:
-        with connect(get_database_url()) as conn:
+        conninfo = get_read_database_url(tg_id)
+        with connect(conninfo) as conn:
             with conn.cursor(row_factory=dict_row) as cur:
-                ensure_sprint_tables(cur)
-                ensure_task_audit_table(cur)
+                if not is_replica_url(conninfo):
+                    ensure_sprint_tables(cur)
+                    ensure_task_audit_table(cur)
                 user_id = get_user_id_by_tg_id(cur, tg_id)
-                cur.execute("SELECT project_id FROM tasks WHERE id = %s LIMIT 1;", (task_id,))
+                cur.execute("SELECT project_id FROM tasks WHERE id = %s AND deleted_at IS NULL LIMIT 1;", (task_id,))
                 task_row = cur.fetchone()
                 if not task_row:
                     raise HTTPException(status_code=404, detail="Task not found")
                 ensure_project_member(cur, task_row["project_id"], user_id)
-                cur.execute(
-                    """
-                    SELECT
-                      l.id,
-                      l.task_id,
-                      l.event_type,
-                      l.field,
-                      l.old_value,
-                      l.new_value,
-                      l.created_at,
-                      u.id AS actor_id,
-                      u.first_name,
-                      u.last_name,
-                      u.username
-                    FROM task_audit_log l
-                    JOIN users u ON u.id = l.actor_id
-                    WHERE l.task_id = %s
-                    ORDER BY l.created_at DESC, l.id DESC;
-                    """,
-                    (task_id,),
-                )
-                return cur.fetchall()
+                return _fetch_task_history(cur, task_id)
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
     except HTTPException:
@@ -504,46 +796,83 @@ def list_task_history(task_id: int, tg_id: int) -> list[dict]:
         raise HTTPException(status_code=500, detail=f"Database error while loading task history: {exc}")
 
 
-def list_task_comments(task_id: int, tg_id: int) -> list[dict]:
+def _fetch_comment_page(
+    cur,
+    task_id: int,
+    limit: int,
+    after_key: tuple | None = None,
+    before_key: tuple | None = None,
+) -> tuple[list[dict], bool]:
+    if after_key is not None:
+        key_filter = "AND c.created_at >= %s AND (c.created_at, c.id) > (%s, %s)"
+        key_params = (after_key[0], after_key[0], after_key[1])
+        order = "ASC"
+    elif before_key is not None:
+        key_filter = "AND c.created_at <= %s AND (c.created_at, c.id) < (%s, %s)"
+        key_params = (before_key[0], before_key[0], before_key[1])
+        order = "DESC"
+    else:
+        key_filter = ""
+        key_params = ()
+        order = "DESC"
+    cur.execute(
+        f"""
+        SELECT
+          c.id,
+          c.task_id,
+          c.text,
+          c.created_at,
+          u.id AS author_id,
+          u.first_name,
+          u.last_name,
+          u.username
+        FROM comments c
+        JOIN users u ON u.id = c.author_id
+        WHERE c.task_id = %s
+          {key_filter}
+        ORDER BY c.created_at {order}, c.id {order}
+        LIMIT %s;
+        """,
+        (task_id, *key_params, limit + 1),
+    )
+    comments = cur.fetchall()
+    has_more = len(comments) > limit
+    comments = comments[:limit]
+    if order == "DESC":
+        comments.reverse()
+    return comments, has_more
+
+
+def list_task_comments(
+    task_id: int,
+    tg_id: int,
+    limit: int = 50,
+    after: str | None = None,
+    before: str | None = None,
+) -> dict:
+    if after and before:
+        raise HTTPException(status_code=400, detail="Use either after or before cursor, not both")
+    if limit < 1 or limit > 200:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and 200")
+    after_key = decode_keyset_cursor(after) if after else None
+    before_key = decode_keyset_cursor(before) if before else None
     try:
         with connect(get_database_url()) as conn:
             with conn.cursor(row_factory=dict_row) as cur:
                 ensure_sprint_tables(cur)
                 ensure_task_comment_reads_table(cur)
                 user_id = get_user_id_by_tg_id(cur, tg_id)
-                cur.execute("SELECT project_id FROM tasks WHERE id = %s LIMIT 1;", (task_id,))
+                cur.execute("SELECT project_id FROM tasks WHERE id = %s AND deleted_at IS NULL LIMIT 1;", (task_id,))
                 task_row = cur.fetchone()
                 if not task_row:
                     raise HTTPException(status_code=404, detail="Task not found")
                 ensure_project_member(cur, task_row["project_id"], user_id)
                 cur.execute(
-                    """
-                    INSERT INTO task_comment_reads (task_id, user_id, last_read_at)
-                    VALUES (%s, %s, NOW())
-                    ON CONFLICT (task_id, user_id)
-                    DO UPDATE SET last_read_at = EXCLUDED.last_read_at;
-                    """,
+                    "SELECT last_read_at FROM task_comment_reads WHERE task_id = %s AND user_id = %s LIMIT 1;",
                     (task_id, user_id),
                 )
-                cur.execute(
-                    """
-                    SELECT
-                      c.id,
-                      c.task_id,
-                      c.text,
-                      c.created_at,
-                      u.id AS author_id,
-                      u.first_name,
-                      u.last_name,
-                      u.username
-                    FROM comments c
-                    JOIN users u ON u.id = c.author_id
-                    WHERE c.task_id = %s
-                    ORDER BY c.created_at ASC, c.id ASC;
-                    """,
-                    (task_id,),
-                )
-                return cur.fetchall()
+                read_row = cur.fetchone()
+                comments, has_more = _fetch_comment_page(cur, task_id, limit, after_key, before_key)
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
     except HTTPException:
@@ -551,6 +880,34 @@ def list_task_comments(task_id: int, tg_id: int) -> list[dict]:
     except PsycopgError as exc:
         raise HTTPException(status_code=500, detail=f"Database error while loading comments: {exc}")
 
+    if after_key is not None:
+        has_more_before = True
+        has_more_after = has_more
+    else:
+        has_more_before = has_more
+        has_more_after = before_key is not None
+
+    last_read_at = read_row["last_read_at"] if read_row else None
+    pending_read_at = get_pending_comment_reads(user_id).get(task_id)
+    if pending_read_at is not None and (last_read_at is None or pending_read_at > last_read_at):
+        last_read_at = pending_read_at
+    for comment in comments:
+        comment["is_unread"] = last_read_at is None or comment["created_at"] > last_read_at
+    if comments:
+        record_comment_read(task_id, user_id, comments[-1]["created_at"])
+
+    return {
+        "comments": comments,
+        "last_read_at": last_read_at,
+        "page": {
+            "limit": limit,
+            "has_more_before": has_more_before,
+            "has_more_after": has_more_after,
+            "before_cursor": encode_keyset_cursor(comments[0]["created_at"], comments[0]["id"]) if comments else before,
+            "after_cursor": encode_keyset_cursor(comments[-1]["created_at"], comments[-1]["id"]) if comments else after,
+        },
+    }
+
 
 def create_task_comment(task_id: int, payload: CommentCreateRequest) -> dict:
     text = payload.text.strip()
@@ -561,21 +918,16 @@ def create_task_comment(task_id: int, payload: CommentCreateRequest) -> dict:
             with conn.cursor(row_factory=dict_row) as cur:
                 ensure_sprint_tables(cur)
                 user_id = get_user_id_by_tg_id(cur, payload.tg_id)
-                cur.execute("SELECT project_id FROM tasks WHERE id = %s LIMIT 1;", (task_id,))
+                execute_named(cur, "task_project_id", (task_id,))
                 task_row = cur.fetchone()
                 if not task_row:
                     raise HTTPException(status_code=404, detail="Task not found")
                 ensure_project_member(cur, task_row["project_id"], user_id)
-                cur.execute(
-                    """
-                    INSERT INTO comments (task_id, author_id, text)
-                    VALUES (%s, %s, %s)
-                    RETURNING id, task_id, text, created_at;
-                    """,
-                    (task_id, user_id, text),
-                )
+                execute_named(cur, "comment_insert", (task_id, user_id, text))
                 comment = cur.fetchone()
             conn.commit()
+            record_user_write(payload.tg_id)
+            invalidate_projects_cache(project_id=task_row["project_id"])
             return comment
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
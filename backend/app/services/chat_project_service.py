@@ -1,12 +1,40 @@
 ﻿import uuid
 
 from fastapi import HTTPException
-from psycopg import connect
 from psycopg.errors import Error as PsycopgError
 from psycopg.rows import dict_row
 
-from app.db import get_database_url
+from app.db import connect, get_database_url
 from app.db_helpers import ensure_projects_chat_columns
+from app.project_service import invalidate_projects_cache
+
+
+def _find_chat_project(cur, tg_chat_id: int | None, chat_instance: str | None) -> dict | None:
+    project = None
+    if tg_chat_id is not None:
+        cur.execute(
+            """
+            SELECT id, project_key, title, tg_chat_id, tg_chat_instance, tg_chat_type
+            FROM projects
+            WHERE tg_chat_id = %s
+            LIMIT 1;
+            """,
+            (tg_chat_id,),
+        )
+        project = cur.fetchone()
+
+    if not project and chat_instance:
+        cur.execute(
+            """
+            SELECT id, project_key, title, tg_chat_id, tg_chat_instance, tg_chat_type
+            FROM projects
+            WHERE tg_chat_instance = %s
+            LIMIT 1;
+            """,
+            (chat_instance,),
+        )
+        project = cur.fetchone()
+    return project
 
 
 def ensure_chat_project(chat_id: int, chat_type: str | None, title: str | None) -> dict:
@@ -16,27 +44,7 @@ def ensure_chat_project(chat_id: int, chat_type: str | None, title: str | None)
         with connect(get_database_url()) as conn:
             with conn.cursor(row_factory=dict_row) as cur:
                 ensure_projects_chat_columns(cur)
-                cur.execute(
-                    """
-                    SELECT id, project_key, title, tg_chat_id, tg_chat_instance, tg_chat_type
-                    FROM projects
-                    WHERE tg_chat_id = %s
-                    LIMIT 1;
-                    """,
-                    (chat_id,),
-                )
-                project = cur.fetchone()
-                if not project:
-                    cur.execute(
-                        """
-                        SELECT id, project_key, title, tg_chat_id, tg_chat_instance, tg_chat_type
-                        FROM projects
-                        WHERE tg_chat_instance = %s
-                        LIMIT 1;
-                        """,
-                        (chat_instance,),
-                    )
-                    project = cur.fetchone()
+                project = _find_chat_project(cur, chat_id, chat_instance)
                 if not project:
                     cur.execute(
                         """
@@ -63,6 +71,7 @@ def ensure_chat_project(chat_id: int, chat_type: str | None, title: str | None)
                     )
                     project = cur.fetchone()
             conn.commit()
+        invalidate_projects_cache(project_id=project["id"])
         return project
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
@@ -85,7 +94,7 @@ def ensure_project_member_by_start_param(start_param: str | None, user_id: int)
                     """
                     SELECT id, project_key, title, tg_chat_id, tg_chat_instance, tg_chat_type
                     FROM projects
-                    WHERE project_key = %s
+                    WHERE project_key = %s AND deleted_at IS NULL
                     LIMIT 1;
                     """,
                     (str(project_key),),
@@ -106,6 +115,7 @@ def ensure_project_member_by_start_param(start_param: str | None, user_id: int)
                 )
                 cur.fetchone()
             conn.commit()
+        invalidate_projects_cache(user_id=user_id)
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
     except PsycopgError as exc:
@@ -145,30 +155,7 @@ def ensure_chat_project_for_user(auth_context: dict, user_id: int) -> dict | Non
             with conn.cursor(row_factory=dict_row) as cur:
                 ensure_projects_chat_columns(cur)
 
-                project = None
-                if tg_chat_id is not None:
-                    cur.execute(
-                        """
-                        SELECT id, project_key, title, tg_chat_id, tg_chat_instance, tg_chat_type
-                        FROM projects
-                        WHERE tg_chat_id = %s
-                        LIMIT 1;
-                        """,
-                        (tg_chat_id,),
-                    )
-                    project = cur.fetchone()
-
-                if not project and chat_instance:
-                    cur.execute(
-                        """
-                        SELECT id, project_key, title, tg_chat_id, tg_chat_instance, tg_chat_type
-                        FROM projects
-                        WHERE tg_chat_instance = %s
-                        LIMIT 1;
-                        """,
-                        (chat_instance,),
-                    )
-                    project = cur.fetchone()
+                project = _find_chat_project(cur, tg_chat_id, chat_instance)
 
                 if project is None:
                     cur.execute(
@@ -209,6 +196,7 @@ def ensure_chat_project_for_user(auth_context: dict, user_id: int) -> dict | Non
                 cur.fetchone()
 
             conn.commit()
+        invalidate_projects_cache(project_id=project["id"], user_id=user_id)
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc))
     except PsycopgError as exc:
@@ -0,0 +1,100 @@
+import logging
+import os
+import threading
+from datetime import datetime
+
+from psycopg.errors import Error as PsycopgError
+
+from app.db import connect, get_database_url
+from app.db_helpers import ensure_task_comment_reads_table
+
+logger = logging.getLogger(__name__)
+
+_pending_reads: dict[tuple[int, int], datetime] = {}
+_pending_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_flusher_stop = threading.Event()
+_flusher_thread: threading.Thread | None = None
+
+
+def get_comment_reads_flush_seconds() -> float:
+    raw_value = os.getenv("COMMENT_READS_FLUSH_SECONDS", "5").strip()
+    try:
+        value = float(raw_value)
+    except ValueError:
+        return 5.0
+    return max(value, 0.5)
+
+
+def record_comment_read(task_id: int, user_id: int, last_read_at: datetime | None) -> None:
+    if last_read_at is None:
+        return
+    key = (task_id, user_id)
+    with _pending_lock:
+        current = _pending_reads.get(key)
+        if current is None or last_read_at > current:
+            _pending_reads[key] = last_read_at
+
+
+def get_pending_comment_reads(user_id: int) -> dict[int, datetime]:
+    with _pending_lock:
+        return {task_id: read_at for (task_id, pending_user_id), read_at in _pending_reads.items() if pending_user_id == user_id}
+
+
+def flush_comment_reads() -> int:
+    with _flush_lock:
+        with _pending_lock:
+            if not _pending_reads:
+                return 0
+            batch = dict(_pending_reads)
+            _pending_reads.clear()
+
+        task_ids = [task_id for task_id, _ in batch]
+        user_ids = [user_id for _, user_id in batch]
+        read_ats = list(batch.values())
+        try:
+            with connect(get_database_url()) as conn:
+                with conn.cursor() as cur:
+                    ensure_task_comment_reads_table(cur)
+                    cur.execute(
+                        """
+                        INSERT INTO task_comment_reads (task_id, user_id, last_read_at)
+                        SELECT r.task_id, r.user_id, r.last_read_at
+                        FROM UNNEST(%s::BIGINT[], %s::BIGINT[], %s::TIMESTAMPTZ[]) AS r(task_id, user_id, last_read_at)
+                        JOIN tasks t ON t.id = r.task_id
+                        ON CONFLICT (task_id, user_id)
+                        DO UPDATE SET last_read_at = GREATEST(task_comment_reads.last_read_at, EXCLUDED.last_read_at);
+                        """,
+                        (task_ids, user_ids, read_ats),
+                    )
+                conn.commit()
+        except (RuntimeError, PsycopgError) as exc:
+            logger.warning("Failed to flush %s comment read receipts: %s", len(batch), exc)
+            for (task_id, user_id), read_at in batch.items():
+                record_comment_read(task_id, user_id, read_at)
+            return 0
+        return len(batch)
+
+
+def _flusher_loop() -> None:
+    interval = get_comment_reads_flush_seconds()
+    while not _flusher_stop.wait(interval):
+        flush_comment_reads()
+
+
+def start_comment_read_flusher() -> None:
+    global _flusher_thread
+    if _flusher_thread is not None and _flusher_thread.is_alive():
+        return
+    _flusher_stop.clear()
+    _flusher_thread = threading.Thread(target=_flusher_loop, name="comment-read-flusher", daemon=True)
+    _flusher_thread.start()
+
+
+def stop_comment_read_flusher() -> None:
+    global _flusher_thread
+    _flusher_stop.set()
+    if _flusher_thread is not None:
+        _flusher_thread.join(timeout=5)
+        _flusher_thread = None
+    flush_comment_reads()
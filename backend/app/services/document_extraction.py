@@ -0,0 +1,107 @@
+import contextvars
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from fastapi import HTTPException
+
+from app.ai_extraction import extract_tasks_via_openrouter, split_text_into_chunks
+from app.config import get_float_env
+from app.metrics import DOCUMENT_CHUNKS
+from app.tracing import set_span_attributes, trace_span, traced
+
+logger = logging.getLogger(__name__)
+
+_TITLE_NOISE_RE = re.compile(r"[^\w\s]+")
+
+
+def get_document_chunk_chars() -> int:
+    return max(int(get_float_env("DOCUMENT_CHUNK_CHARS", 6000)), 500)
+
+
+def get_document_max_chars() -> int:
+    return max(int(get_float_env("DOCUMENT_MAX_CHARS", 200000)), 1)
+
+
+def get_document_max_chunks() -> int:
+    return max(int(get_float_env("DOCUMENT_MAX_CHUNKS", 40)), 1)
+
+
+def get_document_parallelism() -> int:
+    return max(int(get_float_env("DOCUMENT_EXTRACTION_PARALLELISM", 4)), 1)
+
+
+def get_document_max_tasks() -> int:
+    return max(int(get_float_env("DOCUMENT_MAX_TASKS", 60)), 1)
+
+
+def get_document_deadline_seconds() -> float:
+    # Below the bot's 60 s request timeout, so a long document answers before the bot retries.
+    return max(get_float_env("DOCUMENT_EXTRACTION_DEADLINE_SECONDS", 50), 1.0)
+
+
+def _title_key(title: str) -> tuple[str, ...]:
+    # Word set of the title, so "Добавить фильтр по статусу" and "Фильтр по статусу: добавить" collide.
+    return tuple(sorted(set(_TITLE_NOISE_RE.sub(" ", title.lower()).split())))
+
+
+def merge_chunk_tasks(chunk_tasks: list[list[dict]], max_tasks: int) -> list[dict]:
+    # Keeps document order and the first occurrence of a task; a later duplicate only fills in
+    # a missing estimate or a longer description.
+    merged: dict[tuple[str, ...], dict] = {}
+    for tasks in chunk_tasks:
+        for task in tasks:
+            key = _title_key(task["title"])
+            if not key:
+                continue
+            existing = merged.get(key)
+            if existing is None:
+                if len(merged) < max_tasks:
+                    merged[key] = dict(task)
+                continue
+            if existing["execution_hours"] is None:
+                existing["execution_hours"] = task["execution_hours"]
+            if len(task["description"]) > len(existing["description"]):
+                existing["description"] = task["description"]
+    return list(merged.values())
+
+
+@traced("extract_tasks_from_document")
+def extract_tasks_from_document(text: str, project_title: str) -> list[dict]:
+    chunks = split_text_into_chunks(text[: get_document_max_chars()], get_document_chunk_chars())
+    chunks = chunks[: get_document_max_chunks()]
+    DOCUMENT_CHUNKS.observe(len(chunks))
+    set_span_attributes(chunk_count=len(chunks))
+
+    def extract_chunk(index: int, chunk: str) -> list[dict] | HTTPException:
+        with trace_span("extract_document_chunk", chunk_index=index, text_length=len(chunk)):
+            try:
+                return extract_tasks_via_openrouter(chunk, project_title)
+            except HTTPException as exc:
+                return exc
+
+    # Chunks run concurrently, so a long spec takes about as long as its slowest chunk.
+    # Each task gets its own copy of the context to keep spans parented to this request.
+    executor = ThreadPoolExecutor(max_workers=min(get_document_parallelism(), len(chunks) or 1))
+    try:
+        futures = [
+            executor.submit(contextvars.copy_context().run, extract_chunk, index, chunk)
+            for index, chunk in enumerate(chunks)
+        ]
+        done, pending = wait(futures, timeout=get_document_deadline_seconds())
+    finally:
+        # At the deadline queued chunks are dropped and calls in flight finish unobserved,
+        # so the tasks found so far are returned instead of the bot timing out.
+        executor.shutdown(wait=False, cancel_futures=True)
+    results = [future.result() for future in futures if future in done]
+
+    chunk_tasks = [result for result in results if not isinstance(result, HTTPException)]
+    errors = [result for result in results if isinstance(result, HTTPException)]
+    set_span_attributes(failed_chunks=len(errors), timed_out_chunks=len(pending))
+    if pending:
+        logger.warning("Document extraction hit its deadline with %s of %s chunks unfinished", len(pending), len(chunks))
+    if errors and not chunk_tasks:
+        raise errors[0]
+    if pending and not chunk_tasks:
+        raise HTTPException(status_code=504, detail="Document extraction timed out")
+    return merge_chunk_tasks(chunk_tasks, get_document_max_tasks())
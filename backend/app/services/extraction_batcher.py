@@ -0,0 +1,127 @@
+import copy
+import logging
+import threading
+import time
+
+from fastapi import HTTPException
+
+from app.ai_extraction import extract_tasks_batch_via_openrouter, extract_tasks_via_openrouter
+from app.config import get_float_env
+from app.metrics import EXTRACTION_BATCH_MESSAGES
+from app.tracing import trace_span
+
+logger = logging.getLogger(__name__)
+
+
+class _ChatBatch:
+    # Messages of one chat that will share a single extraction request. The first message's
+    # request thread leads: it waits out the window, calls the LLM and publishes per-message results.
+
+    def __init__(self, project_title: str) -> None:
+        self.project_title = project_title
+        self.messages: list[tuple[int, str]] = []
+        self.chars = 0
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results: dict[int, list[dict]] | None = None
+        self.error: Exception | None = None
+
+
+_open_batches: dict[int, _ChatBatch] = {}
+_open_batches_lock = threading.Lock()
+
+
+def get_batch_window_seconds() -> float:
+    return max(get_float_env("EXTRACTION_BATCH_WINDOW_SECONDS", 2), 0.0)
+
+
+def get_batch_grace_seconds() -> float:
+    return max(get_float_env("EXTRACTION_BATCH_GRACE_SECONDS", 0.3), 0.0)
+
+
+def get_batch_max_chars() -> int:
+    return max(int(get_float_env("EXTRACTION_BATCH_MAX_CHARS", 6000)), 1)
+
+
+def get_batch_max_messages() -> int:
+    return max(int(get_float_env("EXTRACTION_BATCH_MAX_MESSAGES", 8)), 1)
+
+
+def _close_batch(chat_id: int, batch: _ChatBatch) -> None:
+    # Caller holds _open_batches_lock.
+    if _open_batches.get(chat_id) is batch:
+        del _open_batches[chat_id]
+    batch.full.set()
+
+
+def _run_batch(batch: _ChatBatch) -> None:
+    EXTRACTION_BATCH_MESSAGES.observe(len(batch.messages))
+    try:
+        with trace_span("extraction_batch", message_count=len(batch.messages), text_length=batch.chars):
+            if len(batch.messages) == 1:
+                message_id, text = batch.messages[0]
+                batch.results = {message_id: extract_tasks_via_openrouter(text, batch.project_title)}
+            else:
+                batch.results = extract_tasks_batch_via_openrouter(batch.messages, batch.project_title)
+    except HTTPException as exc:
+        batch.error = exc
+    except Exception as exc:
+        # Logged once here; every message of the batch then fails with the same cause.
+        logger.exception("Batched task extraction failed for %s message(s)", len(batch.messages))
+        batch.error = exc
+    finally:
+        batch.done.set()
+
+
+def _wait_for_batch(batch: _ChatBatch, window: float) -> None:
+    # The leader keeps the batch open only while messages keep arriving: each grace period that
+    # brings a new message extends the wait, up to the full window. A lone message in a quiet chat
+    # is extracted after one grace period instead of the whole window.
+    deadline = time.monotonic() + window
+    grace = get_batch_grace_seconds() or window
+    seen = 0
+    while True:
+        with _open_batches_lock:
+            count = len(batch.messages)
+        remaining = deadline - time.monotonic()
+        if count == seen or remaining <= 0:
+            return
+        seen = count
+        if batch.full.wait(min(grace, remaining)):
+            return
+
+
+def extract_tasks_for_chat_message(chat_id: int, message_id: int, text: str, project_title: str) -> list[dict]:
+    # Text messages of one chat that arrive within the window (and fit the size budget) are
+    # extracted together, so a burst costs one LLM request and one copy of the system prompt.
+    window = get_batch_window_seconds()
+    if window <= 0 or len(text) >= get_batch_max_chars():
+        return extract_tasks_via_openrouter(text, project_title)
+
+    with _open_batches_lock:
+        batch = _open_batches.get(chat_id)
+        if batch is not None and batch.chars + len(text) > get_batch_max_chars():
+            _close_batch(chat_id, batch)
+            batch = None
+        leader = batch is None
+        if leader:
+            batch = _open_batches[chat_id] = _ChatBatch(project_title)
+        batch.messages.append((message_id, text))
+        batch.chars += len(text)
+        if len(batch.messages) >= get_batch_max_messages():
+            _close_batch(chat_id, batch)
+
+    if leader:
+        _wait_for_batch(batch, window)
+        with _open_batches_lock:
+            _close_batch(chat_id, batch)
+        _run_batch(batch)
+    elif not batch.done.wait(window + 180):
+        raise HTTPException(status_code=504, detail="Timed out waiting for batched task extraction")
+
+    if batch.error is not None:
+        # Every waiter raises its own copy; the exception type (e.g. LlmCircuitOpen) is kept.
+        raise copy.copy(batch.error)
+    if batch.results is None:
+        raise HTTPException(status_code=502, detail="Batched task extraction failed")
+    return batch.results.get(message_id, [])
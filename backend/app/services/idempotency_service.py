@@ -0,0 +1,130 @@
+import hashlib
+import json
+import random
+import time
+from collections.abc import Callable
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from psycopg.errors import Error as PsycopgError
+from psycopg.rows import dict_row
+from psycopg.types.json import Jsonb
+
+from app.config import get_float_env
+from app.db import connect, get_database_url
+from app.db_helpers import ensure_idempotency_table
+
+
+def _request_hash(request_body) -> str:
+    raw = json.dumps(jsonable_encoder(request_body), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _claim_key(scope: str, key: str, request_hash: str) -> dict | None:
+    stale_seconds = get_float_env("IDEMPOTENCY_STALE_SECONDS", 600)
+    retention_hours = get_float_env("IDEMPOTENCY_RETENTION_HOURS", 48)
+    try:
+        with connect(get_database_url()) as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                ensure_idempotency_table(cur)
+                if random.random() < 0.01:
+                    cur.execute(
+                        "DELETE FROM idempotency_keys WHERE created_at < NOW() - make_interval(secs => %s);",
+                        (retention_hours * 3600,),
+                    )
+                cur.execute(
+                    """
+                    INSERT INTO idempotency_keys (scope, idempotency_key, request_hash)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (scope, idempotency_key) DO NOTHING
+                    RETURNING scope;
+                    """,
+                    (scope, key, request_hash),
+                )
+                if cur.fetchone():
+                    conn.commit()
+                    return None
+                cur.execute(
+                    """
+                    UPDATE idempotency_keys
+                    SET request_hash = %s, updated_at = NOW()
+                    WHERE scope = %s
+                      AND idempotency_key = %s
+                      AND status = 'IN_PROGRESS'
+                      AND updated_at < NOW() - make_interval(secs => %s)
+                    RETURNING scope;
+                    """,
+                    (request_hash, scope, key, stale_seconds),
+                )
+                if cur.fetchone():
+                    conn.commit()
+                    return None
+                cur.execute(
+                    """
+                    SELECT request_hash, status, response
+                    FROM idempotency_keys
+                    WHERE scope = %s AND idempotency_key = %s
+                    LIMIT 1;
+                    """,
+                    (scope, key),
+                )
+                existing = cur.fetchone()
+            conn.commit()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except PsycopgError as exc:
+        raise HTTPException(status_code=500, detail=f"Database error while checking idempotency key: {exc}")
+    return existing or {"request_hash": request_hash, "status": "IN_PROGRESS", "response": None}
+
+
+def _finish_key(scope: str, key: str, response: dict | None) -> None:
+    try:
+        with connect(get_database_url()) as conn:
+            with conn.cursor() as cur:
+                if response is None:
+                    cur.execute(
+                        "DELETE FROM idempotency_keys WHERE scope = %s AND idempotency_key = %s AND status = 'IN_PROGRESS';",
+                        (scope, key),
+                    )
+                else:
+                    cur.execute(
+                        """
+                        UPDATE idempotency_keys
+                        SET status = 'DONE', response = %s, updated_at = NOW()
+                        WHERE scope = %s AND idempotency_key = %s;
+                        """,
+                        (Jsonb(response), scope, key),
+                    )
+            conn.commit()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except PsycopgError as exc:
+        raise HTTPException(status_code=500, detail=f"Database error while storing idempotent response: {exc}")
+
+
+def run_idempotent(scope: str, key: str | None, request_body, handler: Callable[[], dict]) -> dict:
+    if not key:
+        return handler()
+    key = key.strip()[:200]
+    request_hash = _request_hash(request_body)
+    wait_deadline = time.monotonic() + get_float_env("IDEMPOTENCY_WAIT_SECONDS", 30)
+
+    while True:
+        existing = _claim_key(scope, key, request_hash)
+        if existing is None:
+            break
+        if existing["request_hash"] != request_hash:
+            raise HTTPException(status_code=422, detail="Idempotency key was already used with a different request")
+        if existing["status"] == "DONE":
+            return existing["response"]
+        if time.monotonic() >= wait_deadline:
+            raise HTTPException(status_code=409, detail="Request with this idempotency key is still in progress")
+        time.sleep(0.5)
+
+    try:
+        response = jsonable_encoder(handler())
+    except BaseException:
+        _finish_key(scope, key, None)
+        raise
+    _finish_key(scope, key, response)
+    return response
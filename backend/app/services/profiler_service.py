@@ -0,0 +1,222 @@
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from fastapi import HTTPException
+
+MAX_PROFILE_SECONDS = 120.0
+_session_lock = threading.Lock()
+_active_session: "_SamplingSession | None" = None
+_last_request_session: "_SamplingSession | None" = None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename.replace("\\", "/")
+    for marker in ("/site-packages/", "/app/", "/lib/python"):
+        if marker in filename:
+            filename = filename.rsplit(marker, 1)[1]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class _SamplingSession:
+    def __init__(
+        self,
+        seconds: float,
+        interval: float,
+        endpoint_codes: dict | None = None,
+        fraction: float = 1.0,
+    ) -> None:
+        self.seconds = seconds
+        self.interval = interval
+        self.endpoint_codes = endpoint_codes
+        self.fraction = fraction
+        self.stacks: Counter = Counter()
+        self._stacks_lock = threading.Lock()
+        self.sample_count = 0
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+        self.profiled_requests = 0
+        self.skipped_requests = 0
+        self._request_decisions: dict[int, bool] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def wait(self) -> None:
+        self._thread.join()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def _select_request(self, endpoint_frame) -> bool:
+        decision = self._request_decisions.get(id(endpoint_frame))
+        if decision is None:
+            decision = random.random() < self.fraction
+            self._request_decisions[id(endpoint_frame)] = decision
+            if decision:
+                self.profiled_requests += 1
+            else:
+                self.skipped_requests += 1
+        return decision
+
+    def snapshot_stacks(self) -> Counter:
+        # The sampler keeps adding stacks while a running session is rendered.
+        with self._stacks_lock:
+            return self.stacks.copy()
+
+    def _sample(self) -> None:
+        own_thread_id = threading.get_ident()
+        live_frames: set[int] = set()
+        stacks: list[str] = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread_id:
+                continue
+            labels = []
+            route = None
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                if self.endpoint_codes is not None and frame.f_code in self.endpoint_codes:
+                    route = self.endpoint_codes[frame.f_code]
+                    live_frames.add(id(frame))
+                    if not self._select_request(frame):
+                        route = None
+                        break
+                frame = frame.f_back
+            if self.endpoint_codes is not None:
+                if route is None:
+                    continue
+                labels.append(route)
+            labels.reverse()
+            stacks.append(";".join(labels))
+        with self._stacks_lock:
+            self.stacks.update(stacks)
+            self.sample_count += len(stacks)
+        if self.endpoint_codes is not None and len(self._request_decisions) > 4096:
+            self._request_decisions = {
+                frame_id: decision for frame_id, decision in self._request_decisions.items() if frame_id in live_frames
+            }
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.seconds
+        try:
+            while not self._stop.is_set() and time.monotonic() < deadline:
+                self._sample()
+                self._stop.wait(self.interval)
+        finally:
+            self.finished_at = time.time()
+
+    def summary(self) -> dict:
+        return {
+            "running": self.running,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "seconds": self.seconds,
+            "interval_ms": round(self.interval * 1000, 3),
+            "sample_count": self.sample_count,
+            "profiled_requests": self.profiled_requests,
+            "skipped_requests": self.skipped_requests,
+        }
+
+
+def _validate_window(seconds: float, interval_ms: float) -> tuple[float, float]:
+    if seconds <= 0 or seconds > MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"Seconds must be between 0 and {MAX_PROFILE_SECONDS:g}")
+    if interval_ms < 1 or interval_ms > 1000:
+        raise HTTPException(status_code=400, detail="Interval must be between 1 and 1000 ms")
+    return seconds, interval_ms / 1000
+
+
+def _start_session(session: _SamplingSession) -> None:
+    global _active_session
+    with _session_lock:
+        if _active_session is not None and _active_session.running:
+            raise HTTPException(status_code=409, detail="A profiling session is already running")
+        _active_session = session
+        session.start()
+
+
+def run_sampling_profile(seconds: float, interval_ms: float = 5) -> _SamplingSession:
+    seconds, interval = _validate_window(seconds, interval_ms)
+    session = _SamplingSession(seconds, interval)
+    _start_session(session)
+    session.wait()
+    return session
+
+
+def start_request_profile(
+    endpoint_codes: dict,
+    fraction: float,
+    seconds: float,
+    interval_ms: float = 5,
+) -> _SamplingSession:
+    global _last_request_session
+    seconds, interval = _validate_window(seconds, interval_ms)
+    if not endpoint_codes:
+        raise HTTPException(status_code=400, detail="No matching routes to profile")
+    if fraction <= 0 or fraction > 1:
+        raise HTTPException(status_code=400, detail="Fraction must be in (0, 1]")
+    session = _SamplingSession(seconds, interval, endpoint_codes=endpoint_codes, fraction=fraction)
+    _start_session(session)
+    _last_request_session = session
+    return session
+
+
+def get_request_profile() -> _SamplingSession:
+    if _last_request_session is None:
+        raise HTTPException(status_code=404, detail="No request profile has been started")
+    return _last_request_session
+
+
+def stop_profiling() -> None:
+    with _session_lock:
+        if _active_session is not None:
+            _active_session.stop()
+
+
+def render_collapsed(session: _SamplingSession) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in session.snapshot_stacks().most_common())
+
+
+def render_speedscope(session: _SamplingSession, name: str) -> dict:
+    frame_index: dict[str, int] = {}
+    frames: list[dict] = []
+    samples: list[list[int]] = []
+    weights: list[int] = []
+    for stack, count in session.snapshot_stacks().most_common():
+        indexes = []
+        for label in stack.split(";"):
+            if label not in frame_index:
+                frame_index[label] = len(frames)
+                frames.append({"name": label})
+            indexes.append(frame_index[label])
+        samples.append(indexes)
+        weights.append(count)
+    total = sum(weights)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "none",
+                "startValue": 0,
+                "endValue": total,
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+        "name": name,
+        "exporter": "vkr-backend sampling profiler",
+    }
@@ -0,0 +1,299 @@
+import logging
+import threading
+
+from fastapi import HTTPException
+from psycopg.errors import Error as PsycopgError
+from psycopg.rows import dict_row
+
+from app.config import get_float_env
+from app.db import connect, get_database_url
+from app.db_helpers import (
+    ensure_archive_tables,
+    ensure_purge_jobs_table,
+    ensure_sprint_rollup_table,
+    ensure_sprint_tables,
+    ensure_task_audit_table,
+    ensure_task_comment_reads_table,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_PURGE_ATTEMPTS = 5
+STALE_JOB_SECONDS = 300
+
+# Child rows are removed stage by stage, one bounded batch per transaction. Each selector
+# returns ctids of the next rows to remove; the final statement drops the soft-deleted entity
+# itself once only small cascades (members, summaries, attachments of a single row) are left.
+_TASK_STAGES = [
+    ("comments", "DELETE FROM comments", "SELECT ctid FROM comments WHERE task_id = %(id)s"),
+    ("task_audit_log", "DELETE FROM task_audit_log", "SELECT ctid FROM task_audit_log WHERE task_id = %(id)s"),
+    (
+        "task_comment_reads",
+        "DELETE FROM task_comment_reads",
+        "SELECT ctid FROM task_comment_reads WHERE task_id = %(id)s",
+    ),
+]
+
+_SPRINT_STAGES = [
+    (
+        "tasks.sprint_id",
+        "UPDATE tasks SET sprint_id = NULL",
+        """
+        SELECT ctid
+        FROM tasks
+        WHERE project_id = (SELECT project_id FROM sprints WHERE id = %(id)s)
+          AND sprint_id = %(id)s
+        """,
+    ),
+    (
+        "sprint_daily_rollups",
+        "DELETE FROM sprint_daily_rollups",
+        "SELECT ctid FROM sprint_daily_rollups WHERE sprint_id = %(id)s",
+    ),
+]
+
+_PROJECT_STAGES = [
+    (
+        "comments",
+        "DELETE FROM comments",
+        "SELECT c.ctid FROM comments c JOIN tasks t ON t.id = c.task_id WHERE t.project_id = %(id)s",
+    ),
+    (
+        "task_audit_log",
+        "DELETE FROM task_audit_log",
+        "SELECT l.ctid FROM task_audit_log l JOIN tasks t ON t.id = l.task_id WHERE t.project_id = %(id)s",
+    ),
+    (
+        "task_comment_reads",
+        "DELETE FROM task_comment_reads",
+        "SELECT r.ctid FROM task_comment_reads r JOIN tasks t ON t.id = r.task_id WHERE t.project_id = %(id)s",
+    ),
+    ("tasks", "DELETE FROM tasks", "SELECT ctid FROM tasks WHERE project_id = %(id)s"),
+    (
+        "comments_archive",
+        "DELETE FROM comments_archive",
+        "SELECT c.ctid FROM comments_archive c JOIN tasks_archive t ON t.id = c.task_id WHERE t.project_id = %(id)s",
+    ),
+    (
+        "task_audit_log_archive",
+        "DELETE FROM task_audit_log_archive",
+        "SELECT l.ctid FROM task_audit_log_archive l JOIN tasks_archive t ON t.id = l.task_id WHERE t.project_id = %(id)s",
+    ),
+    ("tasks_archive", "DELETE FROM tasks_archive", "SELECT ctid FROM tasks_archive WHERE project_id = %(id)s"),
+    (
+        "sprint_daily_rollups",
+        "DELETE FROM sprint_daily_rollups",
+        "SELECT r.ctid FROM sprint_daily_rollups r JOIN sprints s ON s.id = r.sprint_id WHERE s.project_id = %(id)s",
+    ),
+    ("sprints", "DELETE FROM sprints", "SELECT ctid FROM sprints WHERE project_id = %(id)s"),
+]
+
+_PURGE_PLANS = {
+    "task": (_TASK_STAGES, "DELETE FROM tasks WHERE id = %(id)s AND deleted_at IS NOT NULL;"),
+    "sprint": (_SPRINT_STAGES, "DELETE FROM sprints WHERE id = %(id)s AND deleted_at IS NOT NULL;"),
+    "project": (_PROJECT_STAGES, "DELETE FROM projects WHERE id = %(id)s AND deleted_at IS NOT NULL;"),
+}
+
+_purger_stop = threading.Event()
+_purger_wake = threading.Event()
+_purger_thread: threading.Thread | None = None
+_purge_tables_ready = False
+
+
+def get_purge_batch_size() -> int:
+    return max(int(get_float_env("PURGE_BATCH_SIZE", 1000)), 1)
+
+
+def get_purge_batch_pause_seconds() -> float:
+    return max(get_float_env("PURGE_BATCH_PAUSE_SECONDS", 0.05), 0.0)
+
+
+def get_purge_interval_seconds() -> float:
+    return get_float_env("PURGE_INTERVAL_SECONDS", 30)
+
+
+def enqueue_purge(cur, entity_type: str, entity_id: int) -> int:
+    ensure_purge_jobs_table(cur)
+    cur.execute(
+        "INSERT INTO purge_jobs (entity_type, entity_id) VALUES (%s, %s) RETURNING id;",
+        (entity_type, entity_id),
+    )
+    row = cur.fetchone()
+    return row["id"] if isinstance(row, dict) else row[0]
+
+
+def wake_purger() -> None:
+    # Called after the enqueueing transaction commits, so the worker sees the new job.
+    _purger_wake.set()
+
+
+def _ensure_purge_tables_ready(cur) -> None:
+    global _purge_tables_ready
+    if _purge_tables_ready:
+        return
+    ensure_sprint_tables(cur)
+    ensure_sprint_rollup_table(cur)
+    ensure_task_comment_reads_table(cur)
+    ensure_task_audit_table(cur)
+    ensure_archive_tables(cur)
+    ensure_purge_jobs_table(cur)
+    _purge_tables_ready = True
+
+
+def _claim_job(cur) -> dict | None:
+    cur.execute(
+        """
+        UPDATE purge_jobs
+        SET status = 'RUNNING', attempts = attempts + 1, updated_at = NOW()
+        WHERE id = (
+          SELECT id
+          FROM purge_jobs
+          WHERE status = 'PENDING'
+             OR (status = 'RUNNING' AND updated_at < NOW() - make_interval(secs => %s))
+          ORDER BY id
+          LIMIT 1
+          FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, entity_type, entity_id, attempts;
+        """,
+        (STALE_JOB_SECONDS,),
+    )
+    return cur.fetchone()
+
+
+def _run_job(conn, cur, job: dict, batch_size: int) -> int:
+    stages, final_statement = _PURGE_PLANS[job["entity_type"]]
+    params = {"id": job["entity_id"], "limit": batch_size}
+    removed_total = 0
+    for stage, statement, selector in stages:
+        while not _purger_stop.is_set():
+            cur.execute(f"{statement} WHERE ctid = ANY(ARRAY({selector} LIMIT %(limit)s));", params)
+            removed = cur.rowcount
+            cur.execute(
+                """
+                UPDATE purge_jobs
+                SET stage = %s, deleted_rows = deleted_rows + %s, updated_at = NOW()
+                WHERE id = %s;
+                """,
+                (stage, removed, job["id"]),
+            )
+            conn.commit()
+            removed_total += removed
+            if removed < batch_size:
+                break
+            _purger_stop.wait(get_purge_batch_pause_seconds())
+    if _purger_stop.is_set():
+        # Leave the job RUNNING; it is picked up again once the claim goes stale.
+        return removed_total
+    cur.execute(final_statement, params)
+    removed = cur.rowcount
+    cur.execute(
+        """
+        UPDATE purge_jobs
+        SET
+          status = 'DONE',
+          stage = NULL,
+          deleted_rows = deleted_rows + %s,
+          updated_at = NOW(),
+          finished_at = NOW()
+        WHERE id = %s;
+        """,
+        (removed, job["id"]),
+    )
+    conn.commit()
+    return removed_total + removed
+
+
+def run_pending_purges(max_jobs: int = 100) -> dict:
+    batch_size = get_purge_batch_size()
+    finished_jobs = 0
+    removed_rows = 0
+    try:
+        with connect(get_database_url()) as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                _ensure_purge_tables_ready(cur)
+                conn.commit()
+                for _ in range(max_jobs):
+                    if _purger_stop.is_set():
+                        break
+                    job = _claim_job(cur)
+                    conn.commit()
+                    if not job:
+                        break
+                    try:
+                        removed_rows += _run_job(conn, cur, job, batch_size)
+                        if not _purger_stop.is_set():
+                            finished_jobs += 1
+                    except PsycopgError as exc:
+                        conn.rollback()
+                        status = "FAILED" if job["attempts"] >= MAX_PURGE_ATTEMPTS else "PENDING"
+                        cur.execute(
+                            "UPDATE purge_jobs SET status = %s, last_error = %s, updated_at = NOW() WHERE id = %s;",
+                            (status, str(exc), job["id"]),
+                        )
+                        conn.commit()
+                        logger.warning("Purge job %s for %s %s failed: %s", job["id"], job["entity_type"], job["entity_id"], exc)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except PsycopgError as exc:
+        raise HTTPException(status_code=500, detail=f"Database error while purging deleted rows: {exc}")
+    return {"processed_jobs": finished_jobs, "deleted_rows": removed_rows}
+
+
+def list_purge_jobs(limit: int = 50) -> list[dict]:
+    if limit < 1 or limit > 200:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and 200")
+    try:
+        with connect(get_database_url()) as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                ensure_purge_jobs_table(cur)
+                cur.execute(
+                    """
+                    SELECT
+                      id, entity_type, entity_id, status, stage, deleted_rows, attempts, last_error,
+                      created_at, updated_at, finished_at
+                    FROM purge_jobs
+                    ORDER BY id DESC
+                    LIMIT %s;
+                    """,
+                    (limit,),
+                )
+                jobs = cur.fetchall()
+            conn.commit()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except PsycopgError as exc:
+        raise HTTPException(status_code=500, detail=f"Database error while loading purge jobs: {exc}")
+    return jobs
+
+
+def _purge_loop() -> None:
+    while not _purger_stop.is_set():
+        _purger_wake.wait(get_purge_interval_seconds())
+        _purger_wake.clear()
+        if _purger_stop.is_set():
+            break
+        try:
+            result = run_pending_purges()
+            if result["processed_jobs"]:
+                logger.info("Purged %s rows for %s deleted entities", result["deleted_rows"], result["processed_jobs"])
+        except HTTPException as exc:
+            logger.warning("Failed to purge deleted rows: %s", exc.detail)
+
+
+def start_purger() -> None:
+    global _purger_thread
+    if get_purge_interval_seconds() <= 0:
+        return
+    if _purger_thread is not None and _purger_thread.is_alive():
+        return
+    _purger_stop.clear()
+    _purger_thread = threading.Thread(target=_purge_loop, name="deleted-rows-purger", daemon=True)
+    _purger_thread.start()
+
+
+def stop_purger() -> None:
+    _purger_stop.set()
+    _purger_wake.set()
+    if _purger_thread is not None:
+        _purger_thread.join(timeout=10)
@@ -0,0 +1,133 @@
+import re
+
+from fastapi import HTTPException
+from psycopg.errors import Error as PsycopgError
+from psycopg.rows import dict_row
+
+from app.db import connect, get_database_url
+from app.db_helpers import check_search_columns, ensure_sprint_tables
+from app.project_service import ensure_project_member, get_user_id_by_tg_id
+
+_search_trgm_enabled: bool | None = None
+
+
+def _build_prefix_tsquery(query: str) -> str:
+    tokens = re.findall(r"\w+", query.lower())[:8]
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+def _get_search_trgm_enabled(cur) -> bool:
+    # Schema readiness is checked once per process; a missing column raises and is checked again next time.
+    global _search_trgm_enabled
+    if _search_trgm_enabled is None:
+        ensure_sprint_tables(cur)
+        _search_trgm_enabled = check_search_columns(cur)
+    return _search_trgm_enabled
+
+
+def search_project(project_id: int, tg_id: int, query: str, limit: int = 20, offset: int = 0) -> dict:
+    normalized_query = (query or "").strip()[:200]
+    prefix_query = _build_prefix_tsquery(normalized_query)
+    if not prefix_query:
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and 100")
+    if offset < 0 or offset > 1000:
+        raise HTTPException(status_code=400, detail="Offset must be between 0 and 1000")
+
+    try:
+        with connect(get_database_url()) as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                trgm_enabled = _get_search_trgm_enabled(cur)
+                user_id = get_user_id_by_tg_id(cur, tg_id)
+                ensure_project_member(cur, project_id, user_id)
+                if trgm_enabled:
+                    task_match = "(t.search_vector @@ q.query OR %(raw)s <%% t.title)"
+                    task_rank = "GREATEST(ts_rank_cd(t.search_vector, q.query), word_similarity(%(raw)s, t.title))"
+                else:
+                    task_match = "t.search_vector @@ q.query"
+                    task_rank = "ts_rank_cd(t.search_vector, q.query)"
+                cur.execute(
+                    f"""
+                    WITH q AS (
+                      SELECT to_tsquery('russian', %(prefix)s) || to_tsquery('english', %(prefix)s) AS query
+                    ),
+                    hits AS (
+                      SELECT
+                        'task' AS kind,
+                        t.id AS task_id,
+                        NULL::BIGINT AS comment_id,
+                        {task_rank} AS rank,
+                        t.updated_at AS sort_at
+                      FROM tasks t
+                      CROSS JOIN q
+                      WHERE t.project_id = %(project_id)s
+                        AND t.deleted_at IS NULL
+                        AND {task_match}
+                      UNION ALL
+                      SELECT
+                        'comment' AS kind,
+                        c.task_id,
+                        c.id AS comment_id,
+                        ts_rank_cd(c.search_vector, q.query) AS rank,
+                        c.created_at AS sort_at
+                      FROM comments c
+                      JOIN tasks t ON t.id = c.task_id
+                      CROSS JOIN q
+                      WHERE t.project_id = %(project_id)s
+                        AND t.deleted_at IS NULL
+                        AND c.search_vector @@ q.query
+                    ),
+                    page AS (
+                      SELECT *
+                      FROM hits
+                      ORDER BY rank DESC, sort_at DESC, task_id DESC, comment_id DESC NULLS FIRST
+                      LIMIT %(limit)s OFFSET %(offset)s
+                    )
+                    SELECT
+                      page.kind,
+                      page.task_id,
+                      page.comment_id,
+                      page.rank::FLOAT AS rank,
+                      t.title,
+                      t.status,
+                      t.sprint_id,
+                      c.created_at AS comment_created_at,
+                      -- Plain-text markers: the snippet is raw task text and must never be treated as HTML.
+                      ts_headline(
+                        'russian',
+                        COALESCE(c.text, NULLIF(t.description, ''), t.title),
+                        q.query,
+                        'MaxFragments=1, MaxWords=24, MinWords=6, StartSel=«, StopSel=»'
+                      ) AS snippet
+                    FROM page
+                    JOIN tasks t ON t.id = page.task_id
+                    LEFT JOIN comments c ON c.id = page.comment_id
+                    CROSS JOIN q
+                    ORDER BY page.rank DESC, page.sort_at DESC, page.task_id DESC, page.comment_id DESC NULLS FIRST;
+                    """,
+                    {
+                        "prefix": prefix_query,
+                        "raw": normalized_query,
+                        "project_id": project_id,
+                        "limit": limit + 1,
+                        "offset": offset,
+                    },
+                )
+                results = cur.fetchall()
+            conn.commit()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except HTTPException:
+        raise
+    except PsycopgError as exc:
+        raise HTTPException(status_code=500, detail=f"Database error while searching project: {exc}")
+
+    return {
+        "results": results[:limit],
+        "page": {
+            "limit": limit,
+            "offset": offset,
+            "has_more": len(results) > limit,
+        },
+    }
@@ -0,0 +1,93 @@
+import os
+
+# Hot statements executed on almost every request. They are kept as fixed texts with only
+# value parameters, so a pooled connection prepares each one once and reuses the plan.
+STATEMENTS = {
+    "user_id_by_tg_id": "SELECT id FROM users WHERE tg_id = %s LIMIT 1;",
+    "project_membership": """
+        SELECT 1
+        FROM project_members pm
+        JOIN projects p ON p.id = pm.project_id
+        WHERE pm.project_id = %s AND pm.user_id = %s AND pm.is_active = TRUE AND p.deleted_at IS NULL
+        LIMIT 1;
+    """,
+    "task_project_id": "SELECT project_id FROM tasks WHERE id = %s AND deleted_at IS NULL LIMIT 1;",
+    "project_tasks": """
+        SELECT
+          t.id,
+          t.project_id,
+          s.id AS sprint_id,
+          t.version,
+          t.title,
+          t.description,
+          t.status,
+          t.execution_hours,
+          COALESCE(cs.comment_count, 0) AS comment_count,
+          cs.last_comment_at,
+          COALESCE(cs.unread_comment_count, 0) AS unread_comment_count,
+          t.created_at,
+          t.updated_at
+        FROM tasks t
+        LEFT JOIN LATERAL (
+          SELECT
+            COUNT(*)::INT AS comment_count,
+            MAX(c.created_at) AS last_comment_at,
+            COUNT(*) FILTER (
+              WHERE c.created_at > GREATEST(
+                COALESCE(tcr.last_read_at, TO_TIMESTAMP(0)),
+                COALESCE(pr.last_read_at, TO_TIMESTAMP(0))
+              )
+            )::INT AS unread_comment_count
+          FROM comments c
+          LEFT JOIN task_comment_reads tcr
+            ON tcr.task_id = t.id
+           AND tcr.user_id = %s
+          LEFT JOIN UNNEST(%s::BIGINT[], %s::TIMESTAMPTZ[]) AS pr(task_id, last_read_at)
+            ON pr.task_id = t.id
+          WHERE c.task_id = t.id
+        ) cs ON TRUE
+        LEFT JOIN sprints s ON s.id = t.sprint_id AND s.deleted_at IS NULL
+        WHERE t.project_id = %s AND t.deleted_at IS NULL
+        ORDER BY t.updated_at DESC, t.id DESC;
+    """,
+    "task_for_update": """
+        SELECT id, project_id, title, description, status, execution_hours, sprint_id
+        FROM tasks
+        WHERE id = %s AND deleted_at IS NULL
+        LIMIT 1;
+    """,
+    "task_update": """
+        UPDATE tasks
+        SET
+          title = COALESCE(%s, title),
+          description = COALESCE(%s, description),
+          execution_hours = CASE WHEN %s THEN %s ELSE execution_hours END,
+          status = COALESCE(%s, status),
+          sprint_id = CASE WHEN %s THEN %s ELSE sprint_id END
+        WHERE id = %s
+        RETURNING id, project_id, sprint_id, version, title, description, status, execution_hours, created_at, updated_at;
+    """,
+    "task_version_bump": "UPDATE tasks SET version = version + 1 WHERE id = %s RETURNING version;",
+    "comment_insert": """
+        INSERT INTO comments (task_id, author_id, text)
+        VALUES (%s, %s, %s)
+        RETURNING id, task_id, text, created_at;
+    """,
+    # JSON null maps to SQL NULL here, matching the old per-row inserts for missing values.
+    "task_audit_insert_batch": """
+        INSERT INTO task_audit_log (task_id, actor_id, event_type, field, old_value, new_value)
+        SELECT r.task_id, r.actor_id, r.event_type::audit_event_type, r.field, r.old_value, r.new_value
+        FROM jsonb_to_recordset(%s::jsonb) AS r(
+          task_id BIGINT, actor_id BIGINT, event_type TEXT, field TEXT, old_value JSONB, new_value JSONB
+        );
+    """,
+}
+
+
+def prepared_statements_enabled() -> bool:
+    # Server-side prepared statements do not survive transaction-mode poolers such as PgBouncer < 1.21.
+    return os.getenv("DB_PREPARED_STATEMENTS", "1").strip().lower() not in ("0", "false", "no")
+
+
+def execute_named(cur, name: str, params=None):
+    return cur.execute(STATEMENTS[name], params, prepare=prepared_statements_enabled())
@@ -0,0 +1,133 @@
+import re
+from collections import Counter
+
+PAGE_BREAK = "\f"
+EDGE_LINES = 2
+MIN_REPEATED_PAGES = 3
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_INLINE_SPACE_RE = re.compile(r"[ \t\u00a0\u2000-\u200b]+")
+_HYPHEN_BREAK_RE = re.compile(r"(?<=\w)-\n(?=(\w+))")
+_WORD_END_RE = re.compile(r"\w+$")
+# Halves of real hyphenated words ("кто-то", "кое-что"); a break next to them keeps the hyphen.
+_HYPHEN_PARTICLES = frozenset(("то", "либо", "нибудь", "ка", "таки", "кое", "кой"))
+_DIGITS_RE = re.compile(r"\d+")
+_PAGE_NUMBER_RE = re.compile(
+    r"^(?:[-–—]\s*)?(?:page|p\.|стр\.?|страница|лист)?\s*\d{1,4}(?:\s*(?:/|of|из)\s*\d{1,4})?(?:\s*[-–—])?$",
+    re.IGNORECASE,
+)
+_DECORATION_RE = re.compile(r"^[\W_]{3,}$")
+# Whole-line legal footers only; a line that merely starts with "Confidential" may still be a task.
+_BOILERPLATE_RE = re.compile(
+    r"(?:©|(?:\(c\)|copyright)\s*(?:©\s*)?\d{4}).{0,100}"
+    r"|(?:strictly\s+|строго\s+)?(?:confidential|private and confidential|strictly private|конфиденциально|"
+    r"для служебного пользования)[.!]?",
+    re.IGNORECASE,
+)
+_RIGHTS_RESERVED_RE = re.compile(r"(?:^|[.,]\s*)(?:all rights reserved|все права защищены)\.?$", re.IGNORECASE)
+# Pure disfluencies and set phrases Whisper transcribes verbatim; words that can carry meaning
+# ("как бы", "типа", "так") are deliberately left alone.
+_FILLER_RE = re.compile(
+    r"(?<!\w)(?:э+м*|м{2,}|хм+|ам+|uh+|um+|erm|ну вот|это самое|так сказать|короче говоря|в общем-то)(?!\w)[,.]?\s*",
+    re.IGNORECASE,
+)
+# A word said three or more times in a row, or a repeated single letter ("я я", "в в"), is a stutter;
+# a doubled word ("очень очень", "no no") or number ("12 12") is left as spoken.
+_STUTTER_RE = re.compile(
+    r"(?<!\w)([^\W\d_]+)(?:[,\s]+\1(?!\w)){2,}|(?<!\w)([^\W\d_])(?:[,\s]+\2(?!\w))+",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # Words and punctuation marks; close enough to LLM token counts to compare before and after.
+    return len(_TOKEN_RE.findall(text or ""))
+
+
+def _line_key(line: str) -> str:
+    # Page numbers inside headers ("Spec v2 — page 3") must not make every copy unique.
+    return _DIGITS_RE.sub("#", line.lower())
+
+
+def _edge_lines(lines: list[str]) -> list[tuple[int, tuple[int, str]]]:
+    # (line index, (position from the top or, negative, from the bottom, normalized line))
+    content = [index for index, line in enumerate(lines) if line]
+    edges = [(index, (position, _line_key(lines[index]))) for position, index in enumerate(content[:EDGE_LINES])]
+    edges += [
+        (index, (-position, _line_key(lines[index])))
+        for position, index in enumerate(reversed(content[-EDGE_LINES:]), start=1)
+    ]
+    return edges
+
+
+def _repeated_edge_lines(pages: list[list[str]]) -> set[tuple[int, str]]:
+    # A running header or footer sits at the same place on most pages; matching on position
+    # keeps repeated phrases in the body of the text.
+    if len(pages) < MIN_REPEATED_PAGES:
+        return set()
+    counts: Counter[tuple[int, str]] = Counter()
+    for lines in pages:
+        counts.update({edge for _, edge in _edge_lines(lines)})
+    min_pages = max(MIN_REPEATED_PAGES, len(pages) // 2)
+    return {edge for edge, count in counts.items() if count >= min_pages}
+
+
+def _join_hyphen_break(match: re.Match) -> str:
+    # A line-end hyphen is usually a word split for layout ("бэк-\nэнд"), but a capitalized or
+    # numeric continuation ("Wi-\nFi", "COVID-\n19") or a particle ("кто-\nто") is a real compound.
+    head_match = _WORD_END_RE.search(match.string, max(0, match.start() - 40), match.start())
+    head, tail = head_match.group() if head_match else "", match.group(1)
+    if (
+        tail[0].isupper()
+        or tail[0].isdigit()
+        or head.lower() in _HYPHEN_PARTICLES
+        or tail.lower() in _HYPHEN_PARTICLES
+    ):
+        return "-"
+    return ""
+
+
+def _collapse_stutter(match: re.Match) -> str:
+    return match.group(1) or match.group(2)
+
+
+def _is_rights_footer_tail(tail: str) -> bool:
+    # Cheap test on the last characters before the full footer pattern runs.
+    return "rights reserved" in tail or "права защищены" in tail
+
+
+def _is_boilerplate(line: str) -> bool:
+    return bool(
+        _PAGE_NUMBER_RE.match(line)
+        or _DECORATION_RE.match(line)
+        or _BOILERPLATE_RE.fullmatch(line)
+        or (_is_rights_footer_tail(line[-21:].lower()) and len(line) <= 120 and _RIGHTS_RESERVED_RE.search(line))
+    )
+
+
+def compact_text(text: str, transcript: bool = False) -> str:
+    # Pages are separated by form feeds (the bot joins PDF pages with them). Lines that repeat at
+    # the top or bottom of many pages are running headers and footers and are dropped, together
+    # with page numbers, decoration and legal boilerplate. Whitespace runs and hyphenated line
+    # breaks are collapsed, and for transcripts filler words and stutters are removed.
+    # Blank lines are kept (collapsed to one) because the document chunker splits on paragraphs.
+    pages = [
+        [_INLINE_SPACE_RE.sub(" ", line).strip() for line in page.splitlines()]
+        for page in _HYPHEN_BREAK_RE.sub(_join_hyphen_break, text or "").split(PAGE_BREAK)
+    ]
+    repeated = _repeated_edge_lines(pages)
+
+    kept: list[str] = []
+    for lines in pages:
+        running = {index for index, edge in _edge_lines(lines) if edge in repeated}
+        for index, line in enumerate(lines + [""]):
+            if line and (index in running or _is_boilerplate(line)):
+                continue
+            if line and transcript:
+                line = _STUTTER_RE.sub(_collapse_stutter, _FILLER_RE.sub("", line)).strip()
+                if not line:
+                    continue
+            if (kept[-1] if kept else "") == line:
+                continue
+            kept.append(line)
+    return "\n".join(kept).strip()
@@ -0,0 +1,135 @@
+import functools
+import inspect
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: str | None
+    start_time: float
+    attributes: dict = field(default_factory=dict)
+    status: str = "ok"
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+_service_name = "vkr-backend"
+
+
+def configure_tracing(service_name: str) -> None:
+    global _service_name
+    _service_name = service_name
+
+
+def get_trace_export_path() -> str:
+    return os.getenv("TRACE_EXPORT_PATH", "").strip()
+
+
+def _export_span(span: Span, duration_ms: float) -> None:
+    export_path = get_trace_export_path()
+    if not export_path:
+        return
+    record = {
+        "service": _service_name,
+        "trace_id": span.trace_id,
+        "span_id": span.span_id,
+        "parent_span_id": span.parent_span_id,
+        "name": span.name,
+        "start_time": round(span.start_time, 6),
+        "duration_ms": round(duration_ms, 3),
+        "status": span.status,
+        "attributes": span.attributes,
+    }
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _export_lock:
+        with open(export_path, "a", encoding="utf-8") as export_file:
+            export_file.write(line + "\n")
+
+
+def parse_traceparent(header_value: str | None) -> tuple[str, str] | None:
+    match = _TRACEPARENT_RE.match((header_value or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2)
+
+
+def inject_trace_headers(headers: dict) -> dict:
+    span = _current_span.get()
+    if span is not None:
+        headers["traceparent"] = f"00-{span.trace_id}-{span.span_id}-01"
+    return headers
+
+
+def set_span_attributes(**attributes) -> None:
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+@contextmanager
+def trace_span(name: str, traceparent: str | None = None, **attributes):
+    if not get_trace_export_path():
+        yield None
+        return
+    parent = _current_span.get()
+    remote_parent = parse_traceparent(traceparent) if parent is None else None
+    if parent is not None:
+        trace_id, parent_span_id = parent.trace_id, parent.span_id
+    elif remote_parent is not None:
+        trace_id, parent_span_id = remote_parent
+    else:
+        trace_id, parent_span_id = secrets.token_hex(16), None
+    span = Span(
+        name=name,
+        trace_id=trace_id,
+        span_id=secrets.token_hex(8),
+        parent_span_id=parent_span_id,
+        start_time=time.time(),
+        attributes=attributes,
+    )
+    token = _current_span.set(span)
+    started = time.perf_counter()
+    try:
+        yield span
+    except BaseException as exc:
+        span.status = "error"
+        span.attributes["error"] = f"{type(exc).__name__}: {exc}"[:300]
+        raise
+    finally:
+        _current_span.reset(token)
+        _export_span(span, (time.perf_counter() - started) * 1000)
+
+
+def traced(name: str | None = None):
+    def decorator(func):
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with trace_span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace_span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -12,6 +12,9 @@ from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message, W
 from docx import Document
 from pypdf import PdfReader
 
+from app.relevance import is_relevant_message
+from app.tracing import configure_tracing, inject_trace_headers, set_span_attributes, traced
+
 
 def build_web_app_keyboard(web_app_url: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
@@ -59,10 +62,12 @@ def ensure_chat_project_via_backend(
         url=url,
         data=json.dumps(payload).encode("utf-8"),
         method="POST",
-        headers={
-            "Content-Type": "application/json",
-            "X-Bot-Token": bot_internal_token,
-        },
+        headers=inject_trace_headers(
+            {
+                "Content-Type": "application/json",
+                "X-Bot-Token": bot_internal_token,
+            }
+        ),
     )
     try:
         with urlopen(req, timeout=15) as response:
@@ -78,35 +83,51 @@ def ensure_chat_project_via_backend(
         raise RuntimeError(f"Backend is unreachable: {exc}") from exc
 
 
+@traced("bot.backend_request")
 def ingest_message_via_backend(
     backend_base_url: str,
     bot_internal_token: str,
     payload: dict,
+    attempts: int = 2,
 ) -> dict:
     url = f"{backend_base_url.rstrip('/')}/bot/ingest-message"
-    req = Request(
-        url=url,
-        data=json.dumps(payload).encode("utf-8"),
-        method="POST",
-        headers={
+    headers = inject_trace_headers(
+        {
             "Content-Type": "application/json",
             "X-Bot-Token": bot_internal_token,
-        },
+        }
     )
-    try:
-        with urlopen(req, timeout=60) as response:
-            raw = response.read().decode("utf-8")
-            parsed = json.loads(raw)
-            if not parsed.get("ok"):
-                raise RuntimeError(f"Unexpected backend response: {raw}")
-            return parsed
-    except HTTPError as exc:
-        body = exc.read().decode("utf-8", errors="replace")
-        raise RuntimeError(f"Backend {exc.code}: {body}") from exc
-    except URLError as exc:
-        raise RuntimeError(f"Backend is unreachable: {exc}") from exc
-
-
+    if payload.get("message_id") is not None:
+        # Lets the backend replay the stored result instead of re-extracting tasks on retry.
+        headers["Idempotency-Key"] = f"{payload['chat_id']}:{payload['message_id']}"
+    for attempt in range(1, attempts + 1):
+        req = Request(
+            url=url,
+            data=json.dumps(payload).encode("utf-8"),
+            method="POST",
+            headers=headers,
+        )
+        try:
+            with urlopen(req, timeout=60) as response:
+                raw = response.read().decode("utf-8")
+                parsed = json.loads(raw)
+                if not parsed.get("ok"):
+                    raise RuntimeError(f"Unexpected backend response: {raw}")
+                return parsed
+        except HTTPError as exc:
+            if exc.code == 429:
+                retry_after = exc.headers.get("Retry-After") or "60"
+                raise RuntimeError(f"слишком много сообщений, попробуйте через {retry_after} с") from exc
+            body = exc.read().decode("utf-8", errors="replace")
+            raise RuntimeError(f"Backend {exc.code}: {body}") from exc
+        except (URLError, TimeoutError) as exc:
+            if attempt < attempts and "Idempotency-Key" in headers:
+                continue
+            raise RuntimeError(f"Backend is unreachable: {exc}") from exc
+    raise RuntimeError("Backend is unreachable")
+
+
+@traced("bot.extract_pdf_text")
 def extract_text_from_pdf_bytes(content: bytes) -> str:
     try:
         reader = PdfReader(io.BytesIO(content))
@@ -115,11 +136,13 @@ def extract_text_from_pdf_bytes(content: bytes) -> str:
             page_text = page.extract_text() or ""
             if page_text.strip():
                 chunks.append(page_text)
-        return "\n".join(chunks).strip()
+        # Form feeds mark page boundaries so the backend can spot running headers and footers.
+        return "\f".join(chunks).strip()
     except Exception:  # noqa: BLE001
         return ""
 
 
+@traced("bot.extract_docx_text")
 def extract_text_from_docx_bytes(content: bytes) -> str:
     try:
         doc = Document(io.BytesIO(content))
@@ -129,6 +152,7 @@ def extract_text_from_docx_bytes(content: bytes) -> str:
         return ""
 
 
+@traced("bot.download_file")
 async def download_telegram_file_bytes(bot: Bot, file_id: str) -> bytes:
     file_info = await bot.get_file(file_id)
     stream = io.BytesIO()
@@ -151,6 +175,7 @@ def get_whisper_model():
     return _whisper_model
 
 
+@traced("bot.transcribe")
 def transcribe_media_bytes(content: bytes, suffix: str) -> str:
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
         temp_file.write(content)
@@ -179,6 +204,9 @@ def should_attempt_task_extraction(text: str) -> bool:
     lowered = (text or "").strip().lower()
     if not lowered:
         return False
+    relevant = is_relevant_message(lowered)
+    if relevant is not None:
+        return relevant
     action_markers = [
         "сделай",
         "сделать",
@@ -223,6 +251,7 @@ async def main() -> None:
     mini_app_short_name = get_required_env("MINI_APP_SHORT_NAME")
     backend_internal_url = get_required_env("BACKEND_INTERNAL_URL")
     bot_internal_token = get_required_env("BOT_INTERNAL_TOKEN")
+    configure_tracing("vkr-bot")
 
     bot = Bot(token=token)
     dp = Dispatcher()
@@ -264,6 +293,7 @@ async def main() -> None:
         )
 
     @dp.message()
+    @traced("bot.ingest_message")
     async def ingest_tasks_from_message(message: Message) -> None:
         if not message.from_user or message.from_user.is_bot:
             return
@@ -347,6 +377,7 @@ async def main() -> None:
             )
             return
 
+        set_span_attributes(chat_id=int(message.chat.id), source_type=source_type, text_length=len(text))
         # For regular text/caption/image we only react to clearly actionable requests.
         has_file_or_media = bool(message.document or message.voice or message.audio or message.video)
         if not has_file_or_media and not should_attempt_task_extraction(text):
@@ -354,6 +385,7 @@ async def main() -> None:
 
         payload = {
             "chat_id": int(message.chat.id),
+            "message_id": int(message.message_id),
             "chat_type": str(message.chat.type),
             "title": message.chat.title or "Личный проект",
             "user_tg_id": int(message.from_user.id),
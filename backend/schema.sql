@@ -1,6 +1,7 @@
 ﻿-- PostgreSQL schema for Telegram Mini App task tracker (MVP)
 
 CREATE EXTENSION IF NOT EXISTS pgcrypto;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 CREATE TYPE project_role AS ENUM ('OWNER', 'EXECUTOR', 'MEMBER', 'VIEWER');
 CREATE TYPE task_status AS ENUM ('NEW', 'IN_PROGRESS', 'DONE');
@@ -33,7 +34,8 @@ CREATE TABLE projects (
   tg_chat_type TEXT,
   project_key UUID NOT NULL UNIQUE DEFAULT gen_random_uuid(),
   title TEXT NOT NULL,
-  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  deleted_at TIMESTAMPTZ
 );
 
 CREATE UNIQUE INDEX ux_projects_tg_chat_id_not_null
@@ -66,6 +68,7 @@ CREATE TABLE tasks (
   deadline_at TIMESTAMPTZ,
   created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  deleted_at TIMESTAMPTZ,
   CONSTRAINT fk_tasks_author_member
     FOREIGN KEY (project_id, author_id)
     REFERENCES project_members(project_id, user_id)
@@ -83,7 +86,8 @@ CREATE TABLE sprints (
   start_date DATE,
   end_date DATE,
   is_open BOOLEAN NOT NULL DEFAULT TRUE,
-  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  deleted_at TIMESTAMPTZ
 );
 
 ALTER TABLE tasks
@@ -131,6 +135,32 @@ CREATE TABLE task_audit_log (
   created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+CREATE TABLE sprint_daily_rollups (
+  sprint_id BIGINT NOT NULL REFERENCES sprints(id) ON DELETE CASCADE,
+  day DATE NOT NULL,
+  new_count INTEGER NOT NULL DEFAULT 0,
+  in_progress_count INTEGER NOT NULL DEFAULT 0,
+  done_count INTEGER NOT NULL DEFAULT 0,
+  new_hours INTEGER NOT NULL DEFAULT 0,
+  in_progress_hours INTEGER NOT NULL DEFAULT 0,
+  done_hours INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (sprint_id, day)
+);
+
+CREATE TABLE idempotency_keys (
+  scope TEXT NOT NULL,
+  idempotency_key TEXT NOT NULL,
+  request_hash TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'IN_PROGRESS',
+  response JSONB,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (scope, idempotency_key)
+);
+
+CREATE INDEX idx_idempotency_keys_created
+  ON idempotency_keys(created_at);
+
 CREATE INDEX idx_project_members_user_id
   ON project_members(user_id)
   WHERE is_active = TRUE;
@@ -170,6 +200,28 @@ CREATE INDEX idx_attachments_comment_created
 CREATE INDEX idx_task_audit_task_created
   ON task_audit_log(task_id, created_at DESC);
 
+ALTER TABLE tasks ADD COLUMN search_vector TSVECTOR
+  GENERATED ALWAYS AS (
+    setweight(to_tsvector('russian'::regconfig, COALESCE(title, '')), 'A')
+    || setweight(to_tsvector('english'::regconfig, COALESCE(title, '')), 'A')
+    || setweight(to_tsvector('russian'::regconfig, COALESCE(description, '')), 'B')
+    || setweight(to_tsvector('english'::regconfig, COALESCE(description, '')), 'B')
+  ) STORED;
+
+ALTER TABLE comments ADD COLUMN search_vector TSVECTOR
+  GENERATED ALWAYS AS (
+    to_tsvector('russian'::regconfig, text) || to_tsvector('english'::regconfig, text)
+  ) STORED;
+
+CREATE INDEX idx_tasks_search_vector
+  ON tasks USING GIN (search_vector);
+
+CREATE INDEX idx_comments_search_vector
+  ON comments USING GIN (search_vector);
+
+CREATE INDEX idx_tasks_title_trgm
+  ON tasks USING GIN (title gin_trgm_ops);
+
 CREATE OR REPLACE FUNCTION set_updated_at()
 RETURNS TRIGGER
 LANGUAGE plpgsql
@@ -184,3 +236,189 @@ CREATE TRIGGER trg_tasks_set_updated_at
 BEFORE UPDATE ON tasks
 FOR EACH ROW
 EXECUTE FUNCTION set_updated_at();
+
+CREATE TABLE project_summaries (
+  project_id BIGINT PRIMARY KEY REFERENCES projects(id) ON DELETE CASCADE,
+  new_task_count INTEGER NOT NULL DEFAULT 0,
+  in_progress_task_count INTEGER NOT NULL DEFAULT 0,
+  done_task_count INTEGER NOT NULL DEFAULT 0,
+  open_sprint_count INTEGER NOT NULL DEFAULT 0,
+  last_activity_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION project_summary_on_project_insert()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  INSERT INTO project_summaries (project_id, last_activity_at)
+  VALUES (NEW.id, NEW.created_at)
+  ON CONFLICT (project_id) DO NOTHING;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION project_summary_on_task_change()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'UPDATE' AND OLD.project_id = NEW.project_id AND OLD.status = NEW.status
+    AND (OLD.deleted_at IS NULL) = (NEW.deleted_at IS NULL) THEN
+    UPDATE project_summaries
+    SET last_activity_at = GREATEST(last_activity_at, NOW())
+    WHERE project_id = NEW.project_id;
+    RETURN NULL;
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.deleted_at IS NULL THEN
+    UPDATE project_summaries
+    SET
+      new_task_count = new_task_count - (OLD.status::TEXT = 'NEW')::INT,
+      in_progress_task_count = in_progress_task_count - (OLD.status::TEXT = 'IN_PROGRESS')::INT,
+      done_task_count = done_task_count - (OLD.status::TEXT = 'DONE')::INT,
+      last_activity_at = GREATEST(last_activity_at, NOW())
+    WHERE project_id = OLD.project_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.deleted_at IS NULL THEN
+    UPDATE project_summaries
+    SET
+      new_task_count = new_task_count + (NEW.status::TEXT = 'NEW')::INT,
+      in_progress_task_count = in_progress_task_count + (NEW.status::TEXT = 'IN_PROGRESS')::INT,
+      done_task_count = done_task_count + (NEW.status::TEXT = 'DONE')::INT,
+      last_activity_at = GREATEST(last_activity_at, NOW())
+    WHERE project_id = NEW.project_id;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION project_summary_on_sprint_change()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.is_open AND OLD.deleted_at IS NULL THEN
+    UPDATE project_summaries
+    SET open_sprint_count = open_sprint_count - 1
+    WHERE project_id = OLD.project_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.is_open AND NEW.deleted_at IS NULL THEN
+    UPDATE project_summaries
+    SET open_sprint_count = open_sprint_count + 1
+    WHERE project_id = NEW.project_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE project_summaries
+    SET last_activity_at = GREATEST(last_activity_at, NOW())
+    WHERE project_id = NEW.project_id;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION project_summary_on_comment_insert()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  UPDATE project_summaries ps
+  SET last_activity_at = GREATEST(ps.last_activity_at, NEW.created_at)
+  FROM tasks t
+  WHERE t.id = NEW.task_id
+    AND ps.project_id = t.project_id;
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER trg_projects_summary
+AFTER INSERT ON projects
+FOR EACH ROW
+EXECUTE FUNCTION project_summary_on_project_insert();
+
+CREATE TRIGGER trg_tasks_summary
+AFTER INSERT OR DELETE OR UPDATE ON tasks
+FOR EACH ROW
+EXECUTE FUNCTION project_summary_on_task_change();
+
+CREATE TRIGGER trg_sprints_summary
+AFTER INSERT OR DELETE OR UPDATE OF is_open, project_id, deleted_at ON sprints
+FOR EACH ROW
+EXECUTE FUNCTION project_summary_on_sprint_change();
+
+CREATE TRIGGER trg_comments_summary
+AFTER INSERT ON comments
+FOR EACH ROW
+EXECUTE FUNCTION project_summary_on_comment_insert();
+
+CREATE TABLE tasks_archive (
+  id BIGINT PRIMARY KEY,
+  project_id BIGINT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+  sprint_id BIGINT,
+  title VARCHAR(120) NOT NULL,
+  description TEXT NOT NULL DEFAULT '',
+  status task_status NOT NULL,
+  execution_hours INTEGER,
+  author_id BIGINT NOT NULL,
+  assignee_id BIGINT NOT NULL,
+  deadline_at TIMESTAMPTZ,
+  version INTEGER NOT NULL DEFAULT 1,
+  created_at TIMESTAMPTZ NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL,
+  archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE comments_archive (
+  id BIGINT PRIMARY KEY,
+  task_id BIGINT NOT NULL REFERENCES tasks_archive(id) ON DELETE CASCADE,
+  author_id BIGINT NOT NULL,
+  text TEXT NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE TABLE task_audit_log_archive (
+  id BIGINT PRIMARY KEY,
+  task_id BIGINT NOT NULL REFERENCES tasks_archive(id) ON DELETE CASCADE,
+  actor_id BIGINT NOT NULL,
+  event_type audit_event_type NOT NULL,
+  field TEXT,
+  old_value JSONB,
+  new_value JSONB,
+  created_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX idx_tasks_archive_project_archived
+  ON tasks_archive(project_id, archived_at DESC, id DESC);
+
+CREATE INDEX idx_comments_archive_task_created
+  ON comments_archive(task_id, created_at);
+
+CREATE INDEX idx_task_audit_archive_task_created
+  ON task_audit_log_archive(task_id, created_at DESC);
+
+CREATE INDEX idx_tasks_done_updated
+  ON tasks(updated_at)
+  WHERE status = 'DONE';
+
+CREATE TABLE purge_jobs (
+  id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  entity_type TEXT NOT NULL CHECK (entity_type IN ('project', 'sprint', 'task')),
+  entity_id BIGINT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'PENDING',
+  stage TEXT,
+  deleted_rows BIGINT NOT NULL DEFAULT 0,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  last_error TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX idx_purge_jobs_open
+  ON purge_jobs(id)
+  WHERE status IN ('PENDING', 'RUNNING');
+
+CREATE UNLOGGED TABLE rate_limit_buckets (
+  bucket_key TEXT PRIMARY KEY,
+  tokens DOUBLE PRECISION NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL
+);
@@ -0,0 +1,220 @@
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.ai_extraction import (
+    _extract_json_object,
+    _normalize_ai_tasks,
+    _split_text_to_clauses,
+    extract_tasks_by_rules,
+    filter_extracted_tasks,
+)
+from app.relevance import load_relevance_model, relevance_score
+from app.text_compaction import compact_text
+from bot.main import should_attempt_task_extraction
+
+DEFAULT_BASELINE_PATH = Path(__file__).resolve().with_name("extraction_bench_baseline.json")
+
+# Messages shaped like the ones the bot sees in project chats: task requests, bug reports,
+# off-topic chatter and mixed-language notes.
+MESSAGES_RU = (
+    "Нужно исправить кнопку оплаты на странице checkout, она перекрывает меню на мобильных",
+    "Надо добавить фильтр по статусу в таблицу задач, а затем обновить API для поиска",
+    "Шапка сайта съезжает на планшете. Поправь верстку, пожалуйста",
+    "Кто-нибудь купит кофе и молоко по дороге в офис?",
+    "Форма авторизации не открывается в Safari, ошибка в консоли",
+    "Создай модальное окно подтверждения удаления карточки товара; потом протестируй на мобилке",
+    "Спасибо всем, созвон переносим на завтра",
+    "Необходимо настроить деплой backend и обновить endpoint для пополнения баланса",
+)
+MESSAGES_EN = (
+    "Please fix the login modal, it does not open on iOS",
+    "We need to add search to the dashboard and refactor the API client",
+    "The checkout button overlaps the footer menu on small screens",
+    "Lunch at 1pm? I'll grab pizza for everyone",
+    "Update the landing page colors to match the new design mockup",
+    "Backend endpoint for filters returns 500 when the status is empty",
+)
+DOCUMENT_SIZES = (("doc_1k", 1_024), ("doc_16k", 16_384), ("doc_128k", 131_072))
+LLM_ITEMS = [
+    {
+        "title": f"Исправить баг #{index} в форме оплаты",
+        "description": "Кнопка перекрывает меню, нужно поправить верстку",
+        "execution_hours": ("2", 3.5, None, "около 4 часов")[index % 4],
+        "status": ("new", "IN_PROGRESS", "done", "blocked")[index % 4],
+    }
+    for index in range(20)
+]
+LLM_JSON = json.dumps({"tasks": LLM_ITEMS}, ensure_ascii=False)
+LLM_FENCED = f"Вот результат:\n```json\n{LLM_JSON}\n```\nЕсли нужно, уточню."
+
+
+def _build_document(size: int) -> str:
+    lines = []
+    length = 0
+    index = 0
+    messages = MESSAGES_RU + MESSAGES_EN
+    while length < size:
+        line = f"{index + 1}. {messages[index % len(messages)]}"
+        lines.append(line)
+        length += len(line) + 1
+        index += 1
+    return "\n".join(lines)[:size]
+
+
+def build_cases() -> dict:
+    texts = {"msg_ru": MESSAGES_RU[0], "msg_en": MESSAGES_EN[1]}
+    texts.update({name: _build_document(size) for name, size in DOCUMENT_SIZES})
+    rule_tasks = extract_tasks_by_rules(texts["doc_1k"]) or [{"title": "Исправить кнопку", "description": ""}]
+    candidate_tasks = (rule_tasks * 15)[:15]
+
+    cases = {}
+    for name, text in texts.items():
+        cases[f"split_text_to_clauses[{name}]"] = (_split_text_to_clauses, (text,))
+        cases[f"extract_tasks_by_rules[{name}]"] = (extract_tasks_by_rules, (text,))
+    for name, text in (("msg_ru", texts["msg_ru"]), ("doc_16k", texts["doc_16k"])):
+        cases[f"filter_extracted_tasks[{name}]"] = (filter_extracted_tasks, (candidate_tasks, text, "Интернет-магазин"))
+    cases["normalize_ai_tasks[20_items]"] = (_normalize_ai_tasks, (LLM_ITEMS,))
+    cases["extract_json_object[plain]"] = (_extract_json_object, (LLM_JSON,))
+    cases["extract_json_object[fenced]"] = (_extract_json_object, (LLM_FENCED,))
+    cases["should_attempt_task_extraction[msg_ru]"] = (should_attempt_task_extraction, (MESSAGES_RU[3],))
+    cases["should_attempt_task_extraction[msg_en]"] = (should_attempt_task_extraction, (MESSAGES_EN[3],))
+    cases["should_attempt_task_extraction[doc_16k]"] = (should_attempt_task_extraction, (texts["doc_16k"],))
+    cases["compact_text[doc_16k]"] = (compact_text, (texts["doc_16k"],))
+    cases["compact_text[doc_128k]"] = (compact_text, (texts["doc_128k"],))
+    load_relevance_model()
+    cases["relevance_score[msg_ru]"] = (relevance_score, (texts["msg_ru"],))
+    cases["relevance_score[msg_en]"] = (relevance_score, (texts["msg_en"],))
+    cases["relevance_score[doc_16k]"] = (relevance_score, (texts["doc_16k"],))
+    return cases
+
+
+def _time_calls(func, args: tuple, number: int) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        func(*args)
+    return time.perf_counter() - started
+
+
+def measure(func, args: tuple, min_time: float, repeat: int) -> dict:
+    number = 1
+    while True:
+        elapsed = _time_calls(func, args, number)
+        if elapsed >= min_time / 5 or number >= 1_000_000:
+            break
+        number *= 4
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        best = min(_time_calls(func, args, number) for _ in range(repeat))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        func(*args)
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "ops_per_sec": round(number / best, 1) if best else 0.0,
+        "usec_per_op": round(best / number * 1_000_000, 3),
+        "alloc_peak_bytes": max(0, peak - before),
+    }
+
+
+def run_suite(min_time: float, repeat: int, pattern: str) -> dict:
+    results = {}
+    for name, (func, args) in build_cases().items():
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(func, args, min_time, repeat)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def print_results(report: dict, baseline: dict | None = None, threshold: float = 0.0) -> int:
+    baseline_results = (baseline or {}).get("results", {})
+    header = f"{'case':44} {'ops/sec':>12} {'usec/op':>11} {'peak B':>9}"
+    if baseline is not None:
+        header += f" {'vs base':>9}  status"
+    print(header)
+    print("-" * len(header))
+
+    regressions = 0
+    for name, stats in report["results"].items():
+        line = f"{name:44} {stats['ops_per_sec']:>12} {stats['usec_per_op']:>11} {stats['alloc_peak_bytes']:>9}"
+        if baseline is not None:
+            base = baseline_results.get(name)
+            if base is None:
+                line += f" {'-':>9}  new"
+            else:
+                speed_ratio = stats["ops_per_sec"] / base["ops_per_sec"] if base["ops_per_sec"] else 1.0
+                problems = []
+                if speed_ratio < 1 - threshold:
+                    problems.append("slower")
+                if stats["alloc_peak_bytes"] > base["alloc_peak_bytes"] * (1 + threshold) + 1024:
+                    problems.append("more memory")
+                regressions += bool(problems)
+                line += f" {speed_ratio:>8.2f}x  {', '.join(problems) or 'ok'}"
+        print(line)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmarks for the chat message extraction pipeline (rules, filters, LLM output parsing)."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command in ("run", "compare"):
+        subparser = subparsers.add_parser(command)
+        subparser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timing repeat")
+        subparser.add_argument("--repeat", type=int, default=5)
+        subparser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+        subparser.add_argument("--baseline", default=str(DEFAULT_BASELINE_PATH))
+    subparsers.choices["run"].add_argument("--save", action="store_true", help="Overwrite the baseline file")
+    subparsers.choices["compare"].add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown or memory growth that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    report = run_suite(args.min_time, args.repeat, args.filter)
+    baseline_path = Path(args.baseline)
+    if args.command == "run":
+        print_results(report)
+        if args.save:
+            baseline_path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+            print(f"Baseline written: {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"Baseline not found: {baseline_path}. Record one with `run --save`.")
+        return 1
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    print(f"Baseline: Python {baseline.get('python')} on {baseline.get('machine')}")
+    regressions = print_results(report, baseline, args.threshold)
+    if regressions:
+        print(f"{regressions} case(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
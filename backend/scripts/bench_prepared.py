@@ -0,0 +1,115 @@
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from psycopg import connect
+from psycopg.errors import Error as PsycopgError
+from psycopg.rows import dict_row
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.db import get_database_url
+from app.sql_catalog import STATEMENTS
+
+
+def _pick_parameters(cur) -> dict:
+    cur.execute(
+        """
+        SELECT t.project_id, MIN(t.id) AS task_id, COUNT(*) AS task_count
+        FROM tasks t
+        GROUP BY t.project_id
+        ORDER BY task_count DESC
+        LIMIT 1;
+        """
+    )
+    project_row = cur.fetchone()
+    if not project_row:
+        raise RuntimeError("Database has no tasks. Run scripts/seed_load_data.py first.")
+    cur.execute(
+        "SELECT user_id FROM project_members WHERE project_id = %s AND is_active = TRUE LIMIT 1;",
+        (project_row["project_id"],),
+    )
+    member_row = cur.fetchone()
+    if not member_row:
+        raise RuntimeError(f"Project {project_row['project_id']} has no active members")
+    return {
+        "project_id": project_row["project_id"],
+        "task_id": project_row["task_id"],
+        "task_count": project_row["task_count"],
+        "user_id": member_row["user_id"],
+    }
+
+
+def _workloads(params: dict) -> dict:
+    # Statement sequences issued by the service functions, minus the schema helpers.
+    return {
+        "list_project_tasks": [
+            ("user_id_by_tg_id", None),
+            ("project_membership", (params["project_id"], params["user_id"])),
+            ("project_tasks", (params["user_id"], [], [], params["project_id"])),
+        ],
+        "update_task": [
+            ("user_id_by_tg_id", None),
+            ("task_for_update", (params["task_id"],)),
+            ("project_membership", (params["project_id"], params["user_id"])),
+            ("task_update", ("Benchmark title", None, False, None, None, False, None, params["task_id"])),
+            ("task_version_bump", (params["task_id"],)),
+        ],
+    }
+
+
+def _run_workload(cur, steps: list, prepare: bool, iterations: int, tg_id: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        for name, step_params in steps:
+            cur.execute(STATEMENTS[name], step_params if step_params is not None else (tg_id,), prepare=prepare)
+            cur.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare catalog statements executed as plain queries vs server-side prepared statements."
+    )
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        with connect(get_database_url(), prepare_threshold=None) as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                params = _pick_parameters(cur)
+                cur.execute("SELECT tg_id FROM users WHERE id = %s;", (params["user_id"],))
+                tg_id = cur.fetchone()["tg_id"]
+                print(f"Project {params['project_id']} with {params['task_count']} tasks, {args.iterations} iterations")
+                header = f"{'workload':20} {'mode':10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}"
+                print(header)
+                print("-" * len(header))
+                for workload, steps in _workloads(params).items():
+                    means = {}
+                    for mode, prepare in (("plain", False), ("prepared", True)):
+                        _run_workload(cur, steps, prepare, args.warmup, tg_id)
+                        timings = sorted(_run_workload(cur, steps, prepare, args.iterations, tg_id))
+                        means[mode] = statistics.fmean(timings)
+                        print(
+                            f"{workload:20} {mode:10} {means[mode]:>9.3f} {timings[len(timings) // 2]:>9.3f} "
+                            f"{timings[int(len(timings) * 0.95) - 1]:>9.3f}"
+                        )
+                    saving = (1 - means["prepared"] / means["plain"]) * 100 if means["plain"] else 0.0
+                    print(f"{workload:20} {'saving':10} {saving:>8.1f}%")
+            # update_task steps modify the benchmark task; keep the database unchanged.
+            conn.rollback()
+    except RuntimeError as exc:
+        print(str(exc))
+        return 1
+    except PsycopgError as exc:
+        print(f"Database error: {exc}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,106 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.db import assert_max_queries, track_queries
+from app.main import app
+
+DEFAULT_BUDGETS_PATH = Path(__file__).resolve().with_name("query_count_budgets.json")
+
+
+def build_requests(manifest: dict) -> dict:
+    project = max(manifest["projects"], key=lambda item: len(item["task_ids"]))
+    tg_id = project["member_tg_ids"][0]
+    task_id = project["task_ids"][0]
+    requests = {
+        "GET /projects": ("GET", f"/projects?tg_id={tg_id}", None),
+        "GET /projects/{id}/board": ("GET", f"/projects/{project['id']}/board?tg_id={tg_id}", None),
+        "GET /projects/{id}/tasks": ("GET", f"/projects/{project['id']}/tasks?tg_id={tg_id}", None),
+        "GET /projects/{id}/sprints": ("GET", f"/projects/{project['id']}/sprints?tg_id={tg_id}", None),
+        "GET /projects/{id}/search": ("GET", f"/projects/{project['id']}/search?tg_id={tg_id}&q=fix", None),
+        "GET /tasks/{id}/comments": ("GET", f"/tasks/{task_id}/comments?tg_id={tg_id}", None),
+        "GET /tasks/{id}/history": ("GET", f"/tasks/{task_id}/history?tg_id={tg_id}", None),
+        "PATCH /tasks/{id}": ("PATCH", f"/tasks/{task_id}", {"tg_id": tg_id, "status": "IN_PROGRESS"}),
+        "POST /tasks/{id}/comments": ("POST", f"/tasks/{task_id}/comments", {"tg_id": tg_id, "text": "Query budget check"}),
+    }
+    if project["sprint_ids"]:
+        requests["GET /sprints/{id}/burndown"] = ("GET", f"/sprints/{project['sprint_ids'][0]}/burndown?tg_id={tg_id}", None)
+    return requests
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Call the main endpoints in-process against a seeded database and fail when one issues more SQL "
+            "statements than its recorded budget."
+        )
+    )
+    parser.add_argument(
+        "--manifest",
+        default=str(Path(__file__).resolve().parents[1] / "load_manifest.json"),
+        help="Manifest written by scripts/seed_load_data.py",
+    )
+    parser.add_argument("--budgets", default=str(DEFAULT_BUDGETS_PATH))
+    parser.add_argument("--update-budgets", action="store_true", help="Record the current statement counts as budgets")
+    parser.add_argument("--verbose", action="store_true", help="Print the statements of endpoints over budget")
+    args = parser.parse_args()
+
+    manifest_path = Path(args.manifest)
+    if not manifest_path.exists():
+        print(f"Manifest not found: {manifest_path}")
+        return 1
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    budgets_path = Path(args.budgets)
+    budgets = json.loads(budgets_path.read_text(encoding="utf-8")) if budgets_path.exists() else {}
+    if not budgets and not args.update_budgets:
+        print(
+            f"Warning: no query budgets in {budgets_path}; counts are reported but not enforced. "
+            "Record them against seeded data with --update-budgets and commit the file."
+        )
+
+    client = TestClient(app)
+    # Warm-up pass: the ensure_* helpers and per-process caches do extra work on the first call.
+    for method, path, body in build_requests(manifest).values():
+        client.request(method, path, json=body)
+
+    counts = {}
+    failures = 0
+    header = f"{'endpoint':32} {'status':>6} {'queries':>8} {'budget':>7} {'db ms':>8}  result"
+    print(header)
+    print("-" * len(header))
+    for name, (method, path, body) in build_requests(manifest).items():
+        budget = budgets.get(name)
+        result = "ok"
+        if budget is None or args.update_budgets:
+            with track_queries() as stats:
+                response = client.request(method, path, json=body)
+        else:
+            try:
+                with assert_max_queries(budget) as stats:
+                    response = client.request(method, path, json=body)
+            except AssertionError as exc:
+                failures += 1
+                result = "over budget"
+                if args.verbose:
+                    print(str(exc))
+        if response.status_code >= 400:
+            failures += 1
+            result = f"HTTP {response.status_code}"
+        counts[name] = stats.count
+        print(
+            f"{name:32} {response.status_code:>6} {stats.count:>8} {budget if budget is not None else '-':>7} "
+            f"{stats.seconds * 1000:>8.1f}  {result}"
+        )
+
+    if args.update_budgets:
+        budgets_path.write_text(json.dumps(counts, indent=2) + "\n", encoding="utf-8")
+        print(f"Budgets written: {budgets_path}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
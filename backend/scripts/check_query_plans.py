@@ -0,0 +1,268 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from fastapi import HTTPException
+from psycopg import connect
+from psycopg.errors import Error as PsycopgError
+from psycopg.rows import dict_row
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.db import get_database_url
+from app.db_helpers import (
+    ensure_project_summary_table,
+    ensure_projects_chat_columns,
+    ensure_sprint_rollup_table,
+    ensure_sprint_tables,
+    ensure_task_audit_table,
+    ensure_task_comment_reads_table,
+)
+from app.project_service import _fetch_projects_for_tg_id, ensure_project_member, get_user_id_by_tg_id
+from app.services.board_service import _fetch_comment_page, _fetch_project_sprints, _fetch_project_tasks, _fetch_task_history
+from app.services.chat_project_service import _find_chat_project
+
+# Tables that grow with usage. A sequential scan over any of them on a hot path is a regression
+# once they hold more than --min-rows rows; small lookup tables are allowed to be scanned.
+LARGE_TABLES = (
+    "tasks",
+    "comments",
+    "task_audit_log",
+    "task_comment_reads",
+    "project_members",
+    "sprint_daily_rollups",
+    "projects",
+    "users",
+)
+DEFAULT_BUDGETS_PATH = Path(__file__).resolve().with_name("query_plan_budgets.json")
+
+
+class ExplainingCursor:
+    """Wraps a psycopg cursor and records EXPLAIN (ANALYZE, BUFFERS) for every read query."""
+
+    def __init__(self, cur) -> None:
+        self._cur = cur
+        self.plans: list[dict] = []
+
+    def execute(self, query, params=None, **kwargs):
+        statement = str(query).lstrip()
+        if statement.split(None, 1)[0].upper() in ("SELECT", "WITH"):
+            self._cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", params)
+            row = self._cur.fetchone()
+            self.plans.append(row["QUERY PLAN"][0])
+        return self._cur.execute(query, params, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+def _walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def _pick_parameters(cur) -> dict:
+    cur.execute(
+        """
+        SELECT t.project_id, COUNT(*) AS task_count
+        FROM tasks t
+        GROUP BY t.project_id
+        ORDER BY task_count DESC
+        LIMIT 1;
+        """
+    )
+    project_row = cur.fetchone()
+    if not project_row:
+        raise RuntimeError("Database has no tasks. Run scripts/seed_load_data.py first.")
+    project_id = project_row["project_id"]
+
+    cur.execute(
+        """
+        SELECT u.id AS user_id, u.tg_id
+        FROM project_members pm
+        JOIN users u ON u.id = pm.user_id
+        WHERE pm.project_id = %s AND pm.is_active = TRUE
+        ORDER BY u.id
+        LIMIT 1;
+        """,
+        (project_id,),
+    )
+    member_row = cur.fetchone()
+    if not member_row:
+        raise RuntimeError(f"Project {project_id} has no active members")
+
+    cur.execute(
+        """
+        SELECT c.task_id, COUNT(*) AS comment_count
+        FROM comments c
+        JOIN tasks t ON t.id = c.task_id
+        WHERE t.project_id = %s
+        GROUP BY c.task_id
+        ORDER BY comment_count DESC
+        LIMIT 1;
+        """,
+        (project_id,),
+    )
+    comment_row = cur.fetchone()
+    cur.execute("SELECT id FROM tasks WHERE project_id = %s ORDER BY id LIMIT 1;", (project_id,))
+    task_id = comment_row["task_id"] if comment_row else cur.fetchone()["id"]
+
+    cur.execute(
+        """
+        SELECT created_at, id
+        FROM comments
+        WHERE task_id = %s
+        ORDER BY created_at DESC, id DESC
+        OFFSET 50
+        LIMIT 1;
+        """,
+        (task_id,),
+    )
+    older_row = cur.fetchone()
+
+    cur.execute("SELECT tg_chat_id, tg_chat_instance FROM projects WHERE id = %s;", (project_id,))
+    chat_row = cur.fetchone()
+    return {
+        "project_id": project_id,
+        "user_id": member_row["user_id"],
+        "tg_id": member_row["tg_id"],
+        "task_id": task_id,
+        "before_key": (older_row["created_at"], older_row["id"]) if older_row else None,
+        "tg_chat_id": chat_row["tg_chat_id"],
+        "chat_instance": chat_row["tg_chat_instance"],
+    }
+
+
+def _hot_queries(params: dict) -> dict:
+    return {
+        "user_by_tg_id": lambda cur: get_user_id_by_tg_id(cur, params["tg_id"]),
+        "project_membership": lambda cur: ensure_project_member(cur, params["project_id"], params["user_id"]),
+        "projects_for_user": lambda cur: _fetch_projects_for_tg_id(cur, params["tg_id"]),
+        "board_tasks": lambda cur: _fetch_project_tasks(cur, params["project_id"], params["user_id"]),
+        "board_sprints": lambda cur: _fetch_project_sprints(cur, params["project_id"]),
+        "comments_latest_page": lambda cur: _fetch_comment_page(cur, params["task_id"], 50),
+        "comments_earlier_page": lambda cur: _fetch_comment_page(cur, params["task_id"], 50, before_key=params["before_key"]),
+        "task_history": lambda cur: _fetch_task_history(cur, params["task_id"]),
+        "chat_project_lookup": lambda cur: _find_chat_project(cur, params["tg_chat_id"], params["chat_instance"]),
+    }
+
+
+def _large_table_sizes(cur, min_rows: int) -> dict:
+    cur.execute(
+        """
+        SELECT c.relname, c.reltuples::BIGINT AS estimated_rows
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = current_schema()
+          AND c.relkind = 'r'
+          AND c.relname = ANY(%s);
+        """,
+        (list(LARGE_TABLES),),
+    )
+    return {row["relname"]: row["estimated_rows"] for row in cur.fetchall() if row["estimated_rows"] > min_rows}
+
+
+def collect_plans(min_rows: int) -> tuple[dict, dict]:
+    results = {}
+    with connect(get_database_url()) as conn:
+        with conn.cursor(row_factory=dict_row) as cur:
+            ensure_projects_chat_columns(cur)
+            ensure_sprint_tables(cur)
+            ensure_sprint_rollup_table(cur)
+            ensure_task_comment_reads_table(cur)
+            ensure_task_audit_table(cur)
+            ensure_project_summary_table(cur)
+            conn.commit()
+
+            large_tables = _large_table_sizes(cur, min_rows)
+            params = _pick_parameters(cur)
+            for name, run in _hot_queries(params).items():
+                if name == "comments_earlier_page" and params["before_key"] is None:
+                    continue
+                explaining = ExplainingCursor(cur)
+                try:
+                    run(explaining)
+                except HTTPException as exc:
+                    raise RuntimeError(f"{name}: {exc.detail}")
+                seq_scans = []
+                shared_blocks = 0
+                execution_ms = 0.0
+                for plan in explaining.plans:
+                    top = plan["Plan"]
+                    shared_blocks += top.get("Shared Hit Blocks", 0) + top.get("Shared Read Blocks", 0)
+                    execution_ms += plan.get("Execution Time", 0.0)
+                    seq_scans.extend(
+                        node["Relation Name"]
+                        for node in _walk(top)
+                        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in large_tables
+                    )
+                results[name] = {
+                    "statements": len(explaining.plans),
+                    "shared_blocks": shared_blocks,
+                    "execution_ms": round(execution_ms, 3),
+                    "seq_scans": sorted(set(seq_scans)),
+                }
+        conn.rollback()
+    return results, params
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Run EXPLAIN (ANALYZE, BUFFERS) over the hot board queries against a seeded database and fail on "
+            "sequential scans of large tables or buffer usage above the recorded budget."
+        )
+    )
+    parser.add_argument("--budgets", default=str(DEFAULT_BUDGETS_PATH))
+    parser.add_argument("--min-rows", type=int, default=1000, help="Tables smaller than this may be seq-scanned")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative growth over the budget")
+    parser.add_argument("--update-budgets", action="store_true", help="Record the current buffer counts as budgets")
+    args = parser.parse_args()
+
+    try:
+        results, params = collect_plans(args.min_rows)
+    except RuntimeError as exc:
+        print(str(exc))
+        return 1
+    except PsycopgError as exc:
+        print(f"Database error: {exc}")
+        return 1
+
+    budgets_path = Path(args.budgets)
+    budgets = json.loads(budgets_path.read_text(encoding="utf-8")) if budgets_path.exists() else {}
+    if not budgets and not args.update_budgets:
+        print(
+            f"Warning: no buffer budgets in {budgets_path}; only sequential scans are checked. "
+            "Record them against seeded data with --update-budgets and commit the file."
+        )
+    print(f"Parameters: project={params['project_id']} task={params['task_id']} tg_id={params['tg_id']}")
+    header = f"{'query':24} {'stmts':>5} {'blocks':>8} {'budget':>8} {'ms':>9}  status"
+    print(header)
+    print("-" * len(header))
+
+    failures = 0
+    for name, stats in results.items():
+        budget = budgets.get(name)
+        problems = []
+        if stats["seq_scans"]:
+            problems.append(f"seq scan on {', '.join(stats['seq_scans'])}")
+        if budget is not None and not args.update_budgets and stats["shared_blocks"] > budget * (1 + args.tolerance):
+            problems.append(f"buffers over budget by {stats['shared_blocks'] - budget}")
+        failures += bool(problems)
+        print(
+            f"{name:24} {stats['statements']:>5} {stats['shared_blocks']:>8} {budget if budget is not None else '-':>8} "
+            f"{stats['execution_ms']:>9}  {'; '.join(problems) or 'ok'}"
+        )
+
+    if args.update_budgets:
+        budgets_path.write_text(
+            json.dumps({name: stats["shared_blocks"] for name, stats in results.items()}, indent=2) + "\n",
+            encoding="utf-8",
+        )
+        print(f"Budgets written: {budgets_path}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,57 @@
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.text_compaction import compact_text
+
+# (name, input, transcript, expected output). The first group is noise compaction must remove;
+# the second is content that looks like noise but carries meaning and must reach extraction intact.
+CASES = (
+    ("filler words", "Эм, надо, ну вот, поправить форму", True, "надо, поправить форму"),
+    ("tripled word", "нужно нужно нужно обновить API", True, "нужно обновить API"),
+    ("single-letter stutter", "я я я сделаю и и в в тесты", True, "я сделаю и в тесты"),
+    ("hyphenated line break", "Настроить бэк-\nэнд для оплаты", False, "Настроить бэкэнд для оплаты"),
+    ("copyright footer", "Добавить фильтр\n© 2024 ООО Ромашка. Все права защищены.", False, "Добавить фильтр"),
+    ("rights reserved footer", "Add search\nAcme Inc. All rights reserved.", False, "Add search"),
+    ("confidential marker", "Конфиденциально\nОбновить API", False, "Обновить API"),
+    ("page number", "Исправить кнопку\nстр. 3 из 10", False, "Исправить кнопку"),
+    ("doubled intensifier", "очень очень срочно поправить оплату", True, "очень очень срочно поправить оплату"),
+    ("doubled negation", "no no, keep the old API", True, "no no, keep the old API"),
+    ("repeated number", "версия 12 12 сломана", True, "версия 12 12 сломана"),
+    ("confidential task", "Confidential: move API keys to the vault", False, "Confidential: move API keys to the vault"),
+    ("copyright task", "Copyright notice in the footer must show the current year", False,
+     "Copyright notice in the footer must show the current year"),
+    ("enumerated item", "(c) Add login via Telegram", False, "(c) Add login via Telegram"),
+    ("capitalized compound", "Починить Wi-\nFi модуль", False, "Починить Wi-Fi модуль"),
+    ("particle compound", "Пусть кто-\nто проверит деплой", False, "Пусть кто-то проверит деплой"),
+    ("numeric compound", "Обновить COVID-\n19 баннер", False, "Обновить COVID-19 баннер"),
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Check that text compaction drops boilerplate and disfluencies but keeps meaningful text."
+    )
+    parser.add_argument("--verbose", action="store_true", help="Print the output of failing cases")
+    args = parser.parse_args()
+
+    header = f"{'case':26} {'mode':10}  result"
+    print(header)
+    print("-" * len(header))
+    failures = 0
+    for name, text, transcript, expected in CASES:
+        actual = compact_text(text, transcript=transcript)
+        passed = actual == expected
+        failures += not passed
+        print(f"{name:26} {'transcript' if transcript else 'document':10}  {'ok' if passed else 'FAILED'}")
+        if not passed and args.verbose:
+            print(f"  expected: {expected!r}\n  actual:   {actual!r}")
+    if failures:
+        print(f"{failures} case(s) failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
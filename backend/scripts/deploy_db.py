@@ -7,6 +7,7 @@ from psycopg.errors import Error as PsycopgError
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 from app.db import get_database_url
+from app.db_helpers import add_search_columns
 
 
 def deploy_schema(schema_path: Path) -> None:
@@ -17,6 +18,14 @@ def deploy_schema(schema_path: Path) -> None:
             cur.execute(sql)
 
 
+def deploy_search_columns() -> bool:
+    with connect(get_database_url()) as conn:
+        with conn.cursor() as cur:
+            trgm_enabled = add_search_columns(cur)
+        conn.commit()
+    return trgm_enabled
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Deploy PostgreSQL schema for backend.")
     parser.add_argument(
@@ -24,8 +33,28 @@ def main() -> int:
         default=str(Path(__file__).resolve().parents[1] / "schema.sql"),
         help="Path to schema.sql",
     )
+    parser.add_argument(
+        "--search-columns",
+        action="store_true",
+        help=(
+            "Only add the full-text search columns and indexes to an existing database. "
+            "This rewrites tasks and comments under an exclusive lock, so run it off-peak."
+        ),
+    )
     args = parser.parse_args()
 
+    if args.search_columns:
+        try:
+            trgm_enabled = deploy_search_columns()
+        except RuntimeError as exc:
+            print(str(exc))
+            return 1
+        except PsycopgError as exc:
+            print(f"Database error: {exc}")
+            return 1
+        print("Search columns deployed" + ("" if trgm_enabled else " (pg_trgm unavailable, fuzzy title matching off)"))
+        return 0
+
     schema_path = Path(args.schema).resolve()
     if not schema_path.exists():
         print(f"Schema file not found: {schema_path}")
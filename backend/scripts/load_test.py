@@ -0,0 +1,316 @@
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+# Weights mirror what useBoard.js issues while a board is open: most traffic is board loads
+# and comment reads, with occasional edits and bot ingests from the chat.
+SCENARIO_WEIGHTS = {
+    "board_open": 40,
+    "task_patch": 15,
+    "comment_read": 25,
+    "comment_write": 10,
+    "bot_ingest": 10,
+}
+STUB_LLM_RESPONSE = {
+    "choices": [
+        {
+            "message": {
+                "content": json.dumps(
+                    {
+                        "tasks": [
+                            {
+                                "title": "Исправить кнопку оплаты",
+                                "description": "Кнопка оплаты перекрывает меню на мобильных",
+                                "execution_hours": 2,
+                                "status": "NEW",
+                            }
+                        ]
+                    },
+                    ensure_ascii=False,
+                )
+            }
+        }
+    ]
+}
+AUDIT_METRIC_NAMES = (
+    "vkr_audit_flush_duration_seconds_sum",
+    "vkr_audit_flush_duration_seconds_count",
+    "vkr_audit_flush_rows_sum",
+)
+INGEST_MESSAGES = (
+    "Нужно исправить кнопку оплаты на странице checkout",
+    "Надо добавить фильтр по статусу в таблицу задач",
+    "Please fix the login modal, it does not open on iOS",
+)
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def fetch_audit_metrics(base_url: str) -> dict[str, float] | None:
+    # Counters come from the backend's /metrics, so with several workers this covers only the one that answers.
+    try:
+        with urlopen(f"{base_url.rstrip('/')}/metrics", timeout=10) as response:
+            text = response.read().decode("utf-8")
+    except (HTTPError, URLError, TimeoutError):
+        return None
+    values = dict.fromkeys(AUDIT_METRIC_NAMES, 0.0)
+    for line in text.splitlines():
+        name, _, value = line.partition(" ")
+        if name in values:
+            values[name] = float(value)
+    return values
+
+
+def audit_write_report(before: dict[str, float] | None, after: dict[str, float] | None) -> dict | None:
+    if before is None or after is None:
+        return None
+    flushes = after["vkr_audit_flush_duration_seconds_count"] - before["vkr_audit_flush_duration_seconds_count"]
+    rows = after["vkr_audit_flush_rows_sum"] - before["vkr_audit_flush_rows_sum"]
+    seconds = after["vkr_audit_flush_duration_seconds_sum"] - before["vkr_audit_flush_duration_seconds_sum"]
+    return {
+        "flushes": int(flushes),
+        "rows": int(rows),
+        "rows_per_flush": round(rows / flushes, 2) if flushes else 0.0,
+        "mean_flush_ms": round(seconds / flushes * 1000, 3) if flushes else 0.0,
+    }
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    latency_seconds = 0.0
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        body = json.dumps(STUB_LLM_RESPONSE).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:  # noqa: A002
+        return
+
+
+def start_stub_llm(port: int, latency_seconds: float) -> ThreadingHTTPServer:
+    StubLLMHandler.latency_seconds = latency_seconds
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubLLMHandler)
+    threading.Thread(target=server.serve_forever, name="stub-llm", daemon=True).start()
+    return server
+
+
+class LoadRunner:
+    def __init__(self, args: argparse.Namespace, manifest: dict) -> None:
+        self.base_url = args.base_url.rstrip("/")
+        self.bot_token = args.bot_token
+        self.projects = [project for project in manifest["projects"] if project["member_tg_ids"]]
+        if not self.projects:
+            raise RuntimeError("Manifest has no projects with members. Run scripts/seed_load_data.py first.")
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.rate_limited: dict[str, int] = defaultdict(int)
+        self.lock = threading.Lock()
+        self.message_counter = int(time.time() * 1000)
+
+    def _request(self, method: str, path: str, body: dict | None = None, headers: dict | None = None) -> dict:
+        request_headers = {"Content-Type": "application/json", **(headers or {})}
+        req = Request(
+            url=f"{self.base_url}{path}",
+            data=json.dumps(body).encode("utf-8") if body is not None else None,
+            method=method,
+            headers=request_headers,
+        )
+        with urlopen(req, timeout=90) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def _next_message_id(self) -> int:
+        with self.lock:
+            self.message_counter += 1
+            return self.message_counter
+
+    def run_scenario(self, rng: random.Random, name: str) -> None:
+        project = rng.choice(self.projects)
+        tg_id = rng.choice(project["member_tg_ids"])
+        task_ids = project["task_ids"]
+        if name in ("task_patch", "comment_read", "comment_write") and not task_ids:
+            name = "board_open"
+
+        body = None
+        headers = None
+        if name == "board_open":
+            route, method, path = "GET /projects/{id}/board", "GET", f"/projects/{project['id']}/board?tg_id={tg_id}"
+        elif name == "task_patch":
+            route, method, path = "PATCH /tasks/{id}", "PATCH", f"/tasks/{rng.choice(task_ids)}"
+            body = {"tg_id": tg_id, "status": rng.choice(("NEW", "IN_PROGRESS", "DONE"))}
+        elif name == "comment_read":
+            route, method, path = "GET /tasks/{id}/comments", "GET", f"/tasks/{rng.choice(task_ids)}/comments?tg_id={tg_id}"
+        elif name == "comment_write":
+            route, method, path = "POST /tasks/{id}/comments", "POST", f"/tasks/{rng.choice(task_ids)}/comments"
+            body = {"tg_id": tg_id, "text": f"Load test comment {rng.randint(0, 1_000_000)}"}
+        else:
+            route, method, path = "POST /bot/ingest-message", "POST", "/bot/ingest-message"
+            headers = {"X-Bot-Token": self.bot_token}
+            body = {
+                "chat_id": project["chat_id"],
+                "message_id": self._next_message_id(),
+                "chat_type": "group",
+                "title": f"Load project {project['id']}",
+                "user_tg_id": tg_id,
+                "user_first_name": "Load",
+                "content_text": rng.choice(INGEST_MESSAGES),
+                "source_type": "text",
+            }
+
+        started = time.perf_counter()
+        try:
+            self._request(method, path, body, headers)
+        except HTTPError as exc:
+            # 429 is the rate limiter doing its job, not a failure of the route under test.
+            with self.lock:
+                if exc.code == 429:
+                    self.rate_limited[route] += 1
+                else:
+                    self.errors[route] += 1
+            return
+        except (OSError, http.client.HTTPException, json.JSONDecodeError):
+            # URLError, timeouts and dropped connections are all OSError; none may end the worker.
+            with self.lock:
+                self.errors[route] += 1
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.latencies[route].append(elapsed_ms)
+
+    def worker(self, worker_index: int, deadline: float, scenarios: list[str], weights: list[int], seed: int) -> None:
+        rng = random.Random(seed + worker_index)
+        while time.monotonic() < deadline:
+            self.run_scenario(rng, rng.choices(scenarios, weights=weights)[0])
+
+    def run(self, concurrency: int, duration: float, scenarios: list[str], seed: int) -> float:
+        weights = [SCENARIO_WEIGHTS[name] for name in scenarios]
+        deadline = time.monotonic() + duration
+        started = time.monotonic()
+        threads = [
+            threading.Thread(target=self.worker, args=(index, deadline, scenarios, weights, seed), daemon=True)
+            for index in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.monotonic() - started
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route in sorted(set(self.latencies) | set(self.errors) | set(self.rate_limited)):
+            values = sorted(self.latencies.get(route, []))
+            routes[route] = {
+                "requests": len(values),
+                "errors": self.errors.get(route, 0),
+                "rate_limited": self.rate_limited.get(route, 0),
+                "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": round(percentile(values, 0.50), 2),
+                "p95_ms": round(percentile(values, 0.95), 2),
+                "p99_ms": round(percentile(values, 0.99), 2),
+            }
+        return {"elapsed_seconds": round(elapsed, 2), "routes": routes}
+
+
+def print_report(report: dict) -> None:
+    print(f"Elapsed: {report['elapsed_seconds']} s")
+    header = f"{'route':32} {'reqs':>7} {'errs':>5} {'429':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}"
+    print(header)
+    print("-" * len(header))
+    for route, stats in report["routes"].items():
+        print(
+            f"{route:32} {stats['requests']:>7} {stats['errors']:>5} {stats['rate_limited']:>5} "
+            f"{stats['throughput_rps']:>8} "
+            f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}"
+        )
+    audit = report.get("audit_writes")
+    if audit:
+        print(
+            f"Audit writes: {audit['flushes']} flushes, {audit['rows']} rows, "
+            f"{audit['rows_per_flush']} rows/flush, {audit['mean_flush_ms']} ms mean flush"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Replay board traffic against a running backend and report per-route latency percentiles. "
+            "For bot ingest start the backend with OPENROUTER_API_URL=http://127.0.0.1:<stub-port>/ "
+            "and any OPENROUTER_API_KEY, then pass --stub-llm-port. "
+            "Start it with RATE_LIMIT_ENABLED=0 as well: a few seeded users generate all of the traffic "
+            "and would otherwise be throttled; throttled requests are reported in the 429 column."
+        )
+    )
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--bot-token", default="")
+    parser.add_argument(
+        "--manifest",
+        default=str(Path(__file__).resolve().parents[1] / "load_manifest.json"),
+        help="Manifest written by scripts/seed_load_data.py",
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--scenarios", default=",".join(SCENARIO_WEIGHTS), help="Comma-separated scenario names")
+    parser.add_argument("--stub-llm-port", type=int, default=0, help="Serve a canned OpenRouter response on this port")
+    parser.add_argument("--stub-llm-latency", type=float, default=0.5, help="Seconds the stub LLM waits per call")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIO_WEIGHTS]
+    if unknown or not scenarios:
+        print(f"Unknown scenarios: {', '.join(unknown) or '(none given)'}")
+        return 1
+    if "bot_ingest" in scenarios and not args.bot_token:
+        print("--bot-token is required for the bot_ingest scenario")
+        return 1
+
+    manifest_path = Path(args.manifest)
+    if not manifest_path.exists():
+        print(f"Manifest not found: {manifest_path}")
+        return 1
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+    stub_server = start_stub_llm(args.stub_llm_port, args.stub_llm_latency) if args.stub_llm_port else None
+    try:
+        runner = LoadRunner(args, manifest)
+        audit_before = fetch_audit_metrics(args.base_url)
+        elapsed = runner.run(args.concurrency, args.duration, scenarios, args.seed)
+        audit_after = fetch_audit_metrics(args.base_url)
+    except RuntimeError as exc:
+        print(str(exc))
+        return 1
+    finally:
+        if stub_server is not None:
+            stub_server.shutdown()
+
+    report = runner.report(elapsed)
+    report["audit_writes"] = audit_write_report(audit_before, audit_after)
+    print_report(report)
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
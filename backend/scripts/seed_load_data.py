@@ -0,0 +1,262 @@
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from psycopg import connect
+from psycopg.errors import Error as PsycopgError
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.db import get_database_url
+from app.db_helpers import (
+    ensure_projects_chat_columns,
+    ensure_sprint_rollup_table,
+    ensure_sprint_tables,
+    ensure_task_audit_table,
+    ensure_task_comment_reads_table,
+)
+
+TASK_WORDS = (
+    "Сделать страницу оплаты",
+    "Исправить баг в авторизации",
+    "Добавить фильтр в таблицу",
+    "Обновить дизайн шапки",
+    "Настроить деплой backend",
+    "Fix checkout button layout",
+    "Add search to dashboard",
+    "Refactor API client",
+    "Write integration tests",
+    "Поправить адаптив меню",
+)
+COMMENT_WORDS = (
+    "Готово, проверь пожалуйста",
+    "Нужно уточнить требования",
+    "Looks good to me",
+    "Переделал по макету",
+    "Blocked by backend change",
+    "Добавил скриншоты",
+)
+SEED_TG_ID_BASE = 9_000_000_000
+
+
+def _lognormal_int(rng: random.Random, median: float, sigma: float, low: int, high: int) -> int:
+    value = int(round(rng.lognormvariate(0, sigma) * median))
+    return max(low, min(high, value))
+
+
+def seed(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+    manifest = {"users": [], "projects": []}
+
+    with connect(get_database_url()) as conn:
+        with conn.cursor() as cur:
+            ensure_projects_chat_columns(cur)
+            ensure_sprint_tables(cur)
+            ensure_sprint_rollup_table(cur)
+            ensure_task_comment_reads_table(cur)
+            ensure_task_audit_table(cur)
+
+            user_ids: list[int] = []
+            for index in range(args.users):
+                tg_id = SEED_TG_ID_BASE + index
+                cur.execute(
+                    """
+                    INSERT INTO users (tg_id, username, first_name, last_name)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (tg_id) DO UPDATE SET username = EXCLUDED.username
+                    RETURNING id;
+                    """,
+                    (tg_id, f"load_user_{index}", f"Load{index}", "Test"),
+                )
+                user_ids.append(cur.fetchone()[0])
+                manifest["users"].append({"id": user_ids[-1], "tg_id": tg_id})
+
+            for project_index in range(args.projects):
+                chat_id = -(SEED_TG_ID_BASE + project_index)
+                cur.execute(
+                    """
+                    INSERT INTO projects (tg_chat_id, tg_chat_instance, tg_chat_type, title, created_at)
+                    VALUES (%s, %s, 'group', %s, %s)
+                    ON CONFLICT (tg_chat_id) WHERE tg_chat_id IS NOT NULL
+                    DO UPDATE SET title = EXCLUDED.title
+                    RETURNING id;
+                    """,
+                    (chat_id, str(chat_id), f"Load project {project_index}", now - timedelta(days=rng.randint(30, 400))),
+                )
+                project_id = cur.fetchone()[0]
+
+                member_count = min(len(user_ids), _lognormal_int(rng, args.members_median, 0.6, 1, 50))
+                members = rng.sample(user_ids, member_count)
+                for member_id in members:
+                    cur.execute(
+                        """
+                        INSERT INTO project_members (project_id, user_id, role, is_active)
+                        VALUES (%s, %s, 'MEMBER', TRUE)
+                        ON CONFLICT (project_id, user_id) DO UPDATE SET is_active = TRUE;
+                        """,
+                        (project_id, member_id),
+                    )
+
+                sprint_ids: list[int] = []
+                for sprint_index in range(rng.randint(0, args.max_sprints)):
+                    start = (now - timedelta(days=14 * (sprint_index + 1))).date()
+                    cur.execute(
+                        """
+                        INSERT INTO sprints (project_id, title, start_date, end_date, is_open)
+                        VALUES (%s, %s, %s, %s, %s)
+                        RETURNING id;
+                        """,
+                        (project_id, f"Sprint {sprint_index + 1}", start, start + timedelta(days=13), sprint_index == 0),
+                    )
+                    sprint_ids.append(cur.fetchone()[0])
+
+                task_count = _lognormal_int(rng, args.tasks_median, 1.0, 1, args.max_tasks)
+                cur.execute("SELECT COALESCE(MAX(id), 0) FROM tasks WHERE project_id = %s;", (project_id,))
+                previous_max_task_id = cur.fetchone()[0]
+                with cur.copy(
+                    """
+                    COPY tasks (
+                      project_id, sprint_id, title, description, status, execution_hours,
+                      author_id, assignee_id, created_at, updated_at
+                    ) FROM STDIN
+                    """
+                ) as copy:
+                    for task_index in range(task_count):
+                        created_at = now - timedelta(minutes=rng.randint(10, 60 * 24 * 180))
+                        updated_at = min(now, created_at + timedelta(minutes=rng.randint(0, 60 * 24 * 30)))
+                        status = rng.choices(("NEW", "IN_PROGRESS", "DONE"), weights=(45, 20, 35))[0]
+                        author_id = rng.choice(members)
+                        copy.write_row(
+                            (
+                                project_id,
+                                rng.choice(sprint_ids) if sprint_ids and rng.random() < 0.6 else None,
+                                f"{rng.choice(TASK_WORDS)} #{task_index}",
+                                rng.choice(TASK_WORDS) * rng.randint(1, 4),
+                                status,
+                                rng.choice((None, 1, 2, 4, 8, 16)),
+                                author_id,
+                                rng.choice(members),
+                                created_at,
+                                updated_at,
+                            )
+                        )
+                cur.execute(
+                    "SELECT id, author_id, created_at FROM tasks WHERE project_id = %s AND id > %s ORDER BY id;",
+                    (project_id, previous_max_task_id),
+                )
+                task_rows = cur.fetchall()
+                task_ids = [row[0] for row in task_rows]
+                # COPY bypasses the service layer, so fold the new tasks into the sprint rollups here.
+                cur.execute(
+                    """
+                    INSERT INTO sprint_daily_rollups (
+                      sprint_id, day, new_count, in_progress_count, done_count, new_hours, in_progress_hours, done_hours
+                    )
+                    SELECT
+                      sprint_id,
+                      updated_at::DATE,
+                      COUNT(*) FILTER (WHERE status::TEXT = 'NEW')::INT,
+                      COUNT(*) FILTER (WHERE status::TEXT = 'IN_PROGRESS')::INT,
+                      COUNT(*) FILTER (WHERE status::TEXT = 'DONE')::INT,
+                      COALESCE(SUM(execution_hours) FILTER (WHERE status::TEXT = 'NEW'), 0)::INT,
+                      COALESCE(SUM(execution_hours) FILTER (WHERE status::TEXT = 'IN_PROGRESS'), 0)::INT,
+                      COALESCE(SUM(execution_hours) FILTER (WHERE status::TEXT = 'DONE'), 0)::INT
+                    FROM tasks
+                    WHERE project_id = %s AND sprint_id IS NOT NULL AND id = ANY(%s)
+                    GROUP BY sprint_id, updated_at::DATE
+                    ON CONFLICT (sprint_id, day)
+                    DO UPDATE SET
+                      new_count = sprint_daily_rollups.new_count + EXCLUDED.new_count,
+                      in_progress_count = sprint_daily_rollups.in_progress_count + EXCLUDED.in_progress_count,
+                      done_count = sprint_daily_rollups.done_count + EXCLUDED.done_count,
+                      new_hours = sprint_daily_rollups.new_hours + EXCLUDED.new_hours,
+                      in_progress_hours = sprint_daily_rollups.in_progress_hours + EXCLUDED.in_progress_hours,
+                      done_hours = sprint_daily_rollups.done_hours + EXCLUDED.done_hours;
+                    """,
+                    (project_id, task_ids),
+                )
+
+                with cur.copy("COPY comments (task_id, author_id, text, created_at) FROM STDIN") as copy:
+                    for task_id, _author_id, created_at in task_rows:
+                        for _ in range(min(int(rng.expovariate(1 / args.comments_mean)), 500)):
+                            copy.write_row(
+                                (
+                                    task_id,
+                                    rng.choice(members),
+                                    rng.choice(COMMENT_WORDS),
+                                    created_at + timedelta(minutes=rng.randint(1, 60 * 24 * 20)),
+                                )
+                            )
+
+                with cur.copy(
+                    "COPY task_audit_log (task_id, actor_id, event_type, field, old_value, new_value, created_at) FROM STDIN"
+                ) as copy:
+                    for task_id, author_id, created_at in task_rows:
+                        copy.write_row((task_id, author_id, "CREATE", None, None, json.dumps({"status": "NEW"}), created_at))
+                        for step in range(rng.randint(0, args.max_audit_events)):
+                            copy.write_row(
+                                (
+                                    task_id,
+                                    rng.choice(members),
+                                    "STATUS_CHANGE",
+                                    "status",
+                                    json.dumps("NEW"),
+                                    json.dumps("IN_PROGRESS"),
+                                    created_at + timedelta(hours=step + 1),
+                                )
+                            )
+
+                manifest["projects"].append(
+                    {
+                        "id": project_id,
+                        "chat_id": chat_id,
+                        "member_tg_ids": [SEED_TG_ID_BASE + user_ids.index(member_id) for member_id in members],
+                        "task_ids": task_ids,
+                        "sprint_ids": sprint_ids,
+                    }
+                )
+                conn.commit()
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE;")
+    return manifest
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Seed PostgreSQL with synthetic projects for load testing.")
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--members-median", type=float, default=5)
+    parser.add_argument("--tasks-median", type=float, default=60)
+    parser.add_argument("--max-tasks", type=int, default=5000)
+    parser.add_argument("--max-sprints", type=int, default=6)
+    parser.add_argument("--comments-mean", type=float, default=3)
+    parser.add_argument("--max-audit-events", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--manifest",
+        default=str(Path(__file__).resolve().parents[1] / "load_manifest.json"),
+        help="Where to write ids used by scripts/load_test.py",
+    )
+    args = parser.parse_args()
+
+    try:
+        manifest = seed(args)
+    except RuntimeError as exc:
+        print(str(exc))
+        return 1
+    except PsycopgError as exc:
+        print(f"Database error: {exc}")
+        return 1
+
+    Path(args.manifest).write_text(json.dumps(manifest), encoding="utf-8")
+    task_total = sum(len(project["task_ids"]) for project in manifest["projects"])
+    print(f"Seeded {len(manifest['projects'])} projects, {len(manifest['users'])} users, {task_total} tasks")
+    print(f"Manifest written: {args.manifest}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def load_spans(paths: list[str]) -> dict[str, list[dict]]:
+    traces: dict[str, list[dict]] = defaultdict(list)
+    for path in paths:
+        with open(path, encoding="utf-8") as trace_file:
+            for line in trace_file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    span = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                traces[span["trace_id"]].append(span)
+    return traces
+
+
+def print_trace(spans: list[dict]) -> None:
+    children: dict[str | None, list[dict]] = defaultdict(list)
+    span_ids = {span["span_id"] for span in spans}
+    for span in spans:
+        parent_id = span["parent_span_id"] if span["parent_span_id"] in span_ids else None
+        children[parent_id].append(span)
+    roots = sorted(children[None], key=lambda item: item["start_time"])
+    trace_start = roots[0]["start_time"] if roots else 0.0
+
+    def walk(span: dict, depth: int) -> None:
+        offset_ms = (span["start_time"] - trace_start) * 1000
+        attributes = " ".join(f"{key}={value}" for key, value in span["attributes"].items() if key != "error")
+        marker = " !" if span["status"] != "ok" else ""
+        print(
+            f"  {offset_ms:>9.1f} {span['duration_ms']:>9.1f}  {'  ' * depth}{span['service']}:{span['name']}{marker}"
+            f"{'  ' + attributes if attributes else ''}"
+        )
+        if span["status"] != "ok" and span["attributes"].get("error"):
+            print(f"  {'':>9} {'':>9}  {'  ' * depth}  {span['attributes']['error']}")
+        for child in sorted(children[span["span_id"]], key=lambda item: item["start_time"]):
+            walk(child, depth + 1)
+
+    print(f"  {'start ms':>9} {'dur ms':>9}  span")
+    for root in roots:
+        walk(root, 0)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Inspect spans written to TRACE_EXPORT_PATH by the bot and backend.")
+    parser.add_argument("paths", nargs="+", help="Span JSONL files (bot and backend files may be passed together)")
+    parser.add_argument("--root", default="bot.ingest_message", help="Only show traces containing a span with this name")
+    parser.add_argument("--trace", help="Show a single trace id")
+    parser.add_argument("--last", type=int, default=5, help="How many recent traces to print as trees")
+    parser.add_argument("--summary", action="store_true", help="Print per-stage latency percentiles instead of trees")
+    args = parser.parse_args()
+
+    missing = [path for path in args.paths if not Path(path).exists()]
+    if missing:
+        print(f"Trace file not found: {', '.join(missing)}")
+        return 1
+    traces = load_spans(args.paths)
+    if args.trace:
+        selected = [traces[args.trace]] if args.trace in traces else []
+    else:
+        selected = [spans for spans in traces.values() if any(span["name"] == args.root for span in spans)]
+    selected.sort(key=lambda spans: min(span["start_time"] for span in spans))
+    if not selected:
+        print("No matching traces")
+        return 1
+
+    if args.summary:
+        durations: dict[str, list[float]] = defaultdict(list)
+        for spans in selected:
+            for span in spans:
+                durations[f"{span['service']}:{span['name']}"].append(span["duration_ms"])
+        header = f"{'stage':48} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"
+        print(f"{len(selected)} traces")
+        print(header)
+        print("-" * len(header))
+        for stage, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+            values.sort()
+            print(
+                f"{stage:48} {len(values):>6} {percentile(values, 0.5):>9.1f} "
+                f"{percentile(values, 0.95):>9.1f} {values[-1]:>9.1f}"
+            )
+        return 0
+
+    for spans in selected[-args.last :]:
+        print(f"trace {spans[0]['trace_id']}")
+        print_trace(spans)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
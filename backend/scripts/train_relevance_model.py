@@ -0,0 +1,145 @@
+import argparse
+import json
+import math
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.relevance import DEFAULT_MODEL_PATH, HASH_BITS, ngram_features
+
+DEFAULT_DATA_PATH = Path(__file__).resolve().with_name("relevance_training_data.jsonl")
+
+
+def load_examples(paths: list[str]) -> list[tuple[str, int]]:
+    examples = []
+    for path in paths:
+        for line_number, line in enumerate(Path(path).read_text(encoding="utf-8").splitlines(), start=1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row.get("label") not in (0, 1) or not str(row.get("text") or "").strip():
+                raise SystemExit(f"{path}:{line_number}: expected {{\"text\": ..., \"label\": 0|1}}")
+            examples.append((str(row["text"]), int(row["label"])))
+    return examples
+
+
+def build_matrix(texts: list[str], hash_bits: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Sparse rows as (row, bucket, value) triplets; the scorer sums weights / sqrt(n-gram count).
+    rows, buckets, values = [], [], []
+    for row_index, text in enumerate(texts):
+        features = ngram_features(text, hash_bits)
+        if not features.size:
+            continue
+        rows.append(np.full(features.size, row_index, dtype=np.int64))
+        buckets.append(features)
+        values.append(np.full(features.size, 1 / math.sqrt(features.size), dtype=np.float64))
+    return np.concatenate(rows), np.concatenate(buckets), np.concatenate(values)
+
+
+def _sigmoid(logits: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-np.clip(logits, -30, 30)))
+
+
+def predict(matrix: tuple, sample_count: int, weights: np.ndarray, bias: float) -> np.ndarray:
+    rows, buckets, values = matrix
+    return _sigmoid(bias + np.bincount(rows, weights=weights[buckets] * values, minlength=sample_count))
+
+
+def train(
+    matrix: tuple,
+    labels: np.ndarray,
+    hash_bits: int,
+    epochs: int,
+    learning_rate: float,
+    l2: float,
+) -> tuple[np.ndarray, float]:
+    # Full-batch gradient descent with momentum on the log loss; classes are weighted equally.
+    rows, buckets, values = matrix
+    weights = np.zeros(1 << hash_bits, dtype=np.float64)
+    bias = 0.0
+    velocity = np.zeros_like(weights)
+    bias_velocity = 0.0
+    positive_share = labels.mean()
+    sample_weights = np.where(labels == 1, 0.5 / positive_share, 0.5 / (1 - positive_share)) / labels.size
+    for _ in range(epochs):
+        residual = (predict(matrix, labels.size, weights, bias) - labels) * sample_weights
+        gradient = np.bincount(buckets, weights=residual[rows] * values, minlength=weights.size) + l2 * weights
+        velocity = 0.9 * velocity - learning_rate * gradient
+        bias_velocity = 0.9 * bias_velocity - learning_rate * residual.sum()
+        weights += velocity
+        bias += bias_velocity
+    return weights, bias
+
+
+def pick_threshold(scores: np.ndarray, labels: np.ndarray, min_recall: float) -> float:
+    # Highest threshold that still keeps min_recall of the relevant examples.
+    positive_scores = np.sort(scores[labels == 1])
+    if not positive_scores.size:
+        return 0.5
+    index = int(math.floor((1 - min_recall) * positive_scores.size))
+    return float(positive_scores[min(index, positive_scores.size - 1)])
+
+
+def report(name: str, scores: np.ndarray, labels: np.ndarray, threshold: float) -> None:
+    kept = scores >= threshold
+    recall = (kept & (labels == 1)).sum() / max((labels == 1).sum(), 1)
+    skipped = (~kept & (labels == 0)).sum() / max((labels == 0).sum(), 1)
+    print(f"{name:10} threshold={threshold:.3f} relevant kept={recall:.1%} irrelevant skipped={skipped:.1%}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Train the hashed char n-gram relevance classifier used to gate LLM extraction."
+    )
+    parser.add_argument("data", nargs="*", default=[str(DEFAULT_DATA_PATH)], help="JSONL files with text and label")
+    parser.add_argument("--output", default=str(DEFAULT_MODEL_PATH))
+    parser.add_argument("--hash-bits", type=int, default=HASH_BITS)
+    parser.add_argument("--epochs", type=int, default=400)
+    parser.add_argument("--learning-rate", type=float, default=2.0)
+    parser.add_argument("--l2", type=float, default=1e-4)
+    parser.add_argument("--holdout", type=float, default=0.25, help="Share of examples used to pick thresholds")
+    parser.add_argument("--message-recall", type=float, default=0.97, help="Relevant messages the gate must keep")
+    parser.add_argument("--task-recall", type=float, default=0.99, help="Relevant candidate tasks the filter must keep")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    examples = load_examples(args.data)
+    random.Random(args.seed).shuffle(examples)
+    holdout_size = int(len(examples) * args.holdout)
+    holdout, training = examples[:holdout_size], examples[holdout_size:]
+    if not holdout or len({label for _, label in training}) < 2:
+        raise SystemExit("Need examples of both labels and a non-empty holdout")
+
+    def fit(subset: list[tuple[str, int]]) -> tuple[np.ndarray, float]:
+        labels = np.array([label for _, label in subset], dtype=np.float64)
+        matrix = build_matrix([text for text, _ in subset], args.hash_bits)
+        return train(matrix, labels, args.hash_bits, args.epochs, args.learning_rate, args.l2)
+
+    # Thresholds come from held-out scores; the shipped weights are then refit on every example.
+    weights, bias = fit(training)
+    holdout_labels = np.array([label for _, label in holdout])
+    holdout_scores = predict(build_matrix([text for text, _ in holdout], args.hash_bits), len(holdout), weights, bias)
+    message_threshold = pick_threshold(holdout_scores, holdout_labels, args.message_recall)
+    task_threshold = min(pick_threshold(holdout_scores, holdout_labels, args.task_recall), message_threshold)
+    report("message", holdout_scores, holdout_labels, message_threshold)
+    report("task", holdout_scores, holdout_labels, task_threshold)
+
+    weights, bias = fit(examples)
+    output = Path(args.output)
+    np.savez_compressed(
+        output,
+        weights=weights.astype(np.float32),
+        bias=np.float64(bias),
+        hash_bits=np.int64(args.hash_bits),
+        message_threshold=np.float64(message_threshold),
+        task_threshold=np.float64(task_threshold),
+    )
+    print(f"Model written: {output} ({len(examples)} examples, {output.stat().st_size} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
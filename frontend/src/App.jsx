@@ -137,6 +137,8 @@ export default function App() {
         isTaskDetailsEditing={board.isTaskDetailsEditing}
         commentsLoading={board.commentsLoading}
         comments={board.comments}
+        hasEarlierComments={board.hasEarlierComments}
+        loadEarlierComments={board.loadEarlierComments}
         commentText={board.commentText}
         setCommentText={board.setCommentText}
         createComment={board.createComment}
@@ -46,6 +46,8 @@ export default function ProjectBoardView({
   isTaskDetailsEditing,
   commentsLoading,
   comments,
+  hasEarlierComments,
+  loadEarlierComments,
   commentText,
   setCommentText,
   createComment,
@@ -213,6 +215,8 @@ export default function ProjectBoardView({
         isTaskDetailsEditing={isTaskDetailsEditing}
         commentsLoading={commentsLoading}
         comments={comments}
+        hasEarlierComments={hasEarlierComments}
+        onLoadEarlierComments={loadEarlierComments}
         commentText={commentText}
         setCommentText={setCommentText}
         onCreateComment={createComment}
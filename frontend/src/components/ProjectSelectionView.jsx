@@ -84,7 +84,11 @@ export default function ProjectSelectionView({
                 {deletingProjectId === project.id ? '…' : '🗑'}
               </button>
               <h3>{project.title}</h3>
-              <p className="screen-subtitle">Откройте карточку, чтобы перейти в проект</p>
+              <p className="screen-subtitle">
+                {project.task_count != null
+                  ? `Задач: ${project.task_count} · в работе: ${project.in_progress_task_count ?? 0} · готово: ${project.done_task_count ?? 0} · открытых спринтов: ${project.open_sprint_count ?? 0}`
+                  : 'Откройте карточку, чтобы перейти в проект'}
+              </p>
             </article>
           ))}
       </section>
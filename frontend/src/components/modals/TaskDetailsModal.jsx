@@ -12,6 +12,8 @@ export default function TaskDetailsModal({
   isTaskDetailsEditing,
   commentsLoading,
   comments,
+  hasEarlierComments,
+  onLoadEarlierComments,
   commentText,
   setCommentText,
   onCreateComment,
@@ -135,6 +137,11 @@ export default function TaskDetailsModal({
         <div className="comment-list">
           {commentsLoading && <div className="empty compact">Загружаем комментарии...</div>}
           {!commentsLoading && comments.length === 0 && <div className="empty compact">Комментариев нет</div>}
+          {!commentsLoading && hasEarlierComments && (
+            <button type="button" className="back-btn" onClick={onLoadEarlierComments}>
+              Показать более ранние
+            </button>
+          )}
           {!commentsLoading &&
             comments.map((comment) => (
               <article className="comment-card" key={comment.id}>
@@ -31,6 +31,7 @@ export function useBoard({ selectedProject, tgId }) {
   });
   const [comments, setComments] = useState([]);
   const [commentsLoading, setCommentsLoading] = useState(false);
+  const [commentsPage, setCommentsPage] = useState(null);
   const [commentText, setCommentText] = useState('');
   const [taskHistory, setTaskHistory] = useState([]);
   const [taskHistoryLoading, setTaskHistoryLoading] = useState(false);
@@ -81,17 +82,13 @@ export function useBoard({ selectedProject, tgId }) {
     setBoardLoading(true);
     setBoardError(null);
     try {
-      const [tasksRes, sprintsRes] = await Promise.all([
-        fetch(`${apiBase}/projects/${projectId}/tasks?tg_id=${encodeURIComponent(userTgId)}`),
-        fetch(`${apiBase}/projects/${projectId}/sprints?tg_id=${encodeURIComponent(userTgId)}`),
-      ]);
-      if (!tasksRes.ok || !sprintsRes.ok) {
-        throw new Error(`Не удалось загрузить данные проекта (${tasksRes.status}/${sprintsRes.status})`);
+      const boardRes = await fetch(`${apiBase}/projects/${projectId}/board?tg_id=${encodeURIComponent(userTgId)}`);
+      if (!boardRes.ok) {
+        throw new Error(`Не удалось загрузить данные проекта (${boardRes.status})`);
       }
-      const tasksData = await tasksRes.json();
-      const sprintsData = await sprintsRes.json();
-      setTasks(Array.isArray(tasksData?.tasks) ? tasksData.tasks : []);
-      const sprintList = Array.isArray(sprintsData?.sprints) ? sprintsData.sprints : [];
+      const boardData = await boardRes.json();
+      setTasks(Array.isArray(boardData?.tasks) ? boardData.tasks : []);
+      const sprintList = Array.isArray(boardData?.sprints) ? boardData.sprints : [];
       setSprints(sprintList);
       setExpandedSprints((prev) => {
         const next = { ...prev };
@@ -220,6 +217,7 @@ export function useBoard({ selectedProject, tgId }) {
     setShowTaskHistoryModal(false);
     setTaskDetailsEditing({ title: false, description: false, status: false, execution_hours: false });
     setCommentText('');
+    setCommentsPage(null);
     setTaskHistory([]);
   }, []);
 
@@ -270,7 +268,9 @@ export function useBoard({ selectedProject, tgId }) {
       }
       const data = await response.json();
       const items = Array.isArray(data?.comments) ? data.comments : [];
+      const page = data?.page ?? null;
       setComments(items);
+      setCommentsPage(page);
       const lastCommentAt = items.length ? items[items.length - 1]?.created_at : null;
       markTaskCommentsRead(taskId, lastCommentAt);
       setTasks((prev) =>
@@ -278,7 +278,7 @@ export function useBoard({ selectedProject, tgId }) {
           task.id === taskId
             ? {
                 ...task,
-                comment_count: items.length,
+                comment_count: page?.has_more_before ? Math.max(Number(task.comment_count ?? 0), items.length) : items.length,
                 unread_comment_count: 0,
                 last_comment_at: lastCommentAt || task.last_comment_at,
               }
@@ -288,11 +288,35 @@ export function useBoard({ selectedProject, tgId }) {
     } catch (error) {
       setBoardError(`Не удалось загрузить комментарии. ${error?.message ?? ''}`.trim());
       setComments([]);
+      setCommentsPage(null);
     } finally {
       setCommentsLoading(false);
     }
   }, [tgId, markTaskCommentsRead]);
 
+  const loadEarlierComments = useCallback(async () => {
+    if (!tgId || !taskDetails?.id || !commentsPage?.has_more_before || !commentsPage?.before_cursor) return;
+    try {
+      const apiBase = getApiBase();
+      const response = await fetch(
+        `${apiBase}/tasks/${taskDetails.id}/comments?tg_id=${encodeURIComponent(tgId)}&before=${encodeURIComponent(commentsPage.before_cursor)}`
+      );
+      if (!response.ok) {
+        throw new Error(`Comments failed ${response.status}`);
+      }
+      const data = await response.json();
+      const items = Array.isArray(data?.comments) ? data.comments : [];
+      setComments((prev) => [...items, ...prev]);
+      setCommentsPage((prev) => ({
+        ...prev,
+        has_more_before: !!data?.page?.has_more_before,
+        before_cursor: data?.page?.before_cursor ?? null,
+      }));
+    } catch (error) {
+      setBoardError(`Не удалось загрузить комментарии. ${error?.message ?? ''}`.trim());
+    }
+  }, [tgId, taskDetails?.id, commentsPage]);
+
   const loadTaskHistory = useCallback(async (taskId) => {
     if (!tgId) return;
     setTaskHistoryLoading(true);
@@ -400,6 +424,8 @@ export function useBoard({ selectedProject, tgId }) {
     setTaskDetailsEditing,
     comments,
     commentsLoading,
+    hasEarlierComments: !!commentsPage?.has_more_before,
+    loadEarlierComments,
     commentText,
     setCommentText,
     taskHistory,